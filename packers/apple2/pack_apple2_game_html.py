@@ -13,10 +13,27 @@ Supported formats: .dsk, .do, .po, .nib, .woz
 """
 
 import argparse, base64, os, re, sys, urllib.request, json
+from html import escape
+from collections import Counter
+from itertools import accumulate
+from operator import xor
 
 # ============================================================
-#  Apple II Disk Parser (basic .dsk catalog reader)
+#  Apple II Disk Parser (DOS 3.3 catalog and file reader)
 # ============================================================
+DOS33_FILE_TYPES = {0x00: 'T', 0x01: 'I', 0x02: 'A', 0x04: 'B',
+                    0x08: 'S', 0x10: 'R', 0x20: 'A', 0x40: 'B'}
+
+def read_dsk_sector(data, track, sector):
+    """Return one 256-byte sector of a DOS-order .dsk image, or None."""
+    # DOS 3.3: 16 sectors/track, 256 bytes/sector
+    # DOS 3.1/3.2: 13 sectors/track
+    sectors_per_track = 13 if len(data) == 116480 else 16
+    offset = (track * sectors_per_track + sector) * 256
+    if offset + 256 <= len(data):
+        return data[offset:offset + 256]
+    return None
+
 def parse_dsk_catalog(data):
     """Parse a DOS 3.3 .dsk file and return catalog entries."""
     entries = []
@@ -24,20 +41,9 @@ def parse_dsk_catalog(data):
     if len(data) != 143360 and len(data) != 116480:
         return entries  # Not a standard .dsk
     
-    # DOS 3.3: 16 sectors/track, 256 bytes/sector
-    # Catalog starts at track 17, sector 15
-    # DOS 3.1/3.2: 13 sectors/track
-    sectors_per_track = 16 if len(data) == 143360 else 13
-    bytes_per_sector = 256
-    
-    def read_sector(track, sector):
-        offset = (track * sectors_per_track + sector) * bytes_per_sector
-        if offset + bytes_per_sector <= len(data):
-            return data[offset:offset + bytes_per_sector]
-        return None
-    
     # Read VTOC (Volume Table of Contents) at track 17, sector 0
-    vtoc = read_sector(17, 0)
+    # Catalog starts at track 17, sector 15
+    vtoc = read_dsk_sector(data, 17, 0)
     if not vtoc:
         return entries
     
@@ -48,7 +54,7 @@ def parse_dsk_catalog(data):
     visited = set()
     while cat_track != 0 and (cat_track, cat_sector) not in visited:
         visited.add((cat_track, cat_sector))
-        sector_data = read_sector(cat_track, cat_sector)
+        sector_data = read_dsk_sector(data, cat_track, cat_sector)
         if not sector_data:
             break
         
@@ -68,16 +74,16 @@ def parse_dsk_catalog(data):
             # Strip high bits and decode
             name = ''.join(chr(b & 0x7F) for b in name_bytes).strip()
             
-            type_map = {0x00: 'T', 0x01: 'I', 0x02: 'A', 0x04: 'B',
-                        0x08: 'S', 0x10: 'R', 0x20: 'A', 0x40: 'B'}
-            ft = type_map.get(file_type & 0x7F, '?')
+            ft = DOS33_FILE_TYPES.get(file_type & 0x7F, '?')
             locked = '*' if file_type & 0x80 else ' '
             
             entries.append({
                 'name': name,
                 'type': ft,
                 'locked': locked,
-                'full': f"{locked}{ft} {name}"
+                'full': f"{locked}{ft} {name}",
+                'ts_list': (entry[0], entry[1]),
+                'sectors': entry[33] | entry[34] << 8,
             })
         
         cat_track = sector_data[1]
@@ -85,45 +91,648 @@ def parse_dsk_catalog(data):
     
     return entries
 
+def read_dos33_file(data, entry):
+    """Follow a catalog entry's track/sector lists and return the file's bytes.
+    
+    Only the sectors the file occupies are read, so the cost scales with
+    the file, not the disk.
+    """
+    chunks = []
+    ts_track, ts_sector = entry['ts_list']
+    visited = set()
+    while ts_track != 0 and (ts_track, ts_sector) not in visited:
+        visited.add((ts_track, ts_sector))
+        ts_list = read_dsk_sector(data, ts_track, ts_sector)
+        if not ts_list:
+            break
+        
+        # Up to 122 track/sector pairs from offset $0C; (0, 0) ends the file
+        for i in range(0x0C, 0x100, 2):
+            track, sector = ts_list[i], ts_list[i + 1]
+            if track == 0:
+                return b''.join(chunks)
+            sector_data = read_dsk_sector(data, track, sector)
+            if sector_data is None:
+                return b''.join(chunks)
+            chunks.append(sector_data)
+        
+        ts_track = ts_list[1]
+        ts_sector = ts_list[2]
+    
+    return b''.join(chunks)
+
+def extract_dos33_files(data, entries=None):
+    """Return the files of a DOS 3.3 image with their DOS headers removed.
+    
+    Each file is a dict with 'name', 'type', 'full', 'data' and, for
+    binaries, 'address'. BASIC programs lose their length word, binaries
+    their address/length words and text files end at the first $00.
+    """
+    if entries is None:
+        entries = parse_dsk_catalog(data)
+    files = []
+    for entry in entries:
+        raw = read_dos33_file(data, entry)
+        f = {'name': entry['name'], 'type': entry['type'], 'full': entry['full']}
+        if entry['type'] in ('A', 'I') and len(raw) >= 2:
+            f['data'] = raw[2:2 + (raw[0] | raw[1] << 8)]
+        elif entry['type'] == 'B' and len(raw) >= 4:
+            f['address'] = raw[0] | raw[1] << 8
+            f['data'] = raw[4:4 + (raw[2] | raw[3] << 8)]
+        elif entry['type'] == 'T':
+            end = raw.find(b'\x00')
+            f['data'] = raw if end < 0 else raw[:end]
+        else:
+            f['data'] = raw
+        files.append(f)
+    return files
+
+# ============================================================
+#  Disk Image Formats (.po, .nib, .woz → DOS-order sectors)
+# ============================================================
+# Every format is turned into a DOS-order 140 KB image, so the DOS 3.3 and
+# ProDOS readers only ever deal with one sector layout.
+DISK_TRACKS = 35
+NIB_TRACK_SIZE = 6656
+
+# Physical sector of each DOS 3.3 logical sector, and of each 256-byte
+# half block of a ProDOS-order track
+DOS_TO_PHYSICAL = [0, 13, 11, 9, 7, 5, 3, 1, 14, 12, 10, 8, 6, 4, 2, 15]
+PRODOS_TO_PHYSICAL = [0, 2, 4, 6, 8, 10, 12, 14, 1, 3, 5, 7, 9, 11, 13, 15]
+PHYSICAL_TO_DOS = [DOS_TO_PHYSICAL.index(p) for p in range(16)]
+PRODOS_TO_DOS = [PHYSICAL_TO_DOS[p] for p in PRODOS_TO_PHYSICAL]
+
+# 6-and-2 GCR: the 64 valid disk bytes, in order of the 6-bit value each carries
+GCR62_ENCODE = bytes.fromhex(
+    '96979a9b9d9e9fa6a7abacadaeafb2b3'
+    'b4b5b6b7b9babbbcbdbebfcbcdcecfd3'
+    'd6d7d9dadbdcdddedfe5e6e7e9eaebec'
+    'edeeeff2f3f4f5f6f7f9fafbfcfdfeff')
+# Its inverse as a bytes.translate() table; invalid disk bytes become $FF
+_GCR62_DECODE = bytes(GCR62_ENCODE.index(b) if b in GCR62_ENCODE else 0xFF for b in range(256))
+# Byte i of a sector keeps its low two bits, swapped, in auxiliary value
+# i % 86 at bit 2 * (i // 86): one table per bit pair extracts them, and
+# another shifts the 6-bit main values into place.
+_SWAP_2BITS = (0, 2, 1, 3)
+_AUX_PAIR = [bytes(_SWAP_2BITS[v >> shift & 3] for v in range(256)) for shift in (0, 2, 4)]
+_SHIFT_LEFT_2 = bytes(v << 2 & 0xFF for v in range(256))
+
+_ADDRESS_FIELD_RE = re.compile(rb'\xD5\xAA\x96(.{8})', re.DOTALL)
+# A nibble is a 1 bit and the 7 bits after it; zero bits before it are sync
+_NIBBLE_BITS_RE = re.compile('0*(1[01]{7})')
+_NIBBLE_VALUE = {format(v, '08b'): v for v in range(0x80, 0x100)}
+
+def prodos_order_to_dos(data):
+    """Reorder a ProDOS-order (.po) 140 KB image into DOS order."""
+    out = bytearray(len(data))
+    for track in range(len(data) // 4096):
+        base = track * 4096
+        for po_sector, dos_sector in enumerate(PRODOS_TO_DOS):
+            src = base + po_sector * 256
+            dst = base + dos_sector * 256
+            out[dst:dst + 256] = data[src:src + 256]
+    return bytes(out)
+
+def decode_6and2(nibbles):
+    """Decode the 343 disk bytes of a sector data field to 256 bytes, or None."""
+    values = nibbles.translate(_GCR62_DECODE)
+    if len(values) < 343 or max(values) > 0x3F:
+        return None
+    # Each disk byte is the XOR of two consecutive values; the checksum
+    # brings the running XOR back to zero
+    values = bytes(accumulate(values[:343], xor))
+    if values[342]:
+        return None
+    aux = values[:86]
+    low = (aux.translate(_AUX_PAIR[0]) + aux.translate(_AUX_PAIR[1])
+           + aux[:84].translate(_AUX_PAIR[2]))
+    high = values[86:342].translate(_SHIFT_LEFT_2)
+    return (int.from_bytes(high, 'big') | int.from_bytes(low, 'big')).to_bytes(256, 'big')
+
+def decode_nibble_track(nibbles, track, image):
+    """Decode the 16-sector fields of one track of disk bytes into image, a
+    DOS-order bytearray. Returns the number of sectors decoded."""
+    stream = bytes(nibbles) + bytes(nibbles[:1024])  # fields may wrap around
+    found = set()
+    for m in _ADDRESS_FIELD_RE.finditer(stream):
+        field = m.group(1)
+        # 4-and-4 encoded volume, track, sector and checksum; the track is
+        # taken from the image position, as some protections renumber it
+        volume, trk, sector, checksum = (((field[i] << 1) | 1) & field[i + 1] for i in range(0, 8, 2))
+        if volume ^ trk ^ sector != checksum or sector > 15 or sector in found:
+            continue
+        start = stream.find(b'\xD5\xAA\xAD', m.end(), m.end() + 64)
+        if start < 0:
+            continue
+        sector_data = decode_6and2(stream[start + 3:start + 3 + 343])
+        if sector_data is None:
+            continue
+        found.add(sector)
+        offset = (track * 16 + PHYSICAL_TO_DOS[sector]) * 256
+        image[offset:offset + 256] = sector_data
+    return len(found)
+
+def woz_track_nibbles(bits, bit_count):
+    """Turn a WOZ track bitstream into the disk bytes the controller reads."""
+    stream = format(int.from_bytes(bits, 'big'), f'0{len(bits) * 8}b')[:bit_count]
+    return bytes(map(_NIBBLE_VALUE.__getitem__, _NIBBLE_BITS_RE.findall(stream)))
+
+def decode_woz(data):
+    """Decode a WOZ 1/2 image of a 5.25" disk to a DOS-order image, or None."""
+    if data[:4] not in (b'WOZ1', b'WOZ2') or data[4:8] != b'\xFF\x0A\x0D\x0A':
+        return None
+    chunks = {}
+    pos = 12
+    while pos + 8 <= len(data):
+        size = int.from_bytes(data[pos + 4:pos + 8], 'little')
+        chunks[data[pos:pos + 4]] = pos + 8
+        pos += 8 + size
+    if not all(c in chunks for c in (b'INFO', b'TMAP', b'TRKS')) or data[chunks[b'INFO'] + 1] != 1:
+        return None
+    
+    tmap = data[chunks[b'TMAP']:chunks[b'TMAP'] + 160]
+    trks = chunks[b'TRKS']
+    tracks = []
+    for track in range(DISK_TRACKS):
+        index = tmap[track * 4]
+        if index == 0xFF:
+            tracks.append(b'')
+        elif data[:4] == b'WOZ1':
+            # 6646 bitstream bytes, then bytes used and bit count
+            rec = trks + index * 6656
+            bit_count = int.from_bytes(data[rec + 6648:rec + 6650], 'little')
+            tracks.append(woz_track_nibbles(data[rec:rec + 6646], bit_count))
+        else:
+            # TRK entries: first 512-byte block, block count, bit count
+            rec = trks + index * 8
+            block = int.from_bytes(data[rec:rec + 2], 'little')
+            count = int.from_bytes(data[rec + 2:rec + 4], 'little')
+            bit_count = int.from_bytes(data[rec + 4:rec + 8], 'little')
+            tracks.append(woz_track_nibbles(data[block * 512:(block + count) * 512], bit_count))
+    return nibble_tracks_to_image(tracks)
+
+def nibble_tracks_to_image(tracks):
+    """Decode per-track disk bytes to a DOS-order image (None if nothing decodes)."""
+    image = bytearray(DISK_TRACKS * 16 * 256)
+    decoded = sum(decode_nibble_track(nibbles, track, image) for track, nibbles in enumerate(tracks))
+    return bytes(image) if decoded else None
+
+def decode_disk_image(data, ext):
+    """Return the DOS-order images a disk file may hold, most likely first.
+    
+    .po is reordered, .nib and .woz are decoded from their nibble streams;
+    a 140 KB .dsk may be in either order, so both readings are offered.
+    An empty list means the image could not be decoded.
+    """
+    if ext == 'woz':
+        image = decode_woz(data)
+        return [image] if image else []
+    if ext == 'nib':
+        if len(data) != DISK_TRACKS * NIB_TRACK_SIZE:
+            return []
+        image = nibble_tracks_to_image(
+            [data[t * NIB_TRACK_SIZE:(t + 1) * NIB_TRACK_SIZE] for t in range(DISK_TRACKS)])
+        return [image] if image else []
+    if len(data) == 143360:
+        if ext == 'po':
+            return [prodos_order_to_dos(data)]
+        if ext == 'do':
+            return [data]
+        return [data, prodos_order_to_dos(data)]
+    if len(data) == 116480:
+        return [data]
+    return []
+
+# ============================================================
+#  ProDOS Reader
+# ============================================================
+PRODOS_FILE_TYPES = {0x04: 'T', 0x06: 'B', 0xFA: 'I', 0xFC: 'A', 0xFF: 'S'}
+
+def read_prodos_block(image, block):
+    """Return one 512-byte ProDOS block of a DOS-order image, or None."""
+    track, half = divmod(block, 8)
+    first = read_dsk_sector(image, track, PRODOS_TO_DOS[2 * half])
+    second = read_dsk_sector(image, track, PRODOS_TO_DOS[2 * half + 1])
+    if first is None or second is None or track >= DISK_TRACKS:
+        return None
+    return first + second
+
+def _prodos_index(image, block):
+    # Index blocks hold 256 pointers: low bytes, then high bytes
+    data = read_prodos_block(image, block) or bytes(512)
+    return [data[i] | data[256 + i] << 8 for i in range(256)]
+
+def parse_prodos_catalog(image):
+    """Walk a ProDOS volume directory (and its subdirectories) and return
+    file entries in the same shape as parse_dsk_catalog()."""
+    entries = []
+    if len(image) != 143360:
+        return entries
+    key = read_prodos_block(image, 2)
+    # Volume directory header: storage type $F, 39-byte entries, 13 per block
+    if not key or key[4] >> 4 != 0xF or key[0x23] != 0x27 or key[0x24] != 0x0D:
+        return entries
+    
+    visited = set()
+    pending = [(2, '')]
+    while pending:
+        block, prefix = pending.pop(0)
+        while block and block not in visited:
+            visited.add(block)
+            data = read_prodos_block(image, block)
+            if not data:
+                break
+            for offset in range(4, 4 + 13 * 0x27, 0x27):
+                entry = data[offset:offset + 0x27]
+                storage = entry[0] >> 4
+                if storage in (0, 0xE, 0xF):
+                    continue  # deleted, or a directory header
+                name = prefix + entry[1:1 + (entry[0] & 0x0F)].decode('ascii', 'replace')
+                key_block = entry[0x11] | entry[0x12] << 8
+                if storage == 0xD:
+                    pending.append((key_block, name + '/'))
+                    continue
+                ft = PRODOS_FILE_TYPES.get(entry[0x10], '?')
+                locked = ' ' if entry[0x1E] & 0x02 else '*'
+                entries.append({
+                    'name': name,
+                    'type': ft,
+                    'locked': locked,
+                    'full': f"{locked}{ft} {name}",
+                    'storage': storage,
+                    'key_block': key_block,
+                    'eof': entry[0x15] | entry[0x16] << 8 | entry[0x17] << 16,
+                    'aux': entry[0x1F] | entry[0x20] << 8,
+                })
+            block = data[2] | data[3] << 8
+    
+    return entries
+
+def read_prodos_file(image, entry):
+    """Return a ProDOS file's bytes (seedling, sapling or tree)."""
+    if entry['storage'] == 1:
+        blocks = [entry['key_block']]
+    elif entry['storage'] == 2:
+        blocks = _prodos_index(image, entry['key_block'])
+    elif entry['storage'] == 3:
+        # A zero master entry is a sparse run of 256 blocks, not a gap to skip
+        blocks = [b for index in _prodos_index(image, entry['key_block'])
+                  for b in (_prodos_index(image, index) if index else [0] * 256)]
+    else:
+        return b''
+    # Only the blocks up to EOF; a zero pointer is a sparse (all-zero) block
+    blocks = blocks[:(entry['eof'] + 511) // 512]
+    data = b''.join((read_prodos_block(image, b) if b else None) or bytes(512) for b in blocks)
+    return data[:entry['eof']]
+
+def extract_prodos_files(image, entries=None):
+    """Return the files of a ProDOS volume in the extract_dos33_files() shape;
+    binaries and system files take their load address from the aux type."""
+    if entries is None:
+        entries = parse_prodos_catalog(image)
+    files = []
+    for entry in entries:
+        f = {'name': entry['name'], 'type': entry['type'], 'full': entry['full'],
+             'data': read_prodos_file(image, entry)}
+        if entry['type'] in ('B', 'S'):
+            f['address'] = entry['aux'] if entry['type'] == 'B' else 0x2000
+        files.append(f)
+    return files
+
+def read_disk_files(data, ext):
+    """Decode a disk image of any supported format and extract its files.
+    
+    Returns (filesystem, image, files): filesystem is 'DOS 3.3', 'ProDOS'
+    or None, image the DOS-order sectors (None if the format could not be
+    decoded) and files as returned by extract_dos33_files().
+    """
+    images = decode_disk_image(data, ext)
+    for image in images:
+        entries = parse_dsk_catalog(image)
+        if entries:
+            return 'DOS 3.3', image, extract_dos33_files(image, entries)
+        entries = parse_prodos_catalog(image)
+        if entries:
+            return 'ProDOS', image, extract_prodos_files(image, entries)
+    return None, images[0] if images else None, []
+
+# ============================================================
+#  BASIC Detokenizers
+# ============================================================
+APPLESOFT_TOKENS = [
+    'END', 'FOR', 'NEXT', 'DATA', 'INPUT', 'DEL', 'DIM', 'READ',
+    'GR', 'TEXT', 'PR#', 'IN#', 'CALL', 'PLOT', 'HLIN', 'VLIN',
+    'HGR2', 'HGR', 'HCOLOR=', 'HPLOT', 'DRAW', 'XDRAW', 'HTAB', 'HOME',
+    'ROT=', 'SCALE=', 'SHLOAD', 'TRACE', 'NOTRACE', 'NORMAL', 'INVERSE', 'FLASH',
+    'COLOR=', 'POP', 'VTAB', 'HIMEM:', 'LOMEM:', 'ONERR', 'RESUME', 'RECALL',
+    'STORE', 'SPEED=', 'LET', 'GOTO', 'RUN', 'IF', 'RESTORE', '&',
+    'GOSUB', 'RETURN', 'REM', 'STOP', 'ON', 'WAIT', 'LOAD', 'SAVE',
+    'DEF', 'POKE', 'PRINT', 'CONT', 'LIST', 'CLEAR', 'GET', 'NEW',
+    'TAB(', 'TO', 'FN', 'SPC(', 'THEN', 'AT', 'NOT', 'STEP',
+    '+', '-', '*', '/', '^', 'AND', 'OR', '>',
+    '=', '<', 'SGN', 'INT', 'ABS', 'USR', 'FRE', 'SCRN(',
+    'PDL', 'POS', 'SQR', 'RND', 'LOG', 'EXP', 'COS', 'SIN',
+    'TAN', 'ATN', 'PEEK', 'LEN', 'STR$', 'VAL', 'ASC', 'CHR$',
+    'LEFT$', 'RIGHT$', 'MID$',
+]  # tokens $80-$EA
+
+# Integer BASIC tokens $00-$7F (several bytes share a keyword and differ
+# only in the syntax context they were tokenized in)
+INTEGER_TOKENS = [
+    'HIMEM:', '', '_', ':', 'LOAD', 'SAVE', 'CON', 'RUN',
+    'RUN', 'DEL', ',', 'NEW', 'CLR', 'AUTO', ',', 'MAN',
+    'HIMEM:', 'LOMEM:', '+', '-', '*', '/', '=', '#',
+    '>=', '>', '<=', '<>', '<', 'AND', 'OR', 'MOD',
+    '^', '+', '(', ',', 'THEN', 'THEN', ',', ',',
+    '"', '"', '(', '!', '!', '(', 'PEEK', 'RND',
+    'SGN', 'ABS', 'PDL', 'RNDX', '(', '+', '-', 'NOT',
+    '(', '=', '#', 'LEN(', 'ASC(', 'SCRN(', ',', '(',
+    '$', '$', '(', ',', ',', ';', ';', ';',
+    ',', ',', ',', 'TEXT', 'GR', 'CALL', 'DIM', 'DIM',
+    'TAB', 'END', 'INPUT', 'INPUT', 'INPUT', 'FOR', '=', 'TO',
+    'STEP', 'NEXT', ',', 'RETURN', 'GOSUB', 'REM', 'LET', 'GOTO',
+    'IF', 'PRINT', 'PRINT', 'PRINT', 'POKE', ',', 'COLOR=', 'PLOT',
+    ',', 'HLIN', ',', 'AT', 'VLIN', ',', 'AT', 'VTAB',
+    '=', '=', ')', ')', 'LIST', ',', 'LIST', 'POP',
+    'NODSP', 'DSP', 'NOTRACE', 'DSP', 'DSP', 'TRACE', 'PR#', 'IN#',
+]
+
+def _append_keyword(out, word, next_text):
+    """Append a keyword LIST-style: spaced from neighbouring names but
+    kept next to an opening parenthesis, so 'GET A$' and 'PDL(0)' read
+    as typed."""
+    if out and word[0].isalpha() and out[-1][-1:].isalnum():
+        out.append(' ')
+    out.append(word)
+    if word[-1].isalpha() and not next_text.startswith('('):
+        out.append(' ')
+
+def detokenize_applesoft(program, keywords=None):
+    """Return the listing of a tokenized Applesoft BASIC program.
+    
+    If keywords is a Counter, every keyword token is counted into it.
+    """
+    lines = []
+    pos = 0
+    # Each line: next-line pointer, line number, tokens, $00
+    while pos + 4 <= len(program):
+        if program[pos] == 0 and program[pos + 1] == 0:
+            break
+        number = program[pos + 2] | program[pos + 3] << 8
+        end = program.find(b'\x00', pos + 4)
+        if end < 0:
+            end = len(program)
+        out = []
+        for i in range(pos + 4, end):
+            b = program[i]
+            if b >= 0x80:
+                if b - 0x80 < len(APPLESOFT_TOKENS):
+                    nxt = program[i + 1] if i + 1 < end else 0
+                    _append_keyword(out, APPLESOFT_TOKENS[b - 0x80], chr(nxt))
+                    if keywords is not None:
+                        keywords[APPLESOFT_TOKENS[b - 0x80]] += 1
+            else:
+                out.append(chr(b))
+        lines.append(f"{number} {''.join(out).strip()}")
+        pos = end + 1
+    return '\n'.join(lines)
+
+def detokenize_integer(program, keywords=None):
+    """Return the listing of a tokenized Integer BASIC program.
+    
+    If keywords is a Counter, every keyword token is counted into it.
+    """
+    lines = []
+    pos = 0
+    # Each line: length byte, line number, tokens, $01
+    while pos + 3 < len(program):
+        line_len = program[pos]
+        if line_len == 0:
+            break
+        number = program[pos + 1] | program[pos + 2] << 8
+        end = min(pos + line_len, len(program))
+        out = []
+        i = pos + 3
+        while i < end and program[i] != 0x01:
+            b = program[i]
+            if 0xB0 <= b <= 0xB9:
+                # Numeric constant: marker, then a 16-bit value
+                out.append(str(program[i + 1] | program[i + 2] << 8) if i + 2 < end else '')
+                i += 3
+            elif 0xC1 <= b <= 0xDA:
+                # Variable name: letters, then letters or digits
+                j = i
+                while j < end and (0xC1 <= program[j] <= 0xDA or 0xB0 <= program[j] <= 0xB9):
+                    j += 1
+                out.append(bytes(c & 0x7F for c in program[i:j]).decode('ascii'))
+                i = j
+            elif b in (0x28, 0x5D):
+                # String literal or REM: high-ASCII text up to the closing
+                # quote ($29) or the end of the line
+                _append_keyword(out, INTEGER_TOKENS[b], '')
+                j = i + 1
+                while j < end and program[j] >= 0x80:
+                    j += 1
+                out.append(bytes(c & 0x7F for c in program[i + 1:j]).decode('ascii'))
+                if j < end and program[j] == 0x29:
+                    out.append('"')
+                    j += 1
+                i = j
+            elif b < 0x80:
+                nxt = program[i + 1] if i + 1 < end else 0x01
+                _append_keyword(out, INTEGER_TOKENS[b], INTEGER_TOKENS[nxt] if nxt < 0x80 else '')
+                if keywords is not None:
+                    keywords[INTEGER_TOKENS[b]] += 1
+                i += 1
+            else:
+                out.append(chr(b & 0x7F))
+                i += 1
+        lines.append(f"{number} {''.join(out).strip()}")
+        pos += line_len
+    return '\n'.join(lines)
+
 # ============================================================
 #  Key Detection
 # ============================================================
-def detect_keys_from_disk(data):
-    """Detect likely key usage from disk content."""
-    keys = set()
-    
-    # Try to find text content
-    try:
-        # Look for common adventure game keywords in the disk
-        text = ''.join(chr(b & 0x7F) for b in data if 32 <= (b & 0x7F) <= 126)
-        
-        # Text adventure patterns (French/English)
-        adventure_words = ['NORD', 'SUD', 'EST', 'OUEST', 'NORTH', 'SOUTH', 'EAST', 'WEST',
-                          'PRENDRE', 'TAKE', 'GET', 'LOOK', 'REGARDER', 'OUVRIR', 'OPEN',
-                          'INVENTAIRE', 'INVENTORY', 'ALLER', 'GO', 'ENTRER', 'ENTER',
-                          'EXAMINER', 'EXAMINE', 'UTILISER', 'USE', 'DIRE', 'SAY']
-        
-        text_upper = text.upper()
-        adventure_score = sum(1 for w in adventure_words if w in text_upper)
-        
-        if adventure_score >= 3:
-            keys.add('FULL_KEYBOARD')
-            keys.add('TEXT_ADVENTURE')
-        
-        # Look for INPUT or GET statements (Applesoft BASIC)
-        if 'INPUT' in text_upper or 'GET ' in text_upper:
-            keys.add('FULL_KEYBOARD')
-        
-        # Look for joystick/paddle references
-        if 'PDL(' in text_upper or 'PADDLE' in text_upper:
-            keys.update(['UP', 'DOWN', 'LEFT', 'RIGHT'])
-            
-    except:
-        pass
+# Text adventure patterns (French/English)
+ADVENTURE_WORDS = ['NORD', 'SUD', 'EST', 'OUEST', 'NORTH', 'SOUTH', 'EAST', 'WEST',
+                   'PRENDRE', 'TAKE', 'GET', 'LOOK', 'REGARDER', 'OUVRIR', 'OPEN',
+                   'INVENTAIRE', 'INVENTORY', 'ALLER', 'GO', 'ENTRER', 'ENTER',
+                   'EXAMINER', 'EXAMINE', 'UTILISER', 'USE', 'DIRE', 'SAY']
+# Keyboard input statements (Applesoft BASIC)
+INPUT_WORDS = ['INPUT', 'GET ']
+# Joystick/paddle references
+PADDLE_WORDS = ['PDL(', 'PADDLE']
+
+# One translate table strips the high bit and folds lowercase to uppercase;
+# bytes that are not printable ASCII once stripped are deleted, so words
+# split by control bytes still match.
+_TEXT_TABLE = bytes((b & 0x7F) - 32 if 0x61 <= (b & 0x7F) <= 0x7A else b & 0x7F for b in range(256))
+_TEXT_DELETE = bytes(b for b in range(256) if not 32 <= (b & 0x7F) <= 126)
+
+def _keyword_regex(words):
+    """Compile words into one regex factored by common prefix (a trie), so
+    each position is tried against one branch per first letter instead of
+    every word. The trie sits in a lookahead, so matches may overlap (EST
+    inside OUEST), and optional suffixes are greedy: at each position the
+    longest word wins ('EXAMINER' over 'EXAMINE')."""
+    trie = {}
+    for w in words:
+        node = trie
+        for ch in w.encode('ascii'):
+            node = node.setdefault(ch, {})
+        node[None] = True
+    
+    def emit(node):
+        alts = [re.escape(bytes([ch])) + emit(child)
+                for ch, child in sorted((k, v) for k, v in node.items() if k is not None)]
+        if not alts:
+            return b''
+        if len(alts) == 1 and None not in node:
+            return alts[0]
+        group = b'(?:' + b'|'.join(alts) + b')'
+        return group + b'?' if None in node else group
+    
+    return re.compile(b'(?=(' + emit(trie) + b'))')
+
+_KEYWORDS = set(ADVENTURE_WORDS + INPUT_WORDS + PADDLE_WORDS)
+_KEYWORD_RE = _keyword_regex(_KEYWORDS)
+# Keywords that start every longer keyword ('EXAMINE' in 'EXAMINER', 'GET' in
+# 'GET '): a longest match at a position is also a hit for each of them.
+_KEYWORD_PREFIXES = {w: [k for k in _KEYWORDS if k != w and w.startswith(k)]
+                     for w in _KEYWORDS}
+
+def scan_keywords(data):
+    """Count keyword occurrences in the printable text of a disk image.
+    
+    data may be bytes, bytearray or memoryview. The text is extracted with a
+    single bytes.translate() call and every keyword is matched in one regex
+    pass, so the cost is linear in the data whatever the number of keywords.
+    Every occurrence counts, including keywords inside longer words, as the
+    plain substring search this replaces did.
+    """
+    text = bytes(data).translate(_TEXT_TABLE, _TEXT_DELETE)
+    counts = Counter()
+    for word, n in Counter(_KEYWORD_RE.findall(memoryview(text))).items():
+        word = word.decode('ascii')
+        counts[word] += n
+        for prefix in _KEYWORD_PREFIXES[word]:
+            counts[prefix] += n
+    return +counts
+
+# Listing pieces that hold program text rather than code: string literals,
+# REM comments and DATA items (up to the next statement)
+_BASIC_TEXT_RE = re.compile(r'"([^"]*)"?|REM(.*)|DATA([^:]*)|(:)')
+_DOS_STRING_RE = re.compile(r'CHR\$\(4\)|\bD\$')
+
+def scan_basic(listing, keywords):
+    """Count key usage in a detokenized BASIC program.
+    
+    Keyboard and paddle statements come from the keyword tokens counted by
+    the detokenizer (INPUT and GET count as 'INPUT' / 'GET ', PDL as
+    'PDL('), so keywords never read as adventure vocabulary: GOSUB is not
+    GO and RESTORE holds no EST. Adventure words are only matched in the
+    program's text (strings, REM and DATA). Strings printed after CHR$(4)
+    or D$, or starting with Ctrl-D, are DOS commands and are skipped.
+    """
+    texts = []
+    for line in listing.split('\n'):
+        statement = 0
+        for m in _BASIC_TEXT_RE.finditer(line):
+            literal, rem, data, colon = m.groups()
+            if colon:
+                statement = m.end()
+            elif literal is not None:
+                if not (literal.startswith('\x04') or _DOS_STRING_RE.search(line, statement, m.start())):
+                    texts.append(literal)
+            else:
+                texts.append(rem if rem is not None else data)
+    counts = scan_keywords('\n'.join(texts).encode('ascii', 'replace'))
+    for word in INPUT_WORDS + ['PDL(']:
+        del counts[word]
+    counts['INPUT'] = keywords['INPUT']
+    counts['GET '] = keywords['GET']
+    counts['PDL('] = keywords['PDL']
+    return +counts
+
+# 6502 code that reads the keyboard or the game port: LDA/LDX/LDY/BIT
+# (absolute or indexed) of $C000 (KBD), $C061-$C063 (buttons) or
+# $C064-$C067 (paddles), and JSR to the monitor's PREAD ($FB1E) and
+# GETLN ($FD67/$FD6A/$FD6F) routines.
+_BINARY_IO_RE = re.compile(
+    rb'(?P<KBD>[\xAD\xAE\xAC\x2C\xBD\xB9]\x00\xC0)'
+    rb'|(?P<JOYSTICK>[\xAD\xAE\xAC\x2C\xBD\xB9][\x61-\x67]\xC0|\x20\x1E\xFB)'
+    rb'|(?P<GETLN>\x20[\x67\x6A\x6F]\xFD)')
+
+def scan_binary_io(code):
+    """Count keyboard, joystick and line-input accesses in 6502 code."""
+    return Counter(m.lastgroup for m in _BINARY_IO_RE.finditer(code))
+
+def analyze_files(files):
+    """Scan what each extracted file contains.
+    
+    Applesoft and Integer BASIC programs are detokenized and scanned with
+    scan_basic(); binaries are scanned for text and for keyboard/joystick
+    code; text files are scanned as text. Returns one report dict per file
+    with 'name', 'type', 'kind', 'size' (bytes of content), 'lines' (BASIC),
+    'address' (binaries) and 'counts'.
+    """
+    report = []
+    for f in files:
+        data = f['data']
+        info = {'name': f['name'], 'type': f['type'], 'kind': 'other',
+                'size': len(data), 'counts': Counter()}
+        if f['type'] in ('A', 'I'):
+            keywords = Counter()
+            if f['type'] == 'A':
+                listing = detokenize_applesoft(data, keywords)
+            else:
+                listing = detokenize_integer(data, keywords)
+            info.update(kind='applesoft' if f['type'] == 'A' else 'integer',
+                        lines=listing.count('\n') + 1 if listing else 0,
+                        counts=scan_basic(listing, keywords))
+        elif 'address' in f:
+            info.update(kind='binary', address=f['address'],
+                        counts=scan_keywords(data) + scan_binary_io(data))
+        elif f['type'] == 'T':
+            info.update(kind='text', counts=scan_keywords(data))
+        report.append(info)
+    return report
+
+def detect_keys_from_disk(data, report=None):
+    """Detect likely key usage from disk content.
+    
+    With a per-file report from analyze_files() only program text and
+    binaries are counted; without one (or for an empty catalog, e.g. a
+    copy-protected disk) the whole image is scanned as text.
+    
+    Returns a Counter of key groups weighted by how many keyword hits
+    support them ('FULL_KEYBOARD', 'TEXT_ADVENTURE', 'UP'/'DOWN'/'LEFT'/'RIGHT').
+    With no evidence at all it falls back to FULL_KEYBOARD with weight 0.
+    """
+    if report:
+        counts = sum((f['counts'] for f in report), Counter())
+    else:
+        counts = scan_keywords(data)
+    keys = Counter()
+    
+    adventure_hits = [counts[w] for w in ADVENTURE_WORDS if counts[w]]
+    if len(adventure_hits) >= 3:
+        keys['FULL_KEYBOARD'] += sum(adventure_hits)
+        keys['TEXT_ADVENTURE'] += sum(adventure_hits)
+    
+    input_hits = sum(counts[w] for w in INPUT_WORDS) + counts['GETLN']
+    if input_hits:
+        keys['FULL_KEYBOARD'] += input_hits
+    
+    paddle_hits = sum(counts[w] for w in PADDLE_WORDS) + counts['JOYSTICK']
+    if paddle_hits:
+        for k in ('UP', 'DOWN', 'LEFT', 'RIGHT'):
+            keys[k] += paddle_hits
     
     # If nothing detected, default to full keyboard (safe choice)
     if not keys:
-        keys.add('FULL_KEYBOARD')
+        keys['FULL_KEYBOARD'] = 0
     
     return keys
 
@@ -252,47 +861,9 @@ def build_keyboard_html(layout):
 # ============================================================
 #  HTML Generation
 # ============================================================
-def clean_css_for_embed(css):
-    """Clean apple2.css for embedding: replace image references with CSS alternatives."""
-    # Replace disk light PNGs with simple CSS
-    css = css.replace("url(red-off-16.png)", "none")
-    css = css.replace("url(red-on-16.png)", "none")
-    # Remove apple key images (not needed for gameplay)
-    css = re.sub(r'url\(\.\./img/[^)]+\)', 'none', css)
-    return css
-
-def generate_html(dsk_path, title, layout, bundle_js, css, rom_chunks, worker_js, model='apple2plus'):
-    """Generate the complete self-contained HTML file."""
-    
-    # Read and encode disk image
-    with open(dsk_path, 'rb') as f:
-        dsk_data = f.read()
-    dsk_b64 = base64.b64encode(dsk_data).decode()
-    
-    # Detect extension
-    ext = os.path.splitext(dsk_path)[1].lstrip('.').lower()
-    if ext == 'dsk':
-        ext = 'do'  # apple2js uses 'do' for DOS-order .dsk files
-    
-    keyboard_html = build_keyboard_html(layout)
-    
-    # Clean CSS for embedding
-    clean_css = clean_css_for_embed(css)
-    
-    # Generate help keys table
-    help_rows = []
-    if layout['arrows']:
-        help_rows.append('    <tr><td><kbd>↑N</kbd><kbd>↓S</kbd><kbd>←W</kbd><kbd>→E</kbd></td><td>Raccourcis : GO NORTH / SOUTH / WEST / EAST</td></tr>')
-    if layout['letters']:
-        help_rows.append('    <tr><td><kbd>A</kbd>-<kbd>Z</kbd></td><td>Saisie de texte / Commandes</td></tr>')
-    if layout['digits']:
-        help_rows.append(f'    <tr><td><kbd>0</kbd>-<kbd>9</kbd></td><td>Saisie numérique</td></tr>')
-    help_rows.append('    <tr><td><kbd>ESPACE</kbd></td><td>Continuer / Action</td></tr>')
-    help_rows.append('    <tr><td><kbd>RETURN</kbd></td><td>Valider la commande</td></tr>')
-    help_rows.append('    <tr><td><kbd>⌫</kbd></td><td>Effacer</td></tr>')
-    help_keys_html = '\n'.join(help_rows)
-    
-    html = '''<!DOCTYPE html>
+# Page template. __NAME__ slots are filled by generate_html(); the CSS,
+# ROM chunk and bundle slots come from build_engine_fragment().
+PAGE_TEMPLATE = '''<!DOCTYPE html>
 <html lang="fr">
 <head>
 <meta charset="UTF-8">
@@ -337,6 +908,25 @@ __APPLE2_CSS__
     @media(pointer:coarse),(hover:none){.float-btn{display:flex}}
     #kb-btn{top:8px;left:8px}
     #help-btn{top:8px;left:48px}
+    #disk-btn{top:8px;left:88px}
+    #disk-btn.multi{display:flex}
+
+    /* Disk swap panel */
+    #disks{
+      display:none;position:fixed;top:48px;left:8px;z-index:2500;
+      min-width:220px;max-height:70%;overflow-y:auto;padding:8px;
+      background:rgba(0,0,0,.9);border:1px solid rgba(0,255,0,.3);border-radius:6px;
+      color:#ddd;font-family:monospace;font-size:13px;
+    }
+    #disks .d{display:flex;align-items:center;gap:6px;margin:4px 0}
+    #disks .d span{flex:1;overflow:hidden;text-overflow:ellipsis;white-space:nowrap}
+    #disks button{
+      font-family:monospace;font-size:12px;font-weight:700;
+      color:#0f0;background:rgba(0,255,0,.08);
+      border:1px solid rgba(0,255,0,.2);border-radius:4px;
+      height:28px;padding:0 8px;cursor:pointer;
+    }
+    #disks button.on{background:rgba(0,255,0,.4);border-color:#0f0;color:#fff}
 
     /* Virtual keyboard */
     #vkb{
@@ -489,6 +1079,8 @@ __APPLE2_CSS__
 
 <button id="kb-btn" class="float-btn" aria-label="Clavier">⌨</button>
 <button id="help-btn" class="float-btn" aria-label="Aide">?</button>
+<button id="disk-btn" class="float-btn" aria-label="Disquettes">💾</button>
+<div id="disks"></div>
 
 <!-- Help overlay -->
 <div id="help">
@@ -503,6 +1095,7 @@ __APPLE2_CSS__
     <tr><th>Touche</th><th>Usage</th></tr>
 __HELP_KEYS__
   </table>
+__HELP_DISKS__
   <p class="tip">💡 Si le jeu ne répond pas, cliquez sur l'écran de l'émulateur pour lui donner le focus.</p>
   <p style="margin-top:16px;color:#888;font-size:12px;text-align:center">Émulé via apple2js — 100% hors-ligne</p>
 </div>
@@ -521,18 +1114,35 @@ __KEYBOARD_HTML__
 <!-- Pre-loaded ROM chunks (self-register via webpackChunkApple2) -->
 __ROM_CHUNKS__
 
-<!-- Intercept fetch to serve embedded disk -->
+<!-- Embedded disk images (base64, decoded on first insert) -->
+__DISK_SCRIPTS__
+
+<!-- Intercept fetch to serve embedded disks -->
 <script>
 (function(){
-  var DSK_B64="__DSK_B64__";
-  var DSK_EXT="__DSK_EXT__";
-  var DSK_NAME="__DSK_NAME__";
+  var DISKS=[].map.call(document.querySelectorAll("script.disk-data"),function(el){
+    return {el:el,name:el.dataset.name,ext:el.dataset.ext,bytes:null};
+  });
+  // The index keeps URLs unique when two disks share a (sanitized) name
+  function diskUrl(idx){return "embedded://"+(idx+1)+"-"+DISKS[idx].name+"."+DISKS[idx].ext}
+  function diskBytes(idx){
+    var d=DISKS[idx];
+    if(!d.bytes){
+      var binary=atob(d.el.textContent);
+      var bytes=new Uint8Array(binary.length);
+      for(var i=0;i<binary.length;i++)bytes[i]=binary.charCodeAt(i);
+      d.bytes=bytes;
+      d.el.textContent="";
+    }
+    return d.bytes;
+  }
   var origFetch=window.fetch;
   window.fetch=function(url,opts){
     if(typeof url==="string" && url.indexOf("embedded://")===0){
-      var binary=atob(DSK_B64);
-      var bytes=new Uint8Array(binary.length);
-      for(var i=0;i<binary.length;i++)bytes[i]=binary.charCodeAt(i);
+      var idx=0;
+      for(var i=0;i<DISKS.length;i++)if(url===diskUrl(i))idx=i;
+      // Hand out a copy so the emulator never writes into the cached image
+      var bytes=diskBytes(idx).slice();
       return Promise.resolve(new Response(bytes.buffer,{
         status:200,
         headers:{"Content-Type":"application/octet-stream","Content-Length":String(bytes.length)}
@@ -540,7 +1150,19 @@ __ROM_CHUNKS__
     }
     return origFetch.apply(this,arguments);
   };
-  window.location.hash=encodeURIComponent("embedded://"+DSK_NAME+"."+DSK_EXT);
+  // apple2js reads "drive1|drive2" from the hash; an empty part leaves that drive alone
+  var drives=[0,__DRIVE2__];
+  window.A2Disks={
+    list:DISKS,
+    drives:drives,
+    insert:function(idx,drive){
+      drives[drive-1]=idx;
+      var hash=drive===2?"|"+diskUrl(idx):diskUrl(idx);
+      window.location.hash=encodeURIComponent(hash);
+    }
+  };
+  window.location.hash=encodeURIComponent(
+    diskUrl(0)+(drives[1]>=0?"|"+diskUrl(drives[1]):""));
 })();
 </script>
 
@@ -590,6 +1212,41 @@ document.getElementById("help-btn").onclick=function(e){
   h.style.display=h.style.display==="block"?"none":"block";
 };
 
+// --- Disk swap panel (only shown for multi-disk games) ---
+(function(){
+  var A2D=window.A2Disks;
+  var btn=document.getElementById("disk-btn");
+  var panel=document.getElementById("disks");
+  if(A2D.list.length<2)return;
+  btn.classList.add("multi");
+  function render(){
+    panel.innerHTML="";
+    A2D.list.forEach(function(d,idx){
+      var row=document.createElement("div");row.className="d";
+      var label=document.createElement("span");label.textContent=d.el.dataset.label;
+      row.appendChild(label);
+      [1,2].forEach(function(drive){
+        var b=document.createElement("button");
+        b.textContent="D"+drive;
+        b.title="Insérer dans le lecteur "+drive;
+        if(A2D.drives[drive-1]===idx)b.className="on";
+        b.onclick=function(e){
+          e.stopPropagation();
+          A2D.insert(idx,drive);render();
+          document.getElementById("screen").focus();
+        };
+        row.appendChild(b);
+      });
+      panel.appendChild(row);
+    });
+  }
+  btn.onclick=function(e){
+    e.stopPropagation();
+    if(panel.style.display==="block"){panel.style.display="none";return}
+    render();panel.style.display="block";
+  };
+})();
+
 // --- Virtual Keyboard Toggle ---
 var vkb=document.getElementById("vkb");
 var kbBtn=document.getElementById("kb-btn");
@@ -689,31 +1346,139 @@ window.addEventListener("load",function(){
 </script>
 </body>
 </html>'''
+# Alternating static text and slot names, split once
+_PAGE_PARTS = re.split(r'__([A-Z0-9_]+)__', PAGE_TEMPLATE)
+
+def clean_css_for_embed(css):
+    """Clean apple2.css for embedding: replace image references with CSS alternatives."""
+    # Replace disk light PNGs with simple CSS
+    css = css.replace("url(red-off-16.png)", "none")
+    css = css.replace("url(red-on-16.png)", "none")
+    # Remove apple key images (not needed for gameplay)
+    css = re.sub(r'url\(\.\./img/[^)]+\)', 'none', css)
+    return css
+
+def build_disk_scripts(dsk_paths):
+    """Embed each disk image in its own base64 <script> block.
+    
+    The page decodes a disk only when it is first inserted, so extra disks
+    cost file size but no startup time.
+    """
+    scripts = []
+    for idx, dsk_path in enumerate(dsk_paths):
+        with open(dsk_path, 'rb') as f:
+            dsk_b64 = base64.b64encode(f.read()).decode()
+        
+        base, ext = os.path.splitext(os.path.basename(dsk_path))
+        ext = ext.lstrip('.').lower()
+        if ext == 'dsk':
+            ext = 'do'  # apple2js uses 'do' for DOS-order .dsk files
+        # The name ends up in the disk URL, keep it URL- and attribute-safe
+        name = re.sub(r'[^A-Za-z0-9_-]+', '_', base) or f'disk{idx + 1}'
+        scripts.append(f'<script class="disk-data" type="application/octet-stream;base64" '
+                       f'data-name="{name}" data-ext="{ext}" data-label="{escape(base)}">'
+                       f'{dsk_b64}</script>')
+    return '\n'.join(scripts)
+
+def generate_html(dsk_paths, title, layout, engine, model='apple2plus', drive2=False):
+    """Generate the complete self-contained HTML file.
+    
+    dsk_paths is one disk image path or a list of them; the engine is
+    embedded once and the first disk boots in drive 1. With drive2 the
+    second disk starts in drive 2, otherwise it waits in the swap panel.
+    engine is the fragment from build_engine_fragment(); only the disks,
+    title and keyboard are rendered per game.
+    """
+    if isinstance(dsk_paths, str):
+        dsk_paths = [dsk_paths]
+    
+    keyboard_html = build_keyboard_html(layout)
     
-    # Build ROM chunks inline scripts
-    rom_chunks_html = ''
-    for chunk_id, chunk_js in rom_chunks:
-        rom_chunks_html += f'<script>{chunk_js}</script>\n'
+    # Generate help keys table
+    help_rows = []
+    if layout['arrows']:
+        help_rows.append('    <tr><td><kbd>↑N</kbd><kbd>↓S</kbd><kbd>←W</kbd><kbd>→E</kbd></td><td>Raccourcis : GO NORTH / SOUTH / WEST / EAST</td></tr>')
+    if layout['letters']:
+        help_rows.append('    <tr><td><kbd>A</kbd>-<kbd>Z</kbd></td><td>Saisie de texte / Commandes</td></tr>')
+    if layout['digits']:
+        help_rows.append(f'    <tr><td><kbd>0</kbd>-<kbd>9</kbd></td><td>Saisie numérique</td></tr>')
+    help_rows.append('    <tr><td><kbd>ESPACE</kbd></td><td>Continuer / Action</td></tr>')
+    help_rows.append('    <tr><td><kbd>RETURN</kbd></td><td>Valider la commande</td></tr>')
+    help_rows.append('    <tr><td><kbd>⌫</kbd></td><td>Effacer</td></tr>')
+    help_keys_html = '\n'.join(help_rows)
     
-    # Replace placeholders
-    html = html.replace('__TITLE__', title)
-    html = html.replace('__APPLE2_CSS__', clean_css)
-    html = html.replace('__KEYBOARD_HTML__', keyboard_html)
-    html = html.replace('__HELP_KEYS__', help_keys_html)
-    html = html.replace('__ROM_CHUNKS__', rom_chunks_html)
-    html = html.replace('__DSK_B64__', dsk_b64)
-    html = html.replace('__DSK_EXT__', ext)
-    html = html.replace('__DSK_NAME__', title.replace('"', ''))
-    html = html.replace('__APPLE2JS_BUNDLE__', bundle_js)
+    help_disks_html = ''
+    if len(dsk_paths) > 1:
+        help_disks_html = (f'  <h3>Disquettes</h3>\n'
+                           f'  <p>Ce jeu utilise {len(dsk_paths)} disquettes. Le bouton <kbd>💾</kbd> '
+                           f'insère une disquette dans le lecteur 1 (<kbd>D1</kbd>) ou 2 (<kbd>D2</kbd>) '
+                           f'quand le jeu la demande.</p>')
     
-    return html
+    values = dict(engine)
+    values.update({
+        'TITLE': title,
+        'KEYBOARD_HTML': keyboard_html,
+        'HELP_KEYS': help_keys_html,
+        'HELP_DISKS': help_disks_html,
+        'DISK_SCRIPTS': build_disk_scripts(dsk_paths),
+        'DRIVE2': '1' if drive2 and len(dsk_paths) > 1 else '-1',
+    })
+    # One join over the pre-split template, no repeated replace() passes
+    return ''.join(values[part] if i % 2 else part for i, part in enumerate(_PAGE_PARTS))
+
+# ============================================================
+#  Engine Fragment
+# ============================================================
+def build_engine_fragment(bundle_js, css, rom_chunks):
+    """Prepare the game-independent part of the page: cleaned CSS, ROM
+    chunk <script> tags and the apple2js bundle, keyed by template slot."""
+    rom_chunks_html = ''.join(f'<script>{chunk_js}</script>\n' for chunk_id, chunk_js in rom_chunks)
+    return {'APPLE2_CSS': clean_css_for_embed(css),
+            'ROM_CHUNKS': rom_chunks_html,
+            'APPLE2JS_BUNDLE': bundle_js}
 
 # ============================================================
 #  Main
 # ============================================================
+def analyze_disk(dsk_path):
+    """Read one disk image, print its catalog and return its key Counter."""
+    print(f"🍎 Reading disk image: {dsk_path}")
+    with open(dsk_path, 'rb') as f:
+        dsk_data = f.read()
+    print(f"   Size: {len(dsk_data)} bytes ({len(dsk_data)//1024} KB)")
+    
+    ext = os.path.splitext(dsk_path)[1].lstrip('.').lower()
+    print(f"   Format: .{ext}")
+    
+    # Decode the image, read its catalog and extract files
+    print(f"🔍 Reading disk catalog...")
+    filesystem, image, files = read_disk_files(dsk_data, ext)
+    report = analyze_files(files)
+    if files:
+        print(f"   {filesystem}: found {len(files)} files:")
+        for e, f in zip(files, report):
+            detail = f"{f['kind']:<9} {f['size']:>6} B"
+            if 'lines' in f:
+                detail += f", {f['lines']} lines"
+            if 'address' in f:
+                detail += f" @ ${f['address']:04X}"
+            hits = ' '.join(f"{k}×{n}" for k, n in f['counts'].most_common(4))
+            print(f"     {e['full']:<34} {detail}{'  ' + hits if hits else ''}")
+    elif image:
+        print("   No catalog entries found (custom DOS or copy-protected), scanning decoded sectors")
+    else:
+        print("   Could not decode the disk image, scanning raw data")
+    
+    # Detect keys
+    print(f"🎹 Analyzing keyboard usage{' (file contents)' if report else ''}...")
+    return detect_keys_from_disk(image or dsk_data, report)
+
 def main():
-    parser = argparse.ArgumentParser(description='Pack an Apple II disk image into a self-contained HTML file')
-    parser.add_argument('dsk', help='Path to disk image (.dsk, .do, .po, .nib, .woz)')
+    parser = argparse.ArgumentParser(description='Pack Apple II disk images into a self-contained HTML file')
+    parser.add_argument('dsk', nargs='+',
+                       help='Path to disk image (.dsk, .do, .po, .nib, .woz); several for a multi-disk game')
+    parser.add_argument('--drive2', action='store_true',
+                       help='Start with the second disk in drive 2 (default: drive 1 only)')
     parser.add_argument('--title', '-t', help='Game title (default: filename)')
     parser.add_argument('--model', '-m', default='apple2plus',
                        choices=['apple2', 'apple2plus', 'apple2e'],
@@ -726,34 +1491,18 @@ def main():
     parser.add_argument('--cache-dir', default='.apple2js_cache', help='Directory to cache downloaded assets')
     args = parser.parse_args()
     
-    if not os.path.isfile(args.dsk):
-        print(f"Error: File not found: {args.dsk}")
-        sys.exit(1)
-    
-    # Read disk
-    print(f"🍎 Reading disk image: {args.dsk}")
-    with open(args.dsk, 'rb') as f:
-        dsk_data = f.read()
-    print(f"   Size: {len(dsk_data)} bytes ({len(dsk_data)//1024} KB)")
-    
-    ext = os.path.splitext(args.dsk)[1].lstrip('.').lower()
-    print(f"   Format: .{ext}")
-    
-    # Parse catalog (for .dsk files)
-    if ext in ('dsk', 'do'):
-        print(f"🔍 Parsing DOS 3.3 catalog...")
-        entries = parse_dsk_catalog(dsk_data)
-        if entries:
-            print(f"   Found {len(entries)} files:")
-            for e in entries:
-                print(f"     {e['full']}")
-        else:
-            print("   No catalog entries found (may be ProDOS or copy-protected)")
+    for dsk_path in args.dsk:
+        if not os.path.isfile(dsk_path):
+            print(f"Error: File not found: {dsk_path}")
+            sys.exit(1)
     
-    # Detect keys
-    print(f"🎹 Analyzing keyboard usage...")
-    keys = detect_keys_from_disk(dsk_data)
-    print(f"   Detected patterns: {sorted(keys)}")
+    # One keyboard for the whole game: merge the evidence from every disk
+    keys = Counter()
+    for dsk_path in args.dsk:
+        keys.update(+analyze_disk(dsk_path))
+    if not keys:
+        keys['FULL_KEYBOARD'] = 0
+    print(f"   Detected patterns: {', '.join(f'{k} ({n})' for k, n in keys.most_common())}")
     
     layout = determine_keyboard_layout(keys, args.extra_keys)
     print(f"   Keyboard layout: arrows={layout['arrows']}, letters={len(layout['letters'])}, digits={len(layout['digits'])}")
@@ -763,7 +1512,7 @@ def main():
         return
     
     # Title
-    title = args.title or os.path.splitext(os.path.basename(args.dsk))[0]
+    title = args.title or os.path.splitext(os.path.basename(args.dsk[0]))[0]
     
     # Download/load assets
     print(f"📦 Loading apple2js assets...")
@@ -802,12 +1551,15 @@ def main():
         rom_chunks.append((chunk_id, chunk_js))
         print(f"   Chunk {chunk_id}: {len(chunk_js)//1024} KB")
     
+    # Engine part of the page, shared by every disk of this pack
+    engine = build_engine_fragment(bundle_js, css, rom_chunks)
+    
     # Generate HTML
     print(f"🏗️  Generating HTML...")
-    html = generate_html(args.dsk, title, layout, bundle_js, css, rom_chunks, worker_js, args.model)
+    html = generate_html(args.dsk, title, layout, engine, args.model, drive2=args.drive2)
     
     # Output
-    output_path = args.output or os.path.splitext(args.dsk)[0] + '.html'
+    output_path = args.output or os.path.splitext(args.dsk[0])[0] + '.html'
     with open(output_path, 'w', encoding='utf-8') as f:
         f.write(html)
     
@@ -815,6 +1567,8 @@ def main():
     print(f"\n✅ Done! Output: {output_path} ({size_kb:.0f} KB)")
     print(f"   🔌 100% offline — no internet needed")
     print(f"   📱 Mobile virtual keyboard included")
+    if len(args.dsk) > 1:
+        print(f"   💾 {len(args.dsk)} disks, swap panel included")
     print(f"   🍎 Emulated via apple2js (Apple ][+)")
 
 if __name__ == '__main__':
@@ -10,41 +10,51 @@ Usage:
     python3 pack_cpc_game.py game.dsk --analyze-only
 """
 
-import argparse, base64, os, re, struct, sys, urllib.request
+import argparse, base64, hashlib, json, os, re, struct, sys, urllib.request
+from collections import Counter
 
 # ============================================================
 #  DSK Parser
 # ============================================================
-def parse_dsk(data):
-    """Parse a DSK/EDSK file and return catalog entries and raw sectors."""
+def index_dsk(data):
+    """Index the sectors of a DSK/EDSK image without copying them.
+    
+    Returns a dict mapping (track, side, sector_id) to (offset, length)
+    into data, in the order the sectors appear in the file.
+    """
     header = data[:256]
-    sig = header[:34].decode('ascii', errors='replace')
+    sig = bytes(header[:34]).decode('ascii', errors='replace')
     is_extended = 'EXTENDED' in sig.upper()
     
     num_tracks = header[48]
     num_sides = header[49]
     
-    entries = []
-    sectors_data = {}
+    index = {}
     
     offset = 256
     for t in range(num_tracks):
         for s in range(num_sides):
+            if is_extended:
+                # Track size table; 0 (or past the table) is an unformatted
+                # track with no Track-Info block in the file
+                size_pos = 52 + t * num_sides + s
+                track_size = header[size_pos] * 256 if size_pos < len(header) else 0
+                if not track_size:
+                    continue
+            else:
+                track_size = struct.unpack_from('<H', header, 50)[0]
             if offset + 256 > len(data):
                 break
             track_header = data[offset:offset+256]
-            track_sig = track_header[:12].decode('ascii', errors='replace')
-            if 'Track' not in track_sig:
+            if bytes(track_header[:5]) != b'Track':
                 break
             
-            num_sectors = track_header[21]
+            num_sectors = min(track_header[21], 29)  # the sector list fits 29 entries
             sector_size_default = 128 << track_header[20] if track_header[20] > 0 else 512
             
             sect_offset = offset + 256
             for si in range(num_sectors):
                 info_offset = 24 + si * 8
-                sect_track = track_header[info_offset]
-                sect_side = track_header[info_offset + 1]
                 sect_id = track_header[info_offset + 2]
                 sect_size_code = track_header[info_offset + 3]
                 
@@ -54,45 +64,294 @@ def parse_dsk(data):
                     actual_size = 128 << sect_size_code if sect_size_code > 0 else sector_size_default
                 
                 if sect_offset + actual_size <= len(data):
-                    sectors_data[(t, s, sect_id)] = data[sect_offset:sect_offset + actual_size]
+                    index[(t, s, sect_id)] = (sect_offset, actual_size)
                 sect_offset += actual_size
             
-            if is_extended:
-                track_size_entry = header[52 + t * num_sides + s]
-                offset += track_size_entry * 256
-            else:
-                track_size = struct.unpack_from('<H', header, 50)[0]
-                offset += track_size
+            offset += track_size
     
-    # Parse AMSDOS directory (track 0, sectors 0xC1-0xC4)
-    dir_data = b''
-    for sect_id in [0xC1, 0xC2, 0xC3, 0xC4]:
-        key = (0, 0, sect_id)
-        if key in sectors_data:
-            dir_data += sectors_data[key]
+    return index
+
+def read_sectors(data, index, keys=None):
+    """Join the given sectors (default: all, in file order) into one bytes object."""
+    view = memoryview(data)
+    if keys is None:
+        spans = index.values()
+    else:
+        spans = [index[k] for k in keys if k in index]
+    return b''.join(view[o:o + n] for o, n in spans)
+
+# AMSDOS disk formats, told apart by the first sector ID on track 0:
+# name -> (first sector ID, sectors per track, reserved tracks)
+DISK_FORMATS = {
+    0xC1: ('DATA', 9, 0),
+    0x41: ('SYSTEM', 9, 2),
+    0x01: ('IBM', 8, 1),
+}
+BLOCK_SIZE = 1024
+SECTOR_SIZE = 512
+DIR_BLOCKS = 2        # 64 directory entries of 32 bytes
+
+AMSDOS_FILE_TYPES = {0: 'BASIC', 1: 'BASIC (protected)', 2: 'BINARY', 6: 'ASCII'}
+
+# Printable ASCII plus tab/LF/CR, for telling headerless text from data
+_TEXT_BYTES = bytes(range(32, 127)) + b'\t\n\r'
+
+def detect_disk_format(index):
+    """Return (first_id, sectors_per_track, reserved_tracks, name) or None."""
+    ids = [sect_id for (t, side, sect_id) in index if t == 0 and side == 0]
+    if not ids:
+        return None
+    first_id = min(ids) & 0xC0 | 0x01
+    if first_id not in DISK_FORMATS:
+        return None
+    name, spt, reserved = DISK_FORMATS[first_id]
+    return first_id, spt, reserved, name
+
+def read_blocks(data, index, fmt, blocks):
+    """Join AMSDOS allocation blocks; missing sectors are left out."""
+    first_id, spt, reserved, _ = fmt
+    per_block = BLOCK_SIZE // SECTOR_SIZE
+    keys = []
+    for block in blocks:
+        for ls in range(block * per_block, (block + 1) * per_block):
+            keys.append((reserved + ls // spt, 0, first_id + ls % spt))
+    return read_sectors(data, index, keys)
+
+def parse_dsk(data):
+    """Parse a DSK/EDSK file and return catalog entries and the sector index.
+    
+    There is one entry per file, its directory extents merged: 'blocks'
+    lists the allocation blocks in order and 'records' the number of
+    128-byte records. Deleted entries and CP/M labels are skipped.
+    The index maps (track, side, sector_id) to (offset, length) into data;
+    use read_sectors() to get at the sector contents.
+    """
+    index = index_dsk(data)
+    fmt = detect_disk_format(index)
+    if not fmt:
+        return [], index
+    
+    dir_data = read_blocks(data, index, fmt, range(DIR_BLOCKS))
     
-    for i in range(0, len(dir_data), 32):
+    files = {}
+    for i in range(0, len(dir_data) - 31, 32):
         entry = dir_data[i:i+32]
-        if len(entry) < 32 or entry[0] == 0xE5:
-            continue
         user = entry[0]
+        if user > 15:  # 0xE5 = deleted
+            continue
         name = entry[1:9].decode('ascii', errors='replace').strip()
         ext = bytes([b & 0x7F for b in entry[9:12]]).decode('ascii', errors='replace').strip()
-        entries.append({'user': user, 'name': name, 'ext': ext, 'full': f"{name}.{ext}" if ext else name})
+        extent = entry[12] | (entry[14] << 5)
+        key = (user, name, ext)
+        if key not in files:
+            files[key] = {'user': user, 'name': name, 'ext': ext,
+                          'full': f"{name}.{ext}" if ext else name,
+                          'read_only': bool(entry[9] & 0x80), 'system': bool(entry[10] & 0x80),
+                          'extents': []}
+        blocks = [b for b in entry[16:32] if b]
+        files[key]['extents'].append((extent, entry[15], blocks))
     
-    return entries, sectors_data
+    entries = []
+    for e in files.values():
+        extents = sorted(e.pop('extents'))
+        e['blocks'] = [b for _, _, blocks in extents for b in blocks]
+        e['records'] = sum(min(records, 128) for _, records, _ in extents)
+        entries.append(e)
+    
+    return entries, index
+
+def parse_amsdos_header(data):
+    """Return the AMSDOS header fields if data starts with a valid header."""
+    if len(data) < 128 or not any(data[:0x43]):
+        return None
+    if sum(data[:0x43]) & 0xFFFF != struct.unpack_from('<H', data, 0x43)[0]:
+        return None
+    return {
+        'type': data[0x12],
+        'load': struct.unpack_from('<H', data, 0x15)[0],
+        'exec': struct.unpack_from('<H', data, 0x1A)[0],
+        'length': data[0x40] | (data[0x41] << 8) | (data[0x42] << 16),
+    }
+
+def read_amsdos_file(data, index, entry):
+    """Rebuild a file from its allocation blocks.
+    
+    Returns (content, header): the AMSDOS header is stripped and the
+    content cut to its logical length; header is None for headerless
+    files, which are cut at their last record.
+    """
+    fmt = detect_disk_format(index)
+    raw = read_blocks(data, index, fmt, entry['blocks'])[:entry['records'] * 128]
+    header = parse_amsdos_header(raw)
+    if header:
+        return raw[128:128 + header['length']], header
+    return raw, None
+
+def extract_files(data, index, entries):
+    """Read every catalog entry and classify its content.
+    
+    Returns dicts with 'name', 'ext', 'full', 'type' (see
+    AMSDOS_FILE_TYPES, 'DATA' for headerless binary content), 'data' and,
+    for binaries, 'address' and 'exec'.
+    """
+    files = []
+    for entry in entries:
+        content, header = read_amsdos_file(data, index, entry)
+        info = {'name': entry['name'], 'ext': entry['ext'], 'full': entry['full'], 'data': content}
+        if header:
+            info['type'] = AMSDOS_FILE_TYPES.get(header['type'] & 0x0F, 'BINARY')
+            if info['type'] == 'BINARY':
+                info['address'] = header['load']
+                info['exec'] = header['exec']
+        else:
+            # Headerless: ASCII text (e.g. BASIC saved with ,A) ends at the first ^Z
+            text = content.split(b'\x1a', 1)[0]
+            if text and len(text.translate(None, _TEXT_BYTES)) <= 0.05 * len(text):
+                info['type'] = 'ASCII'
+                info['data'] = text
+            else:
+                info['type'] = 'DATA'
+        files.append(info)
+    return files
+
+# ============================================================
+#  Locomotive BASIC
+# ============================================================
+# Keyword tokens 0x80-0xFE (Locomotive BASIC 1.1); '' = unused
+BASIC_KEYWORDS = [
+    'AFTER', 'AUTO', 'BORDER', 'CALL', 'CAT', 'CHAIN', 'CLEAR', 'CLG',                  # 80
+    'CLOSEIN', 'CLOSEOUT', 'CLS', 'CONT', 'DATA', 'DEF', 'DEFINT', 'DEFREAL',           # 88
+    'DEFSTR', 'DEG', 'DELETE', 'DIM', 'DRAW', 'DRAWR', 'EDIT', 'ELSE',                  # 90
+    'END', 'ENT', 'ENV', 'ERASE', 'ERROR', 'EVERY', 'FOR', 'GOSUB',                     # 98
+    'GOTO', 'IF', 'INK', 'INPUT', 'KEY', 'LET', 'LINE', 'LIST',                         # A0
+    'LOAD', 'LOCATE', 'MEMORY', 'MERGE', 'MID$', 'MODE', 'MOVE', 'MOVER',               # A8
+    'NEXT', 'NEW', 'ON', 'ON BREAK', 'ON ERROR GOTO', 'ON SQ', 'OPENIN', 'OPENOUT',     # B0
+    'ORIGIN', 'OUT', 'PAPER', 'PEN', 'PLOT', 'PLOTR', 'POKE', 'PRINT',                  # B8
+    "'", 'RAD', 'RANDOMIZE', 'READ', 'RELEASE', 'REM', 'RENUM', 'RESTORE',              # C0
+    'RESUME', 'RETURN', 'RUN', 'SAVE', 'SOUND', 'SPEED', 'STOP', 'SYMBOL',              # C8
+    'TAG', 'TAGOFF', 'TROFF', 'TRON', 'WAIT', 'WEND', 'WHILE', 'WIDTH',                 # D0
+    'WINDOW', 'WRITE', 'ZONE', 'DI', 'EI', 'FILL', 'GRAPHICS', 'MASK',                  # D8
+    'FRAME', 'CURSOR', '', 'ERL', 'FN', 'SPC', 'STEP', 'SWAP',                          # E0
+    '', '', 'TAB', 'THEN', 'TO', 'USING', '>', '=',                                     # E8
+    '>=', '<', '<>', '<=', '+', '-', '*', '/',                                          # F0
+    '^', '\\', 'AND', 'MOD', 'OR', 'XOR', 'NOT',                                        # F8
+]
+
+# Function tokens, prefixed by 0xFF
+BASIC_FUNCTIONS = {
+    0x00: 'ABS', 0x01: 'ASC', 0x02: 'ATN', 0x03: 'CHR$', 0x04: 'CINT', 0x05: 'COS',
+    0x06: 'CREAL', 0x07: 'EXP', 0x08: 'FIX', 0x09: 'FRE', 0x0A: 'INKEY', 0x0B: 'INP',
+    0x0C: 'INT', 0x0D: 'JOY', 0x0E: 'LEN', 0x0F: 'LOG', 0x10: 'LOG10', 0x11: 'LOWER$',
+    0x12: 'PEEK', 0x13: 'REMAIN', 0x14: 'SGN', 0x15: 'SIN', 0x16: 'SPACE$', 0x17: 'SQ',
+    0x18: 'SQR', 0x19: 'STR$', 0x1A: 'TAN', 0x1B: 'UNT', 0x1C: 'UPPER$', 0x1D: 'VAL',
+    0x40: 'EOF', 0x41: 'ERR', 0x42: 'HIMEM', 0x43: 'INKEY$', 0x44: 'PI', 0x45: 'RND',
+    0x46: 'TIME', 0x47: 'XPOS', 0x48: 'YPOS', 0x49: 'DERR',
+    0x71: 'BIN$', 0x72: 'DEC$', 0x73: 'HEX$', 0x74: 'INSTR', 0x75: 'LEFT$', 0x76: 'MAX',
+    0x77: 'MIN', 0x78: 'POS', 0x79: 'RIGHT$', 0x7A: 'ROUND', 0x7B: 'STRING$', 0x7C: 'TEST',
+    0x7D: 'TESTR', 0x7E: 'COPYCHR$', 0x7F: 'VPOS',
+}
+
+# Variable tokens and the type suffix they print with
+BASIC_VAR_SUFFIX = {0x02: '%', 0x03: '$', 0x04: '!', 0x0B: '', 0x0C: '', 0x0D: ''}
+
+def _basic_float(b):
+    """Decode the 5-byte BASIC real (4-byte mantissa, exponent biased by 128)."""
+    if not b[4]:
+        return '0'
+    mantissa = int.from_bytes(b[:4], 'little')
+    value = ((mantissa | 0x80000000) / 2 ** 32) * 2.0 ** (b[4] - 128)
+    return f"{-value if mantissa & 0x80000000 else value:.9g}"
+
+def _read_name(line, i):
+    """Read a name whose last character has bit 7 set; return (name, next index)."""
+    start = i
+    while i < len(line) and not line[i] & 0x80:
+        i += 1
+    return bytes(line[start:i]).decode('latin-1') + chr(line[i] & 0x7F) if i < len(line) else '', i + 1
+
+def detokenize_basic(program):
+    """Turn a tokenized Locomotive BASIC program into listing text."""
+    lines = []
+    pos = 0
+    while pos + 4 <= len(program):
+        length, number = struct.unpack_from('<HH', program, pos)
+        if length == 0:
+            break
+        line = program[pos + 4:pos + length]
+        pos += length
+        
+        out = []
+        i = 0
+        while i < len(line):
+            b = line[i]
+            i += 1
+            if b == 0x00:
+                break
+            elif b == 0x01:
+                out.append(':')
+            elif b in BASIC_VAR_SUFFIX:
+                name, i = _read_name(line, i + 2)  # skip the 2-byte value offset
+                out.append(name + BASIC_VAR_SUFFIX[b])
+            elif 0x0E <= b <= 0x17:
+                out.append(str(b - 0x0E))
+            elif b == 0x19:
+                out.append(str(line[i]) if i < len(line) else '')
+                i += 1
+            elif b in (0x1A, 0x1B, 0x1C, 0x1D, 0x1E):
+                value = line[i] | (line[i + 1] << 8) if i + 1 < len(line) else 0
+                i += 2
+                out.append({0x1B: f'&X{value:b}', 0x1C: f'&{value:X}'}.get(b, str(value)))
+            elif b == 0x1F:
+                out.append(_basic_float(line[i:i + 5]) if i + 5 <= len(line) else '')
+                i += 5
+            elif b == 0x22:
+                # String literal, copied up to the closing quote
+                end = line.find(b'"', i)
+                end = len(line) if end < 0 else end + 1
+                out.append('"' + bytes(line[i:end]).decode('latin-1'))
+                i = end
+            elif b == 0x7C:
+                name, i = _read_name(line, i + 1)  # |RSX: skip the offset byte
+                out.append('|' + name)
+            elif b < 0x80:
+                out.append(chr(b))
+            elif b == 0xFF:
+                out.append(BASIC_FUNCTIONS.get(line[i], '') if i < len(line) else '')
+                i += 1
+            else:
+                out.append(BASIC_KEYWORDS[b - 0x80])
+                if b in (0xC0, 0xC5):
+                    # Comment: the rest of the line is plain text
+                    out.append(bytes(line[i:]).split(b'\0', 1)[0].decode('latin-1'))
+                    break
+        lines.append(f"{number} {''.join(out)}")
+    return '\n'.join(lines)
 
 # ============================================================
 #  Key Detection from BASIC/Binary analysis
 # ============================================================
 CPC_FIRMWARE_KEY_CALLS = {
-    0xBB09: 'KM_WAIT_CHAR',    # Wait for keypress
-    0xBB06: 'KM_READ_CHAR',    # Read char (non-blocking)
-    0xBB0C: 'KM_READ_KEY',     # Read key
+    0xBB06: 'KM_WAIT_CHAR',    # Wait for a character
+    0xBB09: 'KM_READ_CHAR',    # Read char (non-blocking)
     0xBB18: 'KM_WAIT_KEY',     # Wait for key
-    0xBB1B: 'KM_TEST_KEY',     # Test specific key
+    0xBB1B: 'KM_READ_KEY',     # Read key (non-blocking)
+    0xBB1E: 'KM_TEST_KEY',     # Test specific key
+    0xBB24: 'KM_GET_JOYSTICK', # Read both joysticks
 }
 
+# Firmware vectors that read keys as characters / key numbers
+KEYBOARD_VECTORS = {'KM_WAIT_CHAR', 'KM_READ_CHAR', 'KM_WAIT_KEY', 'KM_READ_KEY', 'KM_TEST_KEY'}
+
+# Z80 CALL nn / JP nn opcodes, conditional forms included
+Z80_CALL_OPCODES = bytes([0xCD, 0xC4, 0xCC, 0xD4, 0xDC, 0xE4, 0xEC, 0xF4, 0xFC])
+Z80_JP_OPCODES = bytes([0xC3, 0xC2, 0xCA, 0xD2, 0xDA, 0xE2, 0xEA, 0xF2, 0xFA])
+
+# One pass for every (opcode, firmware address) pair. A match cannot hide
+# another one: the address bytes are never CALL/JP opcodes themselves.
+_FIRMWARE_CALL_RE = re.compile(
+    b'([' + re.escape(Z80_CALL_OPCODES + Z80_JP_OPCODES) + b'])(' +
+    b'|'.join(re.escape(struct.pack('<H', addr)) for addr in CPC_FIRMWARE_KEY_CALLS) + b')')
+
 BASIC_KEY_PATTERNS = {
     'INKEY$': ['any_key'],
     'INKEY(': ['specific_key'],
@@ -131,26 +390,104 @@ def detect_keys_from_basic(text):
         if 32 <= code <= 126:
             keys.add(chr(code).upper())
     
+    # CALL &BBxx - firmware keyboard calls from BASIC
+    for m in re.finditer(r'CALL\s*&([0-9A-Fa-f]{4})\b', text):
+        name = CPC_FIRMWARE_KEY_CALLS.get(int(m.group(1), 16))
+        if name == 'KM_GET_JOYSTICK':
+            keys.update(['UP', 'DOWN', 'LEFT', 'RIGHT', 'SPACE'])
+        elif name:
+            keys.add('FULL_KEYBOARD')
+    
     return keys
 
-def detect_keys_from_binary(data):
-    """Detect key usage from binary data by looking for firmware calls."""
-    keys = set()
-    has_key_scan = False
+def scan_firmware_calls(data):
+    """Count firmware call sites in Z80 code.
     
-    for i in range(len(data) - 2):
-        # CALL nn / JP nn / RST patterns
-        if data[i] == 0xCD:  # CALL
-            addr = data[i+1] | (data[i+2] << 8)
-            if addr in CPC_FIRMWARE_KEY_CALLS:
-                has_key_scan = True
-                keys.add(CPC_FIRMWARE_KEY_CALLS[addr])
+    Returns a Counter of CALL nn / JP nn sites per CPC_FIRMWARE_KEY_CALLS
+    name.
+    """
+    vectors = Counter()
+    for m in _FIRMWARE_CALL_RE.finditer(data):
+        vectors[CPC_FIRMWARE_KEY_CALLS[struct.unpack('<H', m.group(2))[0]]] += 1
+    return vectors
+
+def detect_keys_from_binary(data, vectors=None):
+    """Detect key usage from binary data by looking for firmware calls.
     
-    if has_key_scan:
-        keys.add('FULL_KEYBOARD')
+    Returns a Counter of key groups weighted by the number of call sites
+    behind them. vectors can pass in an existing scan_firmware_calls() result.
+    """
+    if vectors is None:
+        vectors = scan_firmware_calls(data)
+    keys = Counter()
+    
+    for name, count in vectors.items():
+        keys[name] += count
+        if name in KEYBOARD_VECTORS:
+            keys['FULL_KEYBOARD'] += count
+    
+    # KM GET JOYSTICK: directions plus fire
+    joystick = vectors['KM_GET_JOYSTICK']
+    if joystick:
+        for k in ('UP', 'DOWN', 'LEFT', 'RIGHT', 'SPACE'):
+            keys[k] += joystick
     
     return keys
 
+def analyze_files(files):
+    """Scan each extracted file according to its type.
+    
+    BASIC programs are detokenized and scanned as text with ASCII files;
+    binaries and headerless data are scanned for firmware calls. Protected
+    BASIC is encrypted and is not scanned. Returns one report dict per
+    file with 'kind', 'size', 'keys' (a Counter) and, where known,
+    'lines' and 'address'.
+    """
+    report = []
+    for f in files:
+        info = {'kind': f['type'], 'size': len(f['data']), 'keys': Counter()}
+        if f['type'] in ('BASIC', 'ASCII'):
+            text = detokenize_basic(f['data']) if f['type'] == 'BASIC' else f['data'].decode('latin-1')
+            info['lines'] = text.count('\n') + 1
+            info['keys'].update(sorted(detect_keys_from_basic(text)))
+        elif f['type'] in ('BINARY', 'DATA'):
+            info['keys'].update(detect_keys_from_binary(f['data']))
+        if 'address' in f:
+            info['address'] = f['address']
+        report.append(info)
+    return report
+
+# Loader names in priority order ('-' is a common French convention)
+LOADER_NAMES = ['DISC', 'DISK', 'MENU', 'LOADER', 'LOAD', 'MAIN', 'GAME', '-']
+
+def detect_run_command(files):
+    """Pick the RUN command from the extracted files.
+    
+    Standard loader names come first, then the only (or the most
+    loader-like) BASIC program, then a binary with an AMSDOS header.
+    """
+    def run(f):
+        # AMSDOS finds NAME, NAME.BAS and NAME.BIN without the extension
+        name = f['name'] if f['ext'] in ('', 'BAS', 'BIN') else f['full']
+        return f'run"{name.lower()}'
+    
+    basic = sorted((f for f in files if f['type'] in ('BASIC', 'BASIC (protected)', 'ASCII')
+                    and f['ext'] in ('', 'BAS')), key=lambda f: f['full'])
+    for loader in LOADER_NAMES:
+        for f in basic:
+            if f['name'] == loader:
+                return run(f)
+    if basic:
+        for f in basic:
+            if any(word in f['name'] for word in ('LOAD', 'MENU', 'DISC')):
+                return run(f)
+        return run(basic[0])
+    
+    for f in files:
+        if f['type'] == 'BINARY' and f['ext'] in ('', 'BIN'):
+            return run(f)
+    return run(files[0]) if files else None
+
 def determine_keyboard_layout(keys, extra_keys=None):
     """Determine the optimal virtual keyboard layout based on detected keys."""
     
@@ -196,13 +533,83 @@ def determine_keyboard_layout(keys, extra_keys=None):
 # ============================================================
 #  RVMPlayer download
 # ============================================================
-RVM_CDN_URL = "https://cdn.rvmplayer.org/rvmplayer.cpc6128.0.1.1.min.js"
+RVM_VERSION = "0.1.1"
+RVM_CDN_URL = "https://cdn.rvmplayer.org/rvmplayer.cpc6128.{version}.min.js"
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser('~'), '.cpc_emulator_cache')
+# sha256 of every RVMPlayer build fetched so far, pinned on first download
+RVM_MANIFEST = 'rvmplayer-manifest.json'
+
+def _load_manifest(cache_dir):
+    try:
+        with open(os.path.join(cache_dir, RVM_MANIFEST), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+def _save_manifest(cache_dir, manifest):
+    path = os.path.join(cache_dir, RVM_MANIFEST)
+    with open(path + '.part', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + '.part', path)
 
-def download_rvmplayer():
-    """Download RVMPlayer JS from CDN."""
-    print(f"  Downloading RVMPlayer from {RVM_CDN_URL}...")
-    req = urllib.request.Request(RVM_CDN_URL, headers={'User-Agent': 'Mozilla/5.0'})
-    return urllib.request.urlopen(req).read().decode('utf-8')
+def download_rvmplayer(cache_dir=DEFAULT_CACHE_DIR, version=RVM_VERSION, expected_sha256=None, offline=False):
+    """Return the RVMPlayer JS for version from the local cache, downloading it if needed.
+    
+    Each build is checked against a sha256: expected_sha256 if given,
+    otherwise the one recorded in the cache manifest when the build was
+    first downloaded. A cached copy that fails the check is fetched again;
+    a download that fails it is rejected. With offline the network is
+    never used and a missing or damaged cache is an error.
+    """
+    filename = f'rvmplayer.cpc6128.{version}.min.js'
+    url = RVM_CDN_URL.format(version=version)
+    cache_path = os.path.join(cache_dir, filename)
+    manifest = _load_manifest(cache_dir)
+    pinned = (expected_sha256 or manifest.get(filename, {}).get('sha256', '')).lower()
+    
+    if os.path.isfile(cache_path):
+        with open(cache_path, 'rb') as f:
+            data = f.read()
+        digest = hashlib.sha256(data).hexdigest()
+        if data and (not pinned or digest == pinned):
+            print(f"  Using cached: {cache_path}")
+            return data.decode('utf-8')
+        print(f"  ⚠ Cached {filename} does not match its sha256, ignoring it")
+    
+    if offline:
+        print(f"Error: RVMPlayer {version} is not in {cache_dir} (offline mode)")
+        print(f"  Run once without --offline, or pass --rvm-js")
+        sys.exit(1)
+    
+    print(f"  Downloading RVMPlayer from {url}...")
+    req = urllib.request.Request(url, headers={'User-Agent': 'Mozilla/5.0'})
+    try:
+        with urllib.request.urlopen(req, timeout=60) as resp:
+            data = resp.read()
+    except Exception as e:
+        print(f"Error: RVMPlayer download failed: {e}")
+        sys.exit(1)
+    
+    digest = hashlib.sha256(data).hexdigest()
+    if pinned and digest != pinned:
+        print(f"Error: RVMPlayer {version} sha256 mismatch")
+        print(f"  expected {pinned}")
+        print(f"  got      {digest}")
+        sys.exit(1)
+    if b'rvmPlayer_cpc6128' not in data:
+        print(f"Error: {url} did not return the RVMPlayer script")
+        sys.exit(1)
+    
+    # Write to a .part file first so an interrupted run never leaves a bad cache
+    os.makedirs(cache_dir, exist_ok=True)
+    with open(cache_path + '.part', 'wb') as f:
+        f.write(data)
+    os.replace(cache_path + '.part', cache_path)
+    manifest[filename] = {'sha256': digest, 'size': len(data), 'url': url}
+    _save_manifest(cache_dir, manifest)
+    print(f"  Cached {filename} (sha256 {digest[:16]}…)")
+    
+    return data.decode('utf-8')
 
 # ============================================================
 #  HTML Generation — Template matching hand-crafted quality
@@ -284,14 +691,17 @@ def build_keyboard_html(layout):
     
     return '\n'.join(html_parts)
 
-def generate_html(dsk_path, title, run_command, warp_seconds, layout, rvm_js):
+def generate_html(dsk_path, title, run_command, warp_seconds, layout, rvm_js, adaptive_warp=True):
     """Generate the complete self-contained HTML — matching hand-crafted quality.
-    Identical CSS, HTML structure, JS event handling to the reference version."""
+    Identical CSS, HTML structure, JS event handling to the reference version.
+    warp_seconds is the warp length of the first boot and the upper bound;
+    with adaptive_warp later boots use the warp learned per game."""
     
     # Read and encode DSK
     with open(dsk_path, 'rb') as f:
         dsk_data = f.read()
     dsk_b64 = base64.b64encode(dsk_data).decode()
+    game_id = hashlib.sha1(dsk_data).hexdigest()[:12]  # localStorage key for the learned warp
     
     keyboard_html = build_keyboard_html(layout)
     
@@ -425,16 +835,115 @@ const U=new Uint8Array(B.length);
 for(let i=0;i<B.length;i++)U[i]=B.charCodeAt(i);
 const dskUrl=URL.createObjectURL(new Blob([U],{type:"application/octet-stream"}));
 
+// --- Adaptive warp ---
+// RVMPlayer only takes warpFrames at start-up, so each boot learns the warp
+// the next one needs. A full-length boot learns the "ready" screen (the
+// last stable one, or the one the player first pressed a key on); later
+// boots shorten the warp and time how long after warp that screen shows
+// up. __WARP_FRAMES__ frames stays the hard upper bound.
+const warp=(function(){
+  const CAP=__WARP_FRAMES__, KEY="cpc-warp:__GAME_ID__";
+  const MIN=50, MARGIN=25;                // frames (CPC runs at 50fps)
+  const SAMPLE_MS=100, STABLE_MS=2000, CALIBRATE_MS=20000, TIMEOUT_MS=60000;
+  let st=null;
+  try{st=JSON.parse(localStorage.getItem(KEY))}catch(e){}
+  if(!__ADAPTIVE_WARP__||!st||st.cap!==CAP)st={cap:CAP,frames:CAP,good:CAP,bad:0,ready:null};
+  // MIN is a floor for learned values only: CAP itself may be below it (0 = no warp)
+  const frames=__ADAPTIVE_WARP__?Math.min(CAP,Math.max(MIN,st.frames)):CAP;
+
+  function save(next){
+    st.frames=Math.min(CAP,Math.max(MIN,Math.round(next)));
+    try{localStorage.setItem(KEY,JSON.stringify(st))}catch(e){}
+  }
+
+  // Coarse screen hash: 32x20 thumbnail, 3 brightness levels; null while black
+  const thumb=document.createElement("canvas");thumb.width=32;thumb.height=20;
+  const tctx=thumb.getContext("2d",{willReadFrequently:true});
+  function screenHash(){
+    const c=document.querySelector("#emu canvas");if(!c)return null;
+    try{tctx.drawImage(c,0,0,32,20)}catch(e){return null}
+    const d=tctx.getImageData(0,0,32,20).data;
+    let h=0,lit=0;
+    for(let i=0;i<d.length;i+=4){const v=(d[i]+d[i+1]+d[i+2])>>8;h=(Math.imul(h,31)+v)|0;lit|=v}
+    return lit?h:null;
+  }
+
+  function watch(){
+    const start=performance.now();
+    let sawBlank=false,warpEnd=0,last=0,done=false;
+    const seen=[];                        // [time, hash] since the end of warp
+
+    function finish(after){
+      // after: frames between the end of warp and the ready screen, null if unknown
+      done=true;
+      if(after===null)return save(st.good);
+      if(after<=2*SAMPLE_MS/20){
+        // Ready when warp ended: this warp works. Halve it until one is too
+        // short; after that the measured estimate was right, keep it.
+        st.good=Math.min(st.good,frames);
+        return save(st.bad?st.good:st.good/2);
+      }
+      // Still loading when warp ended: ready ~after frames later
+      st.bad=Math.max(st.bad,frames);
+      save(Math.min(st.good,frames+after+MARGIN));
+    }
+    function calibrate(now){
+      // Ready screen: at most two hashes (blinking cursor) over the last
+      // STABLE_MS; it appeared where that run of hashes began
+      const recent=seen.filter(function(x){return now-x[0]<=STABLE_MS});
+      const hashes=recent.map(function(x){return x[1]}).filter(function(h,i,a){return a.indexOf(h)===i});
+      if(!recent.length||hashes.length>2||hashes.indexOf(null)>=0)return finish(null);
+      let i=seen.length;
+      while(i>0&&hashes.indexOf(seen[i-1][1])>=0)i--;
+      if(now-seen[i][0]<STABLE_MS)return finish(null);
+      st.ready=hashes;
+      finish(Math.round((seen[i][0]-warpEnd)/20));
+    }
+    ["keydown","touchstart","mousedown"].forEach(function(ev){
+      window.addEventListener(ev,function(){
+        // The first key press marks the ready screen while calibrating
+        if(done)return;
+        if(!st.ready&&warpEnd)return calibrate(performance.now());
+        done=true;
+      },{capture:true,once:true});
+    });
+    function sample(now){
+      if(done)return;
+      if(now-last<SAMPLE_MS)return requestAnimationFrame(sample);
+      last=now;
+      if(now-start>TIMEOUT_MS)return finish(null);
+      const h=screenHash();
+      // Display is suppressed while warping: the first picture ends warp.
+      // Without a blank phase the end of warp is unknown, so nothing is learned.
+      if(!warpEnd){
+        if(h===null){sawBlank=true;return requestAnimationFrame(sample)}
+        if(!sawBlank)return finish(null);
+        warpEnd=now;
+      }
+      if(st.ready){
+        if(st.ready.indexOf(h)>=0)return finish(Math.round((now-warpEnd)/20));
+      }else{
+        seen.push([now,h]);
+        if(now-warpEnd>=CALIBRATE_MS)return calibrate(now);
+      }
+      requestAnimationFrame(sample);
+    }
+    requestAnimationFrame(sample);
+  }
+  return {frames:frames,watch:__ADAPTIVE_WARP__?watch:function(){}};
+})();
+
 // --- Emulator ---
 const emu=document.getElementById("emu");
 rvmPlayer_cpc6128(emu,{
   disk:{type:"dsk",url:dskUrl},
   command:'__RVM_COMMAND__',
-  warpFrames:__WARP_FRAMES__,
+  warpFrames:warp.frames,
   videoMode:"tv",
   pause:false,
   video:false
 });
+warp.watch();
 
 // --- Help toggle ---
 document.getElementById("help-btn").onclick=function(e){
@@ -512,6 +1021,8 @@ document.addEventListener("gesturestart",function(e){e.preventDefault()});
     html = html.replace('__DSK_B64__', dsk_b64)
     html = html.replace('__RVM_COMMAND__', rvm_command)
     html = html.replace('__WARP_FRAMES__', str(warp_frames))
+    html = html.replace('__GAME_ID__', game_id)
+    html = html.replace('__ADAPTIVE_WARP__', 'true' if adaptive_warp else 'false')
     html = html.replace('__RVMPLAYER_JS__', rvm_js)
     
     return html
@@ -524,11 +1035,18 @@ def main():
     parser.add_argument('dsk', help='Path to the DSK file')
     parser.add_argument('--title', '-t', help='Game title (default: filename)')
     parser.add_argument('--run', '-r', help='RUN command (default: auto-detect from catalog)')
-    parser.add_argument('--warp', '-w', type=int, default=20, help='Warp duration in seconds (default: 20)')
+    parser.add_argument('--warp', '-w', type=int, default=20,
+                        help='Warp duration in seconds for the first boot, and upper bound later (default: 20)')
+    parser.add_argument('--fixed-warp', action='store_true',
+                        help='Always warp for the full --warp duration (no per-game learning)')
     parser.add_argument('--extra-keys', '-k', nargs='+', help='Additional keys to add to virtual keyboard')
     parser.add_argument('--output', '-o', help='Output HTML file path')
     parser.add_argument('--analyze-only', '-a', action='store_true', help='Only analyze the DSK, do not generate HTML')
     parser.add_argument('--rvm-js', help='Path to local RVMPlayer JS file (skip download)')
+    parser.add_argument('--rvm-version', default=RVM_VERSION, help=f'RVMPlayer version to use (default: {RVM_VERSION})')
+    parser.add_argument('--rvm-sha256', help='Expected sha256 of the RVMPlayer JS (default: pinned on first download)')
+    parser.add_argument('--cache-dir', default=DEFAULT_CACHE_DIR, help='Directory to cache RVMPlayer (default: ~/.cpc_emulator_cache)')
+    parser.add_argument('--offline', action='store_true', help='Never download; use the cached RVMPlayer only')
     args = parser.parse_args()
     
     if not os.path.isfile(args.dsk):
@@ -544,53 +1062,48 @@ def main():
     # Parse DSK
     print(f"🔍 Parsing DSK...")
     entries, sectors = parse_dsk(dsk_data)
-    print(f"   Found {len(entries)} catalog entries:")
-    for e in entries:
-        print(f"     {e['full']}")
+    fmt = detect_disk_format(sectors)
+    print(f"   Format: {fmt[3] if fmt else 'unknown'}, {len(entries)} catalog entries{':' if entries else ''}")
+    
+    # Rebuild the files from their directory extents
+    files = extract_files(dsk_data, sectors, entries)
+    report = analyze_files(files)
+    for f, r in zip(files, report):
+        detail = f"{r['kind']:<17} {r['size']:>6} B"
+        if 'lines' in r:
+            detail += f", {r['lines']} lines"
+        if 'address' in r:
+            detail += f" @ &{r['address']:04X}"
+        hits = ' '.join(f"{k}×{n}" for k, n in r['keys'].most_common(4))
+        print(f"     {f['full']:<12} {detail}{'  ' + hits if hits else ''}")
     
     # Auto-detect RUN command
     run_cmd = args.run
     if not run_cmd:
-        # Find the first entry that looks like a loader
-        for e in entries:
-            if e['ext'] in ['', 'BAS', 'bas', ' ']:
-                run_cmd = f'run"{e["name"].lower()}'
-                break
-        if not run_cmd and entries:
-            run_cmd = f'run"{entries[0]["name"].lower()}'
-        if not run_cmd:
-            run_cmd = 'cat'
+        run_cmd = detect_run_command(files) or 'cat'
         print(f"   Auto-detected RUN command: {run_cmd}")
     else:
         print(f"   RUN command: {run_cmd}")
     
     # Analyze keys
-    print(f"🎹 Analyzing keyboard usage...")
-    all_keys = set()
+    print(f"🎹 Analyzing keyboard usage{' (file contents)' if files else ''}...")
+    all_keys = Counter()
     
-    for e in entries:
-        if e['ext'] in ['BAS', 'bas', '', ' ']:
-            # Try to find BASIC text in sectors
-            pass
-    
-    # Scan all sector data for firmware calls and text patterns
-    all_sector_data = b''
-    for key, data in sectors.items():
-        all_sector_data += data
-    
-    # Binary analysis
-    bin_keys = detect_keys_from_binary(all_sector_data)
-    all_keys.update(bin_keys)
-    
-    # Text pattern analysis
-    try:
-        text = all_sector_data.decode('ascii', errors='replace')
-        basic_keys = detect_keys_from_basic(text)
-        all_keys.update(basic_keys)
-    except:
-        pass
+    if files:
+        for r in report:
+            all_keys.update(r['keys'])
+    else:
+        # No readable catalog (custom format or copy protection):
+        # scan all sector data for firmware calls and text patterns
+        print("   No AMSDOS catalog, scanning raw sectors")
+        all_sector_data = read_sectors(dsk_data, sectors)
+        vectors = scan_firmware_calls(all_sector_data)
+        if vectors:
+            print(f"   Firmware call sites: {', '.join(f'{k} ×{n}' for k, n in vectors.most_common())}")
+        all_keys.update(detect_keys_from_binary(all_sector_data, vectors))
+        all_keys.update(detect_keys_from_basic(all_sector_data.decode('ascii', errors='replace')))
     
-    print(f"   Detected key patterns: {sorted(all_keys)}")
+    print(f"   Detected key patterns: {', '.join(f'{k} ({n})' for k, n in all_keys.most_common())}")
     
     # Determine layout
     layout = determine_keyboard_layout(all_keys, args.extra_keys)
@@ -613,12 +1126,13 @@ def main():
             rvm_js = f.read()
         print(f"   Loaded from {args.rvm_js}: {len(rvm_js)} chars")
     else:
-        rvm_js = download_rvmplayer()
-        print(f"   Downloaded: {len(rvm_js)} chars")
+        rvm_js = download_rvmplayer(args.cache_dir, args.rvm_version, args.rvm_sha256, args.offline)
+        print(f"   RVMPlayer {args.rvm_version}: {len(rvm_js)} chars")
     
     # Generate HTML
     print(f"🏗️  Generating HTML...")
-    html = generate_html(args.dsk, title, run_cmd, args.warp, layout, rvm_js)
+    html = generate_html(args.dsk, title, run_cmd, args.warp, layout, rvm_js,
+                         adaptive_warp=not args.fixed_warp)
     
     # Output
     output_path = args.output or os.path.splitext(args.dsk)[0] + '.html'
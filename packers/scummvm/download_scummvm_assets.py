@@ -14,6 +14,8 @@ Usage:
     python3 download_scummvm_assets.py
     python3 download_scummvm_assets.py --output-dir /path/to/docs/data/scummvm
     python3 download_scummvm_assets.py --plugins-only
+    python3 download_scummvm_assets.py --sync
+    python3 download_scummvm_assets.py --for-library ~/games --dry-run
     python3 download_scummvm_assets.py --status
 
 Source: https://scummvm.kuendig.io (ScummVM WASM by kuendig.io)
@@ -24,7 +26,9 @@ import sys
 import json
 import argparse
 import hashlib
-import urllib.request
+import threading
+import http.client
+import urllib.parse
 from concurrent.futures import ThreadPoolExecutor, as_completed
 
 # ============================================================================
@@ -39,139 +43,365 @@ SCRIPT_DIR = os.path.dirname(os.path.abspath(__file__))
 REPO_ROOT = os.path.abspath(os.path.join(SCRIPT_DIR, '..', '..'))
 DEFAULT_OUTPUT = os.path.join(REPO_ROOT, 'docs', 'data', 'scummvm')
 
-# Core files (always needed)
-CORE_FILES = {
-    'scummvm.wasm': f'{BASE_URL}/scummvm.wasm',
-    'scummvm.js':   f'{BASE_URL}/scummvm.js',
-}
+# Core files (always needed), relative to the base URL
+CORE_FILES = ['scummvm.wasm', 'scummvm.js']
+
+USER_AGENT = 'portable-retro-games ScummVM packer'
+HTTP_TIMEOUT = 120
+CHUNK_SIZE = 256 * 1024
+MAX_REDIRECTS = 5
+
+# Size and ETag/Last-Modified of every downloaded file, for --sync
+SYNC_MANIFEST = '.sync.json'
 
 # ============================================================================
 # Helpers
 # ============================================================================
 
-def download_file(url, dest_path, label=None):
-    """Download a file with progress indication."""
-    if os.path.isfile(dest_path) and os.path.getsize(dest_path) > 0:
-        return True, f"✓ {label or os.path.basename(dest_path)} (cached)"
+# Keep-alive connections, one set per download thread: {(scheme, netloc): conn}
+_local = threading.local()
+
+
+def _connection(scheme, netloc):
+    """This thread's pooled connection to a host, opened on first use."""
+    pool = getattr(_local, 'connections', None)
+    if pool is None:
+        pool = _local.connections = {}
+    conn = pool.get((scheme, netloc))
+    if conn is None:
+        cls = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+        conn = pool[(scheme, netloc)] = cls(netloc, timeout=HTTP_TIMEOUT)
+    return conn
+
+
+def _drop_connection(scheme, netloc):
+    conn = getattr(_local, 'connections', {}).pop((scheme, netloc), None)
+    if conn is not None:
+        conn.close()
+
+
+def http_get(url, headers=None):
+    """GET a URL over the calling thread's keep-alive connection.
+
+    Follows redirects and retries once on a connection the server has
+    since closed. The caller must read the response to the end before the
+    next request on this thread.
+    """
+    for _ in range(MAX_REDIRECTS + 1):
+        parts = urllib.parse.urlsplit(url)
+        path = parts.path or '/'
+        if parts.query:
+            path += '?' + parts.query
+        request_headers = {'User-Agent': USER_AGENT}
+        request_headers.update(headers or {})
+
+        for attempt in range(2):
+            conn = _connection(parts.scheme, parts.netloc)
+            try:
+                conn.request('GET', path, headers=request_headers)
+                resp = conn.getresponse()
+                break
+            except (http.client.HTTPException, OSError):
+                _drop_connection(parts.scheme, parts.netloc)
+                if attempt:
+                    raise
+
+        if resp.status in (301, 302, 303, 307, 308) and resp.getheader('Location'):
+            resp.read()
+            url = urllib.parse.urljoin(url, resp.getheader('Location'))
+            continue
+        return resp
+    raise IOError(f"too many redirects: {url}")
+
+
+def _format_size(size):
+    size_kb = size / 1024
+    if size_kb > 1024:
+        return f"{size_kb/1024:.1f} MB"
+    return f"{size_kb:.0f} KB"
+
+
+def download_file(url, dest_path, label=None, expected_size=None, validators=None,
+                  revalidate=False):
+    """Download a file unless the local copy is current.
+
+    A local file is current when its size matches expected_size (from the
+    server index) or, without an expected size, the size recorded in its
+    validators; with neither it only has to be non-empty. With
+    revalidate, files that have stored ETag/Last-Modified validators are
+    re-checked with a conditional GET, and files with neither validators
+    nor an expected size are fetched again.
+
+    Data is streamed to a .part file and renamed into place only once its
+    length checks out, so an interrupted or truncated transfer never
+    replaces a good file.
+
+    Returns (ok, message, meta); meta is the manifest entry to record
+    ({'size', 'etag', 'last_modified'}), or None on failure.
+    """
+    name = label or os.path.basename(dest_path)
+    headers = {}
+
+    if os.path.isfile(dest_path):
+        size = os.path.getsize(dest_path)
+        known_size = expected_size
+        if known_size is None and validators:
+            known_size = validators.get('size')
+        current = size == known_size if known_size is not None else size > 0
+        etag = validators.get('etag') if validators else None
+        last_modified = validators.get('last_modified') if validators else None
+        if current:
+            # Without ETag/Last-Modified, a size matching the index is all we can check
+            if not revalidate or (not (etag or last_modified) and expected_size is not None):
+                return True, f"✓ {name} (cached)", validators or {'size': size}
+            if etag:
+                headers['If-None-Match'] = etag
+            if last_modified:
+                headers['If-Modified-Since'] = last_modified
 
     os.makedirs(os.path.dirname(dest_path), exist_ok=True)
-    name = label or os.path.basename(dest_path)
+    tmp_path = dest_path + '.part'
 
     try:
-        req = urllib.request.Request(url, headers={
-            'User-Agent': 'portable-retro-games ScummVM packer'
-        })
-        with urllib.request.urlopen(req, timeout=120) as resp:
-            data = resp.read()
-        with open(dest_path, 'wb') as f:
-            f.write(data)
-        size_kb = len(data) / 1024
-        if size_kb > 1024:
-            size_str = f"{size_kb/1024:.1f} MB"
-        else:
-            size_str = f"{size_kb:.0f} KB"
-        return True, f"✓ {name} ({size_str})"
+        resp = http_get(url, headers)
+        if resp.status == 304:
+            resp.read()
+            return True, f"✓ {name} (unchanged)", validators
+        if resp.status != 200:
+            resp.read()
+            return False, f"✗ {name}: HTTP {resp.status} {resp.reason}", None
+
+        length = resp.getheader('Content-Length')
+        written = 0
+        with open(tmp_path, 'wb') as f:
+            while True:
+                chunk = resp.read(CHUNK_SIZE)
+                if not chunk:
+                    break
+                f.write(chunk)
+                written += len(chunk)
+
+        if length is not None and written != int(length):
+            raise IOError(f"truncated ({written} of {length} bytes)")
+        if expected_size is not None and written != expected_size:
+            raise IOError(f"size {written} does not match index ({expected_size})")
+        os.replace(tmp_path, dest_path)
+
+        meta = {
+            'size': written,
+            'etag': resp.getheader('ETag'),
+            'last_modified': resp.getheader('Last-Modified'),
+        }
+        return True, f"✓ {name} ({_format_size(written)})", meta
     except Exception as e:
-        return False, f"✗ {name}: {e}"
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        return False, f"✗ {name}: {e}", None
 
 
 def fetch_json(url):
     """Fetch and parse a JSON URL."""
-    req = urllib.request.Request(url, headers={
-        'User-Agent': 'portable-retro-games ScummVM packer'
-    })
-    with urllib.request.urlopen(req, timeout=30) as resp:
-        return json.loads(resp.read().decode('utf-8'))
+    resp = http_get(url)
+    body = resp.read()
+    if resp.status != 200:
+        raise IOError(f"HTTP {resp.status} {resp.reason}")
+    return json.loads(body.decode('utf-8'))
+
+
+def load_manifest(output_dir):
+    """Load the sync manifest ({relpath: meta}); empty if missing or unreadable."""
+    try:
+        with open(os.path.join(output_dir, SYNC_MANIFEST), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return {}
+
+
+def save_manifest(output_dir, manifest):
+    """Write the sync manifest atomically."""
+    path = os.path.join(output_dir, SYNC_MANIFEST)
+    with open(path + '.part', 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(path + '.part', path)
+
+
+def run_downloads(executor, tasks, output_dir, manifest, revalidate=False):
+    """Download (url, relpath, expected_size) tasks on the executor's threads.
+
+    Reusing one executor for every batch keeps its threads, and with them
+    their keep-alive connections, for the whole run. Updates manifest in
+    place and returns the list of error messages.
+    """
+    errors = []
+    futures = {
+        executor.submit(download_file, url, os.path.join(output_dir, relpath),
+                        os.path.basename(relpath), expected_size,
+                        manifest.get(relpath), revalidate): relpath
+        for url, relpath, expected_size in tasks
+    }
+    done_count = 0
+    for future in as_completed(futures):
+        done_count += 1
+        ok, msg, meta = future.result()
+        print(f"  [{done_count}/{len(tasks)}] {msg}")
+        if ok:
+            manifest[futures[future]] = meta
+        else:
+            errors.append(msg)
+    return errors
+
+
+def select_for_library(library_dir):
+    """Resolve the plugins and data files a game library needs.
+
+    Each subdirectory of library_dir (or library_dir itself, if it has
+    none) is run through the packer's engine detection. Returns
+    (engines, plugins, data_files, unresolved): {engine: [game dirs]},
+    plugin filenames, data filenames (common themes included) and the
+    game directories no engine was detected for.
+    """
+    # Shares the packer's detection tables so both always agree
+    from pack_scummvm_game import scan_game_dir, ENGINE_DATA_FILES, COMMON_DATA_FILES
+
+    game_dirs = sorted(
+        os.path.join(library_dir, d) for d in os.listdir(library_dir)
+        if not d.startswith('.') and os.path.isdir(os.path.join(library_dir, d))
+    ) or [library_dir]
+
+    engines = {}
+    unresolved = []
+    for game_dir in game_dirs:
+        engine = scan_game_dir(game_dir)['engine']
+        if engine:
+            engines.setdefault(engine, []).append(game_dir)
+        else:
+            unresolved.append(game_dir)
+
+    plugins = {f'lib{engine}.so' for engine in engines}
+    data_files = set(COMMON_DATA_FILES)
+    for engine in engines:
+        data_files.update(ENGINE_DATA_FILES.get(engine, []))
+    return engines, plugins, data_files, unresolved
+
+
+def _library_report(engines, unresolved, plugin_index, data_files, plugins, wanted_data):
+    """Print what a library needs and how much the selection saves.
+
+    Returns (selected_plugins, selected_data) filtered to what the server has.
+    """
+    print(f"\n━━━ Library ━━━")
+    for engine, games in sorted(engines.items()):
+        names = ', '.join(os.path.basename(g) for g in games)
+        print(f"  ✓ {engine}: {names}")
+    for game_dir in unresolved:
+        print(f"  ? {os.path.basename(game_dir)}: no engine detected (not covered)")
+
+    missing = sorted(p for p in plugins if p not in plugin_index)
+    for plugin_name in missing:
+        print(f"  ✗ {plugin_name} is not on the server")
+    selected_plugins = {p: plugin_index[p] for p in plugins if p in plugin_index}
+    selected_data = {f: data_files[f] for f in wanted_data if f in data_files}
+
+    full = sum(plugin_index.values()) + sum(data_files.values())
+    needed = sum(selected_plugins.values()) + sum(selected_data.values())
+    print(f"  Plugins:    {len(selected_plugins)} of {len(plugin_index)}")
+    print(f"  Data files: {len(selected_data)} of {len(data_files)}")
+    print(f"  Size:       {_format_size(needed)} of {_format_size(full)} "
+          f"(saves {_format_size(full - needed)}, core files not counted)")
+    return selected_plugins, selected_data
 
 
 # ============================================================================
 # Main download logic
 # ============================================================================
 
-def download_all(output_dir, plugins_only=False, max_workers=8):
-    """Download all ScummVM WASM assets."""
+def download_all(output_dir, plugins_only=False, max_workers=8, sync=False, base_url=BASE_URL,
+                 library=None, dry_run=False):
+    """Download all ScummVM WASM assets.
+
+    Files already present with the size listed in the server index are
+    skipped. With sync=True, files are also revalidated against the
+    ETag/Last-Modified recorded in the sync manifest, so only stale files
+    are fetched again.
+
+    With library set to a game collection directory, only the plugins and
+    data files its detected engines need are downloaded (see
+    select_for_library()); dry_run reports that selection and downloads
+    nothing.
+    """
 
     plugins_dir = os.path.join(output_dir, 'plugins')
     data_dir = os.path.join(output_dir, 'data')
-    os.makedirs(plugins_dir, exist_ok=True)
-    os.makedirs(data_dir, exist_ok=True)
+    if not dry_run:
+        os.makedirs(plugins_dir, exist_ok=True)
+        os.makedirs(data_dir, exist_ok=True)
+    data_url = f"{base_url}/data"
+    plugins_url = f"{data_url}/plugins"
 
     errors = []
+    manifest = load_manifest(output_dir)
 
-    # --- Step 1: Core files (wasm + js) ---
-    if not plugins_only:
-        print("\n━━━ Core Files ━━━")
-        for filename, url in CORE_FILES.items():
-            dest = os.path.join(output_dir, filename)
-            ok, msg = download_file(url, dest)
-            print(f"  {msg}")
-            if not ok:
-                errors.append(msg)
-
-    # --- Step 2: Fetch plugin index ---
-    print("\n━━━ Fetching indexes ━━━")
-    try:
-        plugin_index = fetch_json(f"{PLUGINS_URL}/index.json")
-        print(f"  ✓ Plugin index: {len(plugin_index)} engines found")
-    except Exception as e:
-        print(f"  ✗ Failed to fetch plugin index: {e}")
-        return False
-
-    try:
-        data_index = fetch_json(f"{DATA_URL}/index.json")
-        print(f"  ✓ Data index loaded")
-    except Exception as e:
-        print(f"  ✗ Failed to fetch data index: {e}")
-        return False
-
-    # --- Step 3: Download engine plugins ---
-    print(f"\n━━━ Engine Plugins ({len(plugin_index)} files) ━━━")
-    plugin_tasks = []
-    for plugin_name, size in sorted(plugin_index.items()):
-        url = f"{PLUGINS_URL}/{plugin_name}"
-        dest = os.path.join(plugins_dir, plugin_name)
-        plugin_tasks.append((url, dest, plugin_name))
+    if library:
+        engines, plugins, wanted_data, unresolved = select_for_library(library)
 
+    # One pool for every step, so worker threads (and their keep-alive
+    # connections) are reused from the core files through the data files
     with ThreadPoolExecutor(max_workers=max_workers) as executor:
-        futures = {
-            executor.submit(download_file, url, dest, label): label
-            for url, dest, label in plugin_tasks
-        }
-        done_count = 0
-        for future in as_completed(futures):
-            done_count += 1
-            ok, msg = future.result()
-            print(f"  [{done_count}/{len(plugin_tasks)}] {msg}")
-            if not ok:
-                errors.append(msg)
-
-    # --- Step 4: Download data files ---
-    if not plugins_only:
+        # --- Step 1: Core files (wasm + js) ---
+        if not plugins_only and not dry_run:
+            print("\n━━━ Core Files ━━━")
+            core_tasks = [(f"{base_url}/{filename}", filename, None) for filename in CORE_FILES]
+            errors += run_downloads(executor, core_tasks, output_dir, manifest, sync)
+
+        # --- Step 2: Fetch plugin index ---
+        print("\n━━━ Fetching indexes ━━━")
+        try:
+            plugin_index = fetch_json(f"{plugins_url}/index.json")
+            print(f"  ✓ Plugin index: {len(plugin_index)} engines found")
+        except Exception as e:
+            print(f"  ✗ Failed to fetch plugin index: {e}")
+            save_manifest(output_dir, manifest)
+            return False
+
+        try:
+            data_index = fetch_json(f"{data_url}/index.json")
+            print(f"  ✓ Data index loaded")
+        except Exception as e:
+            print(f"  ✗ Failed to fetch data index: {e}")
+            save_manifest(output_dir, manifest)
+            return False
+
         # Filter data files from the index (exclude nested objects like 'plugins', 'games', etc.)
         data_files = {}
         for key, value in data_index.items():
             if isinstance(value, int):  # actual files have integer sizes
                 data_files[key] = value
 
-        print(f"\n━━━ Engine Data Files ({len(data_files)} files) ━━━")
-        data_tasks = []
-        for filename, size in sorted(data_files.items()):
-            url = f"{DATA_URL}/{filename}"
-            dest = os.path.join(data_dir, filename)
-            data_tasks.append((url, dest, filename))
-
-        with ThreadPoolExecutor(max_workers=max_workers) as executor:
-            futures = {
-                executor.submit(download_file, url, dest, label): label
-                for url, dest, label in data_tasks
-            }
-            done_count = 0
-            for future in as_completed(futures):
-                done_count += 1
-                ok, msg = future.result()
-                print(f"  [{done_count}/{len(data_tasks)}] {msg}")
-                if not ok:
-                    errors.append(msg)
+        if library:
+            plugin_index, data_files = _library_report(
+                engines, unresolved, plugin_index, data_files, plugins, wanted_data)
+        if dry_run:
+            print("\n  Dry run: nothing downloaded.")
+            return True
+
+        # --- Step 3: Download engine plugins ---
+        print(f"\n━━━ Engine Plugins ({len(plugin_index)} files) ━━━")
+        plugin_tasks = []
+        for plugin_name, size in sorted(plugin_index.items()):
+            url = f"{plugins_url}/{plugin_name}"
+            plugin_tasks.append((url, f"plugins/{plugin_name}", size))
+        errors += run_downloads(executor, plugin_tasks, output_dir, manifest, sync)
+
+        # --- Step 4: Download data files ---
+        if not plugins_only:
+            print(f"\n━━━ Engine Data Files ({len(data_files)} files) ━━━")
+            data_tasks = []
+            for filename, size in sorted(data_files.items()):
+                url = f"{data_url}/{filename}"
+                data_tasks.append((url, f"data/{filename}", size))
+            errors += run_downloads(executor, data_tasks, output_dir, manifest, sync)
+
+    save_manifest(output_dir, manifest)
 
     # --- Summary ---
     print(f"\n{'='*60}")
@@ -186,7 +416,8 @@ def download_all(output_dir, plugins_only=False, max_workers=8):
     total = 0
     for root, dirs, files in os.walk(output_dir):
         for f in files:
-            total += os.path.getsize(os.path.join(root, f))
+            if f != SYNC_MANIFEST:
+                total += os.path.getsize(os.path.join(root, f))
 
     print(f"\n  Output:     {output_dir}")
     print(f"  Total size: {total/1024/1024:.1f} MB")
@@ -254,10 +485,26 @@ def main():
         '--status', action='store_true',
         help='Show current download status and exit'
     )
+    parser.add_argument(
+        '--sync', action='store_true',
+        help='Revalidate existing files (ETag/Last-Modified) and re-fetch only stale ones'
+    )
     parser.add_argument(
         '--workers', type=int, default=8,
         help='Number of parallel download workers (default: 8)'
     )
+    parser.add_argument(
+        '--for-library', metavar='DIR',
+        help='Only fetch the plugins and data files needed by the games in DIR'
+    )
+    parser.add_argument(
+        '--dry-run', action='store_true',
+        help='Show what --for-library would download and the bytes saved, then exit'
+    )
+    parser.add_argument(
+        '--base-url', default=BASE_URL,
+        help=f'Asset server to download from (default: {BASE_URL})'
+    )
 
     args = parser.parse_args()
 
@@ -266,13 +513,17 @@ def main():
         return
 
     print("ScummVM WASM Asset Downloader")
-    print(f"Source: {BASE_URL}")
+    print(f"Source: {args.base_url}")
     print(f"Output: {args.output_dir}")
 
     success = download_all(
         output_dir=args.output_dir,
         plugins_only=args.plugins_only,
         max_workers=args.workers,
+        sync=args.sync,
+        base_url=args.base_url.rstrip('/'),
+        library=args.for_library,
+        dry_run=args.dry_run,
     )
 
     sys.exit(0 if success else 1)
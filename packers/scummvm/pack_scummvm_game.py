@@ -46,13 +46,20 @@ Key discoveries (from reverse-engineering scummvm.kuendig.io):
     - Uses Asyncify (mono-thread) - no SharedArrayBuffer needed ✓
 """
 
+import io
 import os
+import re
 import sys
 import gzip
 import json
+import time
 import base64
+import hashlib
 import argparse
+import threading
+import contextlib
 from pathlib import Path
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
 
 # ============================================================================
 # Configuration
@@ -66,6 +73,23 @@ DATA_DIR = os.path.join(SCUMMVM_DIR, 'data')
 WASM_FILE = os.path.join(SCUMMVM_DIR, 'scummvm.wasm')
 JS_FILE = os.path.join(SCUMMVM_DIR, 'scummvm.js')
 
+# Compressed-payload cache (content-hash keyed, shared by every pack)
+DEFAULT_CACHE_DIR = '.scummvm_cache'
+COMPRESS_LEVEL = 9
+
+# Batch mode: detections scoring below this go to the review file
+DEFAULT_REVIEW_FILE = 'scummvm_review.json'
+
+
+def set_scummvm_dir(path):
+    """Point the packer at another ScummVM WASM asset directory."""
+    global SCUMMVM_DIR, PLUGINS_DIR, DATA_DIR, WASM_FILE, JS_FILE
+    SCUMMVM_DIR = path
+    PLUGINS_DIR = os.path.join(SCUMMVM_DIR, 'plugins')
+    DATA_DIR = os.path.join(SCUMMVM_DIR, 'data')
+    WASM_FILE = os.path.join(SCUMMVM_DIR, 'scummvm.wasm')
+    JS_FILE = os.path.join(SCUMMVM_DIR, 'scummvm.js')
+
 # ============================================================================
 # Engine detection - maps game file patterns to engine IDs
 # ============================================================================
@@ -208,34 +232,82 @@ DETECTION_BY_FILENAME = {
     'acsetup.cfg': 'ags',
 }
 
-# Pattern-based detection (check if filename matches pattern)
-DETECTION_BY_PATTERN = [
-    # SCUMM games - .000 + .001 resource pairs
-    (lambda f: f.endswith('.000') and not f.startswith('resource'), 'scumm'),
-    (lambda f: f.endswith('.la0'), 'scumm'),  # Full Throttle, The Dig, COMI
-    (lambda f: f.endswith('.lfl'), 'scumm'),
-    (lambda f: f.endswith('.he0'), 'scumm'),  # Humongous Entertainment
-    
+# Weaker filename hints (exact basename, case-insensitive)
+DETECTION_BY_HINT = {
     # Sierra SCI games
-    (lambda f: f == 'resource.map' or f == 'resource.000', 'sci'),
-    (lambda f: f == 'ressci.000' or f == 'ressci.001', 'sci'),
+    'resource.map': 'sci',
+    'resource.000': 'sci',
+    'ressci.000': 'sci',
+    'ressci.001': 'sci',
     
     # Sierra AGI games
-    (lambda f: f in ('logdir', 'viewdir', 'picdir', 'snddir'), 'agi'),
-    (lambda f: f == 'words.tok', 'agi'),
-    (lambda f: f == 'agidata.ovl', 'agi'),
-    
-    # ADL (Scott Adams adventures)
-    (lambda f: f.startswith('advent') and f.endswith('.dat'), 'adl'),
+    'logdir': 'agi',
+    'viewdir': 'agi',
+    'picdir': 'agi',
+    'snddir': 'agi',
+    'words.tok': 'agi',
+    'agidata.ovl': 'agi',
     
     # Blade Runner
-    (lambda f: f.endswith('.tlk') and 'blade' in f.lower(), 'bladerunner'),
-    (lambda f: f == 'startup.mix', 'bladerunner'),
+    'startup.mix': 'bladerunner',
+}
+
+# Extension hints: extension -> engine
+DETECTION_BY_EXTENSION = {
+    # SCUMM games - .000 + .001 resource pairs
+    '.000': 'scumm',
+    '.la0': 'scumm',   # Full Throttle, The Dig, COMI
+    '.lfl': 'scumm',
+    '.he0': 'scumm',   # Humongous Entertainment
     
     # Director/Macromedia
-    (lambda f: f.endswith('.dxr') or f.endswith('.dcr'), 'director'),
-    (lambda f: f.endswith('.cxt'), 'director'),
-]
+    '.dxr': 'director',
+    '.dcr': 'director',
+    '.cxt': 'director',
+}
+
+# Basename prefixes that veto an extension hint (SCI's resource.000 is not SCUMM)
+DETECTION_EXTENSION_EXCLUDE = {
+    '.000': ('resource', 'ressci'),
+}
+
+# Extension hints that also need a word in the basename: extension -> [(word, engine)]
+DETECTION_BY_EXTENSION_AND_NAME = {
+    '.dat': [('advent', 'adl')],          # ADL (Scott Adams adventures)
+    '.tlk': [('blade', 'bladerunner')],   # Blade Runner
+}
+
+# Content signatures, checked against the first bytes of candidate files:
+# extension -> [(offset, magic, engine)]. A match outweighs any filename
+# guess, so ambiguous names resolve by content (a .dat may be a Mohawk
+# archive, an AGS data file or neither).
+SIGNATURE_HEAD_SIZE = 64
+_SCUMM_V5_RNAM = bytes(b ^ 0x69 for b in b'RNAM')   # index files are XOR 0x69
+_SCUMM_V5_MAXS = bytes(b ^ 0x69 for b in b'MAXS')
+_DIRECTOR_MAGICS = [(0, b'RIFX', 'director'), (0, b'XFIR', 'director')]
+DETECTION_SIGNATURES = {
+    '.000': [(0, _SCUMM_V5_RNAM, 'scumm'), (0, _SCUMM_V5_MAXS, 'scumm')],
+    '.la0': [(0, b'RNAM', 'scumm'), (0, b'MAXS', 'scumm')],
+    '.dxr': _DIRECTOR_MAGICS,
+    '.cxt': _DIRECTOR_MAGICS,
+    '.dir': _DIRECTOR_MAGICS,
+    '.dat': [(0, b'MHWK', 'mohawk'), (0, b'CLIB\x1a', 'ags')],
+    '.dcp': [(0, b'\xde\xad\xc0\xde', 'wintermute')],
+    '.slg': [(0, b'SLUDGE', 'sludge')],
+}
+
+# Files probed per extension; a handful is enough to confirm a signature
+SIGNATURE_MAX_PROBES = 4
+
+# Detection scores
+SCORE_FILENAME = 10
+SCORE_HINT = 5
+SCORE_SIGNATURE = 20
+DEFAULT_MIN_CONFIDENCE = SCORE_FILENAME   # one exact filename or signature match
+
+# Part of the detection cache key: bump when a DETECTION_* table or the
+# scoring changes, so cached results from older tables are not reused
+DETECTION_VERSION = 1
 
 # Engine-specific data files (downloaded from the demo server)
 # These are engine support files, NOT game files
@@ -282,43 +354,123 @@ COMMON_DATA_FILES = [
 # Engine detection
 # ============================================================================
 
-def detect_engine(game_dir):
-    """Auto-detect the ScummVM engine from game files.
+def _dir_fingerprint(game_dir):
+    """List a game directory and fingerprint it by (path, size, mtime)
+    and DETECTION_VERSION.
     
-    Returns (engine_id, confidence) or (None, 0).
+    Returns (files, fingerprint) where files holds relative '/' paths.
     """
     files = []
+    h = hashlib.sha256(f'detect-v{DETECTION_VERSION}\n'.encode('utf-8'))
     for root, dirs, filenames in os.walk(game_dir):
-        for f in filenames:
-            rel = os.path.relpath(os.path.join(root, f), game_dir)
-            files.append(rel.replace('\\', '/'))
+        dirs.sort()
+        for f in sorted(filenames):
+            path = os.path.join(root, f)
+            rel = os.path.relpath(path, game_dir).replace('\\', '/')
+            st = os.stat(path)
+            files.append(rel)
+            h.update(f'{rel}\0{st.st_size}\0{st.st_mtime_ns}\n'.encode('utf-8'))
+    return files, h.hexdigest()[:16]
+
+
+def _read_head(path, size=SIGNATURE_HEAD_SIZE):
+    """First bytes of a file (empty if unreadable)."""
+    try:
+        with open(path, 'rb') as f:
+            return f.read(size)
+    except OSError:
+        return b''
+
+
+def scan_game_dir(game_dir, cache_dir=None):
+    """Score every engine that matches a game directory.
+    
+    Files are indexed once by basename and extension, so each detection
+    table is a dict lookup rather than a scan over all files. Candidates
+    are then confirmed by matching DETECTION_SIGNATURES against the first
+    bytes of a few key files. Results are cached in cache_dir by a
+    fingerprint of the directory listing (paths, sizes and mtimes).
+    
+    Returns a dict with 'engine' (or None), 'confidence', 'scores'
+    ({engine: score}), 'evidence' ([[relpath, engine, reason], ...]) and
+    'fingerprint'.
+    """
+    files, fingerprint = _dir_fingerprint(game_dir)
+    
+    cache_path = None
+    if cache_dir:
+        cache_path = os.path.join(cache_dir, 'detect', f'{fingerprint}.json')
+        try:
+            with open(cache_path, 'r', encoding='utf-8') as f:
+                return json.load(f)
+        except (OSError, ValueError):
+            pass
+    
+    # Index: extension -> [(relpath, basename)]
+    by_ext = {}
+    for rel in files:
+        base = rel.rsplit('/', 1)[-1].lower()
+        by_ext.setdefault(os.path.splitext(base)[1], []).append((rel, base))
     
-    # Score each engine
     scores = {}
-    filenames_lower = [f.lower() for f in files]
-    basenames_lower = [os.path.basename(f).lower() for f in files]
-    
-    # Check exact filename matches
-    for fname in basenames_lower:
-        if fname in DETECTION_BY_FILENAME:
-            engine = DETECTION_BY_FILENAME[fname]
-            scores[engine] = scores.get(engine, 0) + 10
-    
-    # Check pattern matches
-    for fname in basenames_lower:
-        for pattern_fn, engine in DETECTION_BY_PATTERN:
-            try:
-                if pattern_fn(fname):
-                    scores[engine] = scores.get(engine, 0) + 5
-            except:
-                pass
-    
-    if not scores:
-        return None, 0
+    evidence = []
+    
+    def score(rel, engine, points, reason):
+        scores[engine] = scores.get(engine, 0) + points
+        evidence.append([rel, engine, reason])
+    
+    for ext, entries in by_ext.items():
+        for rel, base in entries:
+            if base in DETECTION_BY_FILENAME:
+                score(rel, DETECTION_BY_FILENAME[base], SCORE_FILENAME, 'filename')
+            if base in DETECTION_BY_HINT:
+                score(rel, DETECTION_BY_HINT[base], SCORE_HINT, 'filename hint')
+        
+        engine = DETECTION_BY_EXTENSION.get(ext)
+        if engine:
+            excluded = DETECTION_EXTENSION_EXCLUDE.get(ext, ())
+            for rel, base in entries:
+                if not base.startswith(excluded):
+                    score(rel, engine, SCORE_HINT, f'extension {ext}')
+        
+        for word, engine in DETECTION_BY_EXTENSION_AND_NAME.get(ext, []):
+            for rel, base in entries:
+                if word in base:
+                    score(rel, engine, SCORE_HINT, f'{ext} name')
+        
+        signatures = DETECTION_SIGNATURES.get(ext)
+        if signatures:
+            for rel, base in entries[:SIGNATURE_MAX_PROBES]:
+                head = _read_head(os.path.join(game_dir, rel))
+                for offset, magic, engine in signatures:
+                    if head[offset:offset + len(magic)] == magic:
+                        score(rel, engine, SCORE_SIGNATURE, 'signature')
+                        break
+    
+    result = {'engine': None, 'confidence': 0, 'scores': scores,
+              'evidence': evidence, 'fingerprint': fingerprint}
+    if scores:
+        # Highest score wins; ties break on the engine id so runs are repeatable
+        best = min(scores, key=lambda e: (-scores[e], e))
+        result['engine'] = best
+        result['confidence'] = scores[best]
+    
+    if cache_path:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f'{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(result, f)
+        os.replace(tmp_path, cache_path)
+    return result
+
+
+def detect_engine(game_dir, cache_dir=None):
+    """Auto-detect the ScummVM engine from game files.
     
-    # Return highest scoring engine
-    best = max(scores, key=scores.get)
-    return best, scores[best]
+    Returns (engine_id, confidence) or (None, 0). See scan_game_dir().
+    """
+    result = scan_game_dir(game_dir, cache_dir=cache_dir)
+    return result['engine'], result['confidence']
 
 
 def list_available_engines():
@@ -359,6 +511,114 @@ def read_and_compress(filepath):
     return compress_and_encode(data)
 
 
+def _cache_path(cache_dir, key):
+    """Location of a cached gzip payload for a content hash."""
+    return os.path.join(cache_dir, key[:2], f'{key}.gz{COMPRESS_LEVEL}')
+
+
+def _gzip_cached(data, cache_dir):
+    """Gzip bytes, reusing the on-disk cache. Returns (compressed, cache_hit)."""
+    cache_path = None
+    if cache_dir:
+        cache_path = _cache_path(cache_dir, hashlib.sha256(data).hexdigest())
+        if os.path.isfile(cache_path):
+            with open(cache_path, 'rb') as f:
+                return f.read(), True
+
+    compressed = gzip.compress(data, compresslevel=COMPRESS_LEVEL)
+    if cache_path:
+        os.makedirs(os.path.dirname(cache_path), exist_ok=True)
+        tmp_path = f'{cache_path}.{os.getpid()}.{threading.get_ident()}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(compressed)
+        os.replace(tmp_path, cache_path)
+    return compressed, False
+
+
+def _compress_job(job):
+    """Gzip one file, reusing the on-disk cache (runs in a worker process).
+
+    Returns (filepath, compressed, original_size, cache_hit, seconds).
+    """
+    filepath, cache_dir = job
+    start = time.perf_counter()
+    with open(filepath, 'rb') as f:
+        data = f.read()
+    compressed, hit = _gzip_cached(data, cache_dir)
+    return filepath, compressed, len(data), hit, time.perf_counter() - start
+
+
+def compress_files(filepaths, cache_dir=None, jobs=None):
+    """Gzip+base64 encode many files over a process pool, memoized on disk.
+
+    Payloads are cached in cache_dir by content hash, so unchanged inputs
+    (scummvm.wasm, scummvm.js, plugins, themes) are compressed once per
+    version rather than once per game.
+
+    Returns (results, stats): results maps each path to the same tuple as
+    read_and_compress() plus (cache_hit, seconds); stats has 'files',
+    'hits', 'seconds' (wall time) and 'cpu_seconds' (sum of per-file time).
+    """
+    start = time.perf_counter()
+    work = [(fp, cache_dir) for fp in dict.fromkeys(filepaths)]
+
+    if jobs == 1 or len(work) <= 1:
+        done = [_compress_job(job) for job in work]
+    else:
+        # Biggest files first so the pool drains evenly
+        work.sort(key=lambda job: os.path.getsize(job[0]), reverse=True)
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            done = list(executor.map(_compress_job, work))
+
+    results = {}
+    hits = 0
+    cpu_seconds = 0.0
+    for filepath, compressed, orig, hit, seconds in done:
+        encoded = base64.b64encode(compressed).decode('ascii')
+        ratio = len(compressed) / orig * 100 if orig else 0
+        results[filepath] = (encoded, orig, len(compressed), ratio, hit, seconds)
+        hits += hit
+        cpu_seconds += seconds
+
+    stats = {
+        'files': len(done),
+        'hits': hits,
+        'seconds': time.perf_counter() - start,
+        'cpu_seconds': cpu_seconds,
+    }
+    return results, stats
+
+
+def build_solid_archive(game_paths, cache_dir=None):
+    """Concatenate game files into one buffer and gzip it as a single stream.
+
+    Files are ordered by extension, then path, so similar resources share
+    the deflate window. The browser inflates the archive once and exposes
+    each file as a subarray view, with no per-file decode or copy.
+
+    Returns (b64, index, original_size, compressed_size, cache_hit, seconds)
+    where index is [[relpath, offset, length], ...] into the inflated buffer.
+    """
+    start = time.perf_counter()
+    ordered = sorted(game_paths, key=lambda p: (os.path.splitext(p[0])[1].lower(), p[0]))
+    buf = bytearray()
+    index = []
+    for relpath, filepath in ordered:
+        with open(filepath, 'rb') as f:
+            data = f.read()
+        index.append([relpath, len(buf), len(data)])
+        buf += data
+
+    compressed, hit = _gzip_cached(bytes(buf), cache_dir)
+    encoded = base64.b64encode(compressed).decode('ascii')
+    return encoded, index, len(buf), len(compressed), hit, time.perf_counter() - start
+
+
+def _timing(hit, seconds):
+    """Short per-file timing label for progress output."""
+    return 'cached' if hit else f'{seconds:.2f}s'
+
+
 # ============================================================================
 # HTML template
 # ============================================================================
@@ -391,6 +651,17 @@ HTML_TEMPLATE = r"""<!DOCTYPE html>
         #loading .status { font-size: 0.9em; color: #888; margin-top: 10px; }
         #loading .detail { font-size: 0.75em; color: #666; margin-top: 5px; }
         
+        /* Launcher menu (multi-game bundles) */
+        #launcher {
+            display: none; flex-direction: column; gap: 8px;
+            width: 300px; max-height: 50vh; overflow-y: auto; margin: 20px auto 0;
+        }
+        #launcher button {
+            background: #16213e; color: #fff; border: 1px solid #333; border-radius: 8px;
+            padding: 10px 14px; font: inherit; font-size: 0.95em; cursor: pointer; text-align: left;
+        }
+        #launcher button:hover, #launcher button:focus { border-color: #00d4ff; outline: none; }
+        
         /* Canvas */
         #canvas {
             position: fixed; top: 0; left: 0; width: 100%; height: 100%;
@@ -405,6 +676,14 @@ HTML_TEMPLATE = r"""<!DOCTYPE html>
         }
         #error h1 { margin-bottom: 20px; }
         #error pre { color: #ccc; white-space: pre-wrap; font-size: 0.85em; }
+        
+        /* Debug overlay (?debug) */
+        #debug-overlay {
+            display: none; position: fixed; top: 6px; left: 6px; z-index: 300;
+            background: rgba(0,0,0,0.7); color: #8f8; font: 11px/1.35 monospace;
+            padding: 4px 8px; border-radius: 6px; pointer-events: none; white-space: pre;
+        }
+        #debug-overlay.show { display: block; }
     </style>
 </head>
 <body>
@@ -413,24 +692,30 @@ HTML_TEMPLATE = r"""<!DOCTYPE html>
         <div class="progress-bar"><div class="progress-fill" id="progress"></div></div>
         <div class="status" id="status">Initializing...</div>
         <div class="detail" id="detail"></div>
+        <div id="launcher"></div>
     </div>
     <div id="error"><h1>❌ Error</h1><pre id="error-text"></pre></div>
+    <div id="debug-overlay"></div>
     <canvas id="canvas" oncontextmenu="event.preventDefault()" tabindex="-1"></canvas>
     
     <!-- Embedded compressed data -->
-    <script id="wasm-data" type="application/gzip-base64">{{WASM_DATA}}</script>
-    <script id="js-data" type="application/gzip-base64">{{JS_DATA}}</script>
-    <script id="plugin-data" type="application/gzip-base64" data-name="{{PLUGIN_NAME}}">{{PLUGIN_DATA}}</script>
+    <script id="wasm-data" type="application/gzip-base64" data-size="{{WASM_SIZE}}">{{WASM_DATA}}</script>
+    <script id="js-data" type="application/gzip-base64" data-size="{{JS_SIZE}}">{{JS_DATA}}</script>
+{{PLUGIN_SCRIPTS}}
     <script id="engine-data-files" type="application/json">{{ENGINE_DATA_JSON}}</script>
-    <script id="game-files" type="application/json">{{GAME_FILES_JSON}}</script>
+{{GAME_SCRIPTS}}
+    <script id="bundle-games" type="application/json">{{BUNDLE_JSON}}</script>
     
     <script>
     // ====================================================================
     // ScummVM Portable Game Launcher
     // ====================================================================
     
-    const GAME_ENGINE = '{{ENGINE_ID}}';
-    const GAME_TITLE = '{{GAME_TITLE_JS}}';
+    // [{title, engine, plugin, data}] - one entry per game in the page
+    const BUNDLE_GAMES = JSON.parse(document.getElementById('bundle-games').textContent);
+    const GAME_LAZY = {{GAME_LAZY}};          // serve game files on demand instead of MEMFS
+    const GAME_PREFETCH = {{GAME_PREFETCH}};  // inflate untouched files while idle
+    const GAME_DIR = '/data/games';
     
     // --- UI helpers ---
     function setProgress(pct) {
@@ -448,20 +733,70 @@ HTML_TEMPLATE = r"""<!DOCTYPE html>
         document.getElementById('error-text').textContent = msg;
     }
     
+    // --- Debug overlay (enabled with ?debug in the URL) ---
+    const DEBUG = /[?&]debug\b/.test(location.search);
+    const debugStats = {};
+    function setDebugStat(key, text) {
+        if (!DEBUG) return;
+        debugStats[key] = text;
+        const el = document.getElementById('debug-overlay');
+        el.classList.add('show');
+        el.textContent = Object.entries(debugStats).map(([k, v]) => k + ': ' + v).join('\n');
+    }
+    
+    // Boot milestones, in ms since navigation start
+    function markBoot(label) {
+        const ms = Math.round(performance.now());
+        console.log(`[Packer] ${label}: ${ms} ms`);
+        setDebugStat(label, ms + ' ms');
+    }
+    
     // --- Decompression (gzip+base64 → Uint8Array) ---
-    async function decompressB64(b64String) {
-        const binaryStr = atob(b64String);
+    // Base64 is decoded in slices fed to the DecompressionStream as it drains,
+    // so decoding and inflation overlap (and interleave across payloads).
+    const B64_SLICE = 1 << 20;  // characters per slice, multiple of 4
+    
+    function decodeB64Slice(b64String, start) {
+        const binaryStr = atob(b64String.slice(start, start + B64_SLICE));
         const bytes = new Uint8Array(binaryStr.length);
         for (let i = 0; i < binaryStr.length; i++) {
             bytes[i] = binaryStr.charCodeAt(i);
         }
-        
+        return bytes;
+    }
+    
+    // ReadableStream of the inflated bytes of a gzip+base64 payload
+    function inflateStream(b64String) {
         const ds = new DecompressionStream('gzip');
         const writer = ds.writable.getWriter();
-        writer.write(bytes);
-        writer.close();
+        (async () => {
+            for (let i = 0; i < b64String.length; i += B64_SLICE) {
+                await writer.ready;
+                writer.write(decodeB64Slice(b64String, i));
+            }
+            await writer.close();
+        })().catch(() => {});  // stream errors surface through the reader
+        return ds.readable;
+    }
+    
+    // When the inflated size is known, chunks are written straight into one
+    // preallocated buffer instead of being collected and copied afterwards,
+    // and onBytes(bytesSoFar) reports progress.
+    async function decompressB64(b64String, knownSize, onBytes) {
+        const reader = inflateStream(b64String).getReader();
+        if (knownSize !== undefined) {
+            const out = new Uint8Array(knownSize);
+            let pos = 0;
+            while (true) {
+                const { done, value } = await reader.read();
+                if (done) break;
+                out.set(value, pos);
+                pos += value.length;
+                if (onBytes) onBytes(pos);
+            }
+            return out;
+        }
         
-        const reader = ds.readable.getReader();
         const chunks = [];
         let totalLen = 0;
         while (true) {
@@ -480,57 +815,253 @@ HTML_TEMPLATE = r"""<!DOCTYPE html>
         return result;
     }
     
+    // --- Game file provider ---
+    // Each game file is inflated the first time it is requested and the
+    // promise is memoized, so a file is never decoded twice. With the solid
+    // layout the first request inflates the whole archive once and every
+    // file is a view into it. Only the game picked by selectGame() is
+    // ever read; the other games in a bundle stay as base64 text.
+    let gameArchiveB64 = '';
+    let gamePacked = {};
+    const gameEntries = new Map();  // name -> [offset, length]
+    const gameMemo = new Map();
+    const gameTouched = new Set();
+    let gameArchive = null;
+    
+    // Point the provider at game idx of the bundle and return its entry
+    function selectGame(idx) {
+        gameArchiveB64 = document.getElementById('game-archive-' + idx).textContent.trim();
+        gamePacked = JSON.parse(document.getElementById('game-files-' + idx).textContent);
+        for (const [name, offset, length] of JSON.parse(document.getElementById('game-index-' + idx).textContent)) {
+            gameEntries.set(name, [offset, length]);
+        }
+        return BUNDLE_GAMES[idx];
+    }
+    
+    // inflate(b64, size) defaults to decompressB64; eager boot passes the
+    // pooled, progress-tracked inflateTask instead.
+    function loadGameArchive(inflate = decompressB64) {
+        if (!gameArchive) {
+            let size = 0;
+            for (const [offset, length] of gameEntries.values()) {
+                size = Math.max(size, offset + length);
+            }
+            gameArchive = inflate(gameArchiveB64, size);
+        }
+        return gameArchive;
+    }
+    
+    function loadGameFile(name, inflate = decompressB64) {
+        let pending = gameMemo.get(name);
+        if (!pending) {
+            const [offset, length] = gameEntries.get(name);
+            if (gameArchiveB64) {
+                pending = loadGameArchive(inflate).then(a => a.subarray(offset, offset + length));
+            } else {
+                pending = inflate(gamePacked[name], length);
+                delete gamePacked[name];  // drop the base64 copy once decoded
+            }
+            gameMemo.set(name, pending);
+        }
+        return pending;
+    }
+    
+    // Nested {dir: {file: size}} listing for ScummVM's /data/index.json
+    function gameIndexTree() {
+        const tree = {};
+        for (const [name, [, length]] of gameEntries) {
+            const parts = name.split('/');
+            let node = tree;
+            for (let i = 0; i < parts.length - 1; i++) {
+                node = node[parts[i]] = node[parts[i]] || {};
+            }
+            node[parts[parts.length - 1]] = length;
+        }
+        return tree;
+    }
+    
+    function gameFileStats() {
+        let total = 0, touched = 0;
+        for (const [name, [, length]] of gameEntries) {
+            total += length;
+            if (gameTouched.has(name)) touched += length;
+        }
+        return {
+            files: gameEntries.size, touched: gameTouched.size,
+            bytes: total, touchedBytes: touched, inflated: gameMemo.size,
+        };
+    }
+    window.gameFileStats = gameFileStats;
+    
+    function logGameFileStats() {
+        const s = gameFileStats();
+        console.log(`[Packer] Game files touched: ${s.touched}/${s.files} ` +
+            `(${(s.touchedBytes / 1024 / 1024).toFixed(1)} of ${(s.bytes / 1024 / 1024).toFixed(1)} MB), ` +
+            `${s.inflated} inflated`);
+    }
+    
+    // Inflate remaining files one at a time while the main thread is idle
+    function prefetchGameFiles() {
+        const queue = [...gameEntries.keys()].filter(name => !gameMemo.has(name));
+        const idle = window.requestIdleCallback || (cb => setTimeout(cb, 200));
+        function next() {
+            while (queue.length && gameMemo.has(queue[0])) queue.shift();
+            if (!queue.length) return;
+            loadGameFile(queue.shift()).then(() => idle(next));
+        }
+        idle(next);
+    }
+    
+    // --- Bounded decompression pool ---
+    // At most POOL_SIZE payloads inflate at once, in submission order. Progress
+    // is credited in base64 bytes processed, not in files completed.
+    const POOL_SIZE = Math.max(2, Math.min(navigator.hardwareConcurrency || 4, 6));
+    const poolQueue = [];
+    let poolActive = 0;
+    const byteProgress = { done: 0, total: 0 };
+    
+    function pumpPool() {
+        while (poolActive < POOL_SIZE && poolQueue.length) {
+            const [task, resolve, reject] = poolQueue.shift();
+            poolActive++;
+            task().then(resolve, reject).finally(() => { poolActive--; pumpPool(); });
+        }
+    }
+    
+    function creditProgress(bytes) {
+        byteProgress.done += bytes;
+        setProgress(Math.round(5 + 95 * byteProgress.done / byteProgress.total));
+    }
+    
+    function inflateTask(b64String, knownSize, label) {
+        const weight = b64String.length;
+        byteProgress.total += weight;
+        return new Promise((resolve, reject) => {
+            poolQueue.push([async () => {
+                let credited = 0;
+                const data = await decompressB64(b64String, knownSize, knownSize ? pos => {
+                    const due = Math.floor(weight * pos / knownSize);
+                    creditProgress(due - credited);
+                    credited = due;
+                } : null);
+                creditProgress(weight - credited);
+                if (label) setDetail(`${label} (${(data.length / 1024).toFixed(0)} KB)`);
+                return data;
+            }, resolve, reject]);
+            pumpPool();
+        });
+    }
+    
+    // --- Streaming WASM compilation ---
+    // base64 → DecompressionStream → compileStreaming: the engine compiles
+    // while later bytes are still being decoded, instead of after the whole
+    // binary is in memory. Falls back to a buffered compile if the browser
+    // rejects the stream.
+    function compileWasm(b64String, knownSize) {
+        const weight = b64String.length;
+        byteProgress.total += weight;
+        let pos = 0, credited = 0;
+        const counter = new TransformStream({
+            transform(chunk, controller) {
+                pos += chunk.length;
+                const due = Math.floor(weight * pos / knownSize);
+                creditProgress(due - credited);
+                credited = due;
+                controller.enqueue(chunk);
+            },
+        });
+        const finish = module => {
+            creditProgress(weight - credited);
+            credited = weight;
+            markBoot('wasm compiled');
+            return module;
+        };
+        if (!WebAssembly.compileStreaming) {
+            return decompressB64(b64String, knownSize).then(WebAssembly.compile).then(finish);
+        }
+        const response = new Response(inflateStream(b64String).pipeThrough(counter), {
+            headers: { 'Content-Type': 'application/wasm' }
+        });
+        return WebAssembly.compileStreaming(response).catch(err => {
+            console.warn('[Packer] Streaming compile failed, buffering instead:', err);
+            return decompressB64(b64String, knownSize).then(WebAssembly.compile);
+        }).then(finish);
+    }
+    
+    // --- Launcher menu ---
+    // Resolves to the index of the game to boot: immediately for a single
+    // game or ?game=N, otherwise once the player clicks a menu entry.
+    function chooseGame() {
+        const m = location.search.match(/[?&]game=(\d+)/);
+        if (BUNDLE_GAMES.length === 1) return Promise.resolve(0);
+        if (m && +m[1] < BUNDLE_GAMES.length) return Promise.resolve(+m[1]);
+        return new Promise(resolve => {
+            const menu = document.getElementById('launcher');
+            BUNDLE_GAMES.forEach((game, idx) => {
+                const button = document.createElement('button');
+                button.textContent = game.title;
+                button.title = game.engine;
+                button.addEventListener('click', () => {
+                    menu.style.display = 'none';
+                    resolve(idx);
+                });
+                menu.appendChild(button);
+            });
+            menu.style.display = 'flex';
+            menu.querySelector('button').focus();
+        });
+    }
+    
     // --- Main boot sequence ---
     async function boot() {
         try {
-            // Step 1: Decompress WASM
-            setStatus('Decompressing ScummVM core...');
+            // Steps 1-4: Queue every payload on the pool (core first, since
+            // it gates start-up), then wait only for what ScummVM needs to
+            // start. In eager mode, game files keep inflating while the
+            // glue initializes; preRun holds a run dependency on them.
+            // In a bundle the core compiles while the launcher is open and
+            // only the chosen game's plugin, data and files are inflated.
+            setStatus('Decompressing ScummVM...');
             setProgress(5);
-            const wasmB64 = document.getElementById('wasm-data').textContent.trim();
-            const wasmData = await decompressB64(wasmB64);
-            setDetail(`WASM: ${(wasmData.length / 1024 / 1024).toFixed(1)} MB`);
-            setProgress(30);
+            const wasmEl = document.getElementById('wasm-data');
+            const wasmB64 = wasmEl.textContent.trim();
+            const wasmModulePromise = compileWasm(wasmB64, +wasmEl.dataset.size);
+            const jsEl = document.getElementById('js-data');
+            const jsPromise = inflateTask(jsEl.textContent.trim(), +jsEl.dataset.size, 'JS glue')
+                .then(bytes => new TextDecoder().decode(bytes));
+            
+            if (BUNDLE_GAMES.length > 1) setStatus('Choose a game');
+            const game = selectGame(await chooseGame());
+            document.title = game.title;
+            setStatus(`Loading ${game.title}...`);
             
-            // Step 2: Decompress plugin
-            setStatus('Loading engine plugin...');
-            const pluginEl = document.getElementById('plugin-data');
-            const pluginName = pluginEl.dataset.name;
-            const pluginData = await decompressB64(pluginEl.textContent.trim());
-            setDetail(`Plugin: ${pluginName} (${(pluginData.length / 1024).toFixed(0)} KB)`);
-            setProgress(40);
+            const pluginName = game.plugin;
+            const pluginEl = document.querySelector(`script.plugin-data[data-name="${pluginName}"]`);
+            const pluginPromise = inflateTask(pluginEl.textContent.trim(), +pluginEl.dataset.size,
+                                              'Plugin: ' + pluginName);
             
-            // Step 3: Decompress engine data files
-            setStatus('Loading engine data...');
             const engineDataJson = JSON.parse(
                 document.getElementById('engine-data-files').textContent
             );
-            const engineDataFiles = {};
-            for (const [name, b64] of Object.entries(engineDataJson)) {
-                engineDataFiles[name] = await decompressB64(b64);
-                setDetail(`Data: ${name}`);
-            }
-            setProgress(50);
-            
-            // Step 4: Decompress game files
-            setStatus('Decompressing game files...');
-            const gameFilesJson = JSON.parse(
-                document.getElementById('game-files').textContent
+            const engineDataPromises = game.data.map(
+                name => inflateTask(engineDataJson[name], undefined, 'Data: ' + name).then(data => [name, data])
             );
-            const gameFileNames = Object.keys(gameFilesJson);
+            
+            // Eager mode only; lazy mode inflates each file when ScummVM first fetches it
             const gameFiles = {};
-            let gameIdx = 0;
-            for (const [name, b64] of Object.entries(gameFilesJson)) {
-                gameFiles[name] = await decompressB64(b64);
-                gameIdx++;
-                const pct = 50 + (gameIdx / gameFileNames.length) * 20;
-                setProgress(Math.round(pct));
-                setDetail(`${name} (${(gameFiles[name].length / 1024).toFixed(0)} KB)`);
+            if (!GAME_LAZY) {
+                for (const name of gameEntries.keys()) {
+                    gameFiles[name] = loadGameFile(name, inflateTask);
+                    gameTouched.add(name);
+                }
             }
-            setProgress(70);
+            
+            const pluginData = await pluginPromise;
+            const engineDataFiles = Object.fromEntries(await Promise.all(engineDataPromises));
             
             // Step 5: Set ScummVM arguments via hash
             // ScummVM WASM reads arguments from window.location.hash
-            window.location.hash = '-p /game --auto-detect --fullscreen';
+            window.location.hash = `-p ${GAME_LAZY ? GAME_DIR : '/game'} --auto-detect --fullscreen`;
             
             // Step 6: Prepare scummvm.ini
             const scummvmIni = [
@@ -552,6 +1083,9 @@ HTML_TEMPLATE = r"""<!DOCTYPE html>
             }
             indexJson['plugins'] = {};
             indexJson['plugins'][pluginName] = pluginData.length;
+            if (GAME_LAZY) {
+                indexJson['games'] = gameIndexTree();
+            }
             
             const pluginIndex = {};
             pluginIndex[pluginName] = pluginData.length;
@@ -585,6 +1119,22 @@ HTML_TEMPLATE = r"""<!DOCTYPE html>
                     }));
                 }
                 
+                // Serve game files on demand (lazy mode): inflate on first request
+                const gamePos = urlStr.indexOf(GAME_DIR + '/');
+                if (GAME_LAZY && gamePos !== -1) {
+                    const name = decodeURIComponent(urlStr.slice(gamePos + GAME_DIR.length + 1).split(/[?#]/)[0]);
+                    if (gameEntries.has(name)) {
+                        if (!gameTouched.has(name)) {
+                            gameTouched.add(name);
+                            console.log(`[Packer] Serving game file: ${name} (${gameTouched.size}/${gameEntries.size})`);
+                        }
+                        return loadGameFile(name).then(data => new Response(data, {
+                            status: 200,
+                            headers: { 'Content-Type': 'application/octet-stream' }
+                        }));
+                    }
+                }
+                
                 // Serve engine plugin .so file (ScummVM dynamically loads this)
                 if (urlStr.includes('/data/plugins/' + pluginName)) {
                     console.log('[Packer] Serving plugin: ' + pluginName);
@@ -595,9 +1145,10 @@ HTML_TEMPLATE = r"""<!DOCTYPE html>
                 }
                 
                 // Serve WASM binary
+                // (normally unused: instantiateWasm below supplies the compiled module)
                 if (urlStr.includes('scummvm.wasm')) {
                     console.log('[Packer] Serving scummvm.wasm from memory');
-                    return Promise.resolve(new Response(wasmData.buffer, {
+                    return Promise.resolve(new Response(inflateStream(wasmB64), {
                         status: 200,
                         headers: { 'Content-Type': 'application/wasm' }
                     }));
@@ -621,13 +1172,23 @@ HTML_TEMPLATE = r"""<!DOCTYPE html>
                 console.warn(`[FETCH BLOCKED]`, urlStr);
                 return Promise.resolve(new Response('', { status: 200 }));
             };
-            setProgress(75);
             
             // Step 9: Configure Emscripten Module
             setStatus('Setting up ScummVM...');
             window.Module = {
                 canvas: document.getElementById('canvas'),
-                wasmBinary: wasmData.buffer,
+                
+                // Hand Emscripten the module compiled while it was streaming in
+                instantiateWasm: function(imports, receiveInstance) {
+                    wasmModulePromise
+                        .then(module => WebAssembly.instantiate(module, imports)
+                            .then(instance => receiveInstance(instance, module)))
+                        .catch(err => {
+                            console.error('WASM error:', err);
+                            showError('Failed to start the ScummVM core:\n\n' + err.message);
+                        });
+                    return {};
+                },
                 
                 preRun: [function() {
                     console.log('[Packer] preRun: setting up MEMFS...');
@@ -641,8 +1202,9 @@ HTML_TEMPLATE = r"""<!DOCTYPE html>
                     console.log(`[Packer] Writing plugin: /data/plugins/${pluginName}`);
                     FS.writeFile('/data/plugins/' + pluginName, pluginData);
                     
-                    // Write game files (preserving directory structure)
-                    for (const [name, data] of Object.entries(gameFiles)) {
+                    // Write game files (preserving directory structure); empty in lazy mode.
+                    // Files still inflating hold the run dependency until written.
+                    function writeGameFile(name, data) {
                         const fullPath = '/game/' + name;
                         
                         // Create parent directories
@@ -659,15 +1221,27 @@ HTML_TEMPLATE = r"""<!DOCTYPE html>
                         FS.writeFile(fullPath, data);
                     }
                     
-                    // Debug: list what we wrote
-                    console.log('[Packer] /game/ contents:', FS.readdir('/game'));
-                    console.log('[Packer] /data/plugins/ contents:', FS.readdir('/data/plugins'));
-                    console.log('[Packer] MEMFS setup complete ✓');
+                    addRunDependency('game-files');
+                    Promise.all(Object.entries(gameFiles).map(
+                        ([name, pending]) => pending.then(data => writeGameFile(name, data))
+                    )).then(() => {
+                        // Debug: list what we wrote
+                        if (!GAME_LAZY) console.log('[Packer] /game/ contents:', FS.readdir('/game'));
+                        console.log('[Packer] /data/plugins/ contents:', FS.readdir('/data/plugins'));
+                        console.log('[Packer] MEMFS setup complete ✓');
+                        if (!GAME_LAZY) markBoot('game files');
+                        removeRunDependency('game-files');
+                    }, err => {
+                        console.error('Game file error:', err);
+                        showError('Failed to decompress game files:\n\n' + err.message);
+                    });
                 }],
                 
                 // Called when canvas starts rendering
                 onRuntimeInitialized: function() {
                     console.log('[Packer] ScummVM runtime initialized');
+                    markBoot('tti');
+                    if (GAME_LAZY && GAME_PREFETCH) prefetchGameFiles();
                     document.getElementById('loading').style.display = 'none';
                     document.getElementById('canvas').style.display = 'block';
                     document.getElementById('canvas').focus();
@@ -681,21 +1255,16 @@ HTML_TEMPLATE = r"""<!DOCTYPE html>
                 noInitialRun: false,
             };
             
-            setProgress(80);
-            
-            // Step 10: Decompress and inject ScummVM JS
+            // Step 10: Inject ScummVM JS (decoded on the pool alongside the core)
             setStatus('Starting ScummVM...');
-            const jsB64 = document.getElementById('js-data').textContent.trim();
-            const jsBytes = await decompressB64(jsB64);
-            const jsText = new TextDecoder().decode(jsBytes);
-            setProgress(90);
+            const jsText = await jsPromise;
             
             // Inject as inline script (NOT blob URL - scope issues)
             const script = document.createElement('script');
             script.textContent = jsText;
             document.body.appendChild(script);
+            markBoot('glue injected');
             
-            setProgress(100);
             setStatus('ScummVM is starting...');
             
             // Auto-hide loading screen after timeout
@@ -716,6 +1285,7 @@ HTML_TEMPLATE = r"""<!DOCTYPE html>
     
     // Start boot when page loads
     window.addEventListener('DOMContentLoaded', boot);
+    window.addEventListener('pagehide', logGameFileStats);
     </script>
 </body>
 </html>"""
@@ -724,8 +1294,138 @@ HTML_TEMPLATE = r"""<!DOCTYPE html>
 # Packer logic
 # ============================================================================
 
-def pack_game(game_dir, engine_id, title, output_path):
-    """Pack a game directory into a self-contained HTML file."""
+def collect_data_paths(engine_ids):
+    """Return [(name, path)] for the common data files plus every data file
+    the given engines need, each listed once."""
+    data_paths = []
+    for df in COMMON_DATA_FILES:
+        df_path = os.path.join(DATA_DIR, df)
+        if os.path.exists(df_path):
+            data_paths.append((df, df_path))
+        else:
+            print(f"  ⚠ {df} not found (optional)")
+    seen = set(COMMON_DATA_FILES)
+    for engine_id in engine_ids:
+        for df in ENGINE_DATA_FILES.get(engine_id, []):
+            if df in seen:
+                continue
+            seen.add(df)
+            df_path = os.path.join(DATA_DIR, df)
+            if os.path.exists(df_path):
+                data_paths.append((df, df_path))
+            else:
+                print(f"  ⚠ {df} not found!")
+                print(f"    Check {DATA_DIR}")
+    return data_paths
+
+
+def collect_game_paths(game_dir):
+    """Return [(relpath, path)] for every file under game_dir."""
+    game_paths = []
+    for root, dirs, files in os.walk(game_dir):
+        for f in files:
+            filepath = os.path.join(root, f)
+            relpath = os.path.relpath(filepath, game_dir).replace('\\', '/')
+            game_paths.append((relpath, filepath))
+    return game_paths
+
+
+def encode_game_files(game_paths, compressed, solid=False, cache_dir=DEFAULT_CACHE_DIR):
+    """Turn one game's files into the payloads the page embeds.
+    
+    Returns a dict with 'files' ({relpath: b64}, per-file layout),
+    'archive' (solid layout, else ''), 'index' ([[relpath, offset, length]];
+    offsets only apply to the solid archive) and the 'orig'/'gz' totals.
+    compressed holds the compress_files() results for the per-file layout.
+    """
+    game = {'files': {}, 'archive': '', 'index': [], 'orig': 0, 'gz': 0}
+    
+    if solid:
+        game['archive'], game['index'], game['orig'], game['gz'], hit, secs = \
+            build_solid_archive(game_paths, cache_dir=cache_dir)
+        for relpath, offset, length in game['index']:
+            print(f"       ✓ {relpath} ({length/1024:.0f} KB @ {offset})")
+        print(f"       Archive: {len(game['index'])} files, {_timing(hit, secs)}")
+    else:
+        for relpath, filepath in game_paths:
+            b64, orig, gz, ratio, hit, secs = compressed[filepath]
+            game['files'][relpath] = b64
+            game['index'].append([relpath, 0, orig])
+            game['orig'] += orig
+            game['gz'] += gz
+            print(f"       ✓ {relpath} ({orig/1024:.0f} KB → {gz/1024:.0f} KB, {_timing(hit, secs)})")
+    
+    return game
+
+
+def _game_b64_len(game):
+    return len(game['archive']) + len(json.dumps(game['files'])) + len(json.dumps(game['index']))
+
+
+def _script_json(value, **kwargs):
+    # JSON embedded in a <script> element must not close it early
+    return json.dumps(value, **kwargs).replace('</', '<\\/')
+
+
+def render_html(title, wasm, js, plugins, engine_data, games, lazy=True, prefetch=False):
+    """Fill HTML_TEMPLATE for one or more games.
+    
+    wasm and js are (b64, original_size); plugins maps plugin names to
+    (b64, original_size) and engine_data maps data file names to b64 - each
+    is embedded once however many games use it. games is a list of
+    encode_game_files() dicts extended with 'title', 'engine', 'plugin' and
+    'data' (the engine data names that game needs). A single game boots
+    straight away; several get a launcher menu.
+    """
+    plugin_scripts = '\n'.join(
+        f'    <script class="plugin-data" type="application/gzip-base64" '
+        f'data-name="{name}" data-size="{size}">{b64}</script>'
+        for name, (b64, size) in plugins.items()
+    )
+    game_scripts = []
+    bundle = []
+    for idx, game in enumerate(games):
+        game_scripts.append(f'    <script id="game-files-{idx}" type="application/json">'
+                            f'{_script_json(game["files"])}</script>')
+        game_scripts.append(f'    <script id="game-archive-{idx}" type="application/gzip-base64">'
+                            f'{game["archive"]}</script>')
+        game_scripts.append(f'    <script id="game-index-{idx}" type="application/json">'
+                            f'{_script_json(game["index"], separators=(",", ":"))}</script>')
+        bundle.append({key: game[key] for key in ('title', 'engine', 'plugin', 'data')})
+    
+    values = {
+        'GAME_TITLE': title,
+        'GAME_LAZY': 'true' if lazy else 'false',
+        'GAME_PREFETCH': 'true' if prefetch else 'false',
+        'WASM_SIZE': str(wasm[1]),
+        'JS_SIZE': str(js[1]),
+        'WASM_DATA': wasm[0],
+        'JS_DATA': js[0],
+        'PLUGIN_SCRIPTS': plugin_scripts,
+        'ENGINE_DATA_JSON': _script_json(engine_data),
+        'GAME_SCRIPTS': '\n'.join(game_scripts),
+        'BUNDLE_JSON': _script_json(bundle),
+    }
+    # One pass, so placeholder-like text inside a payload is never rewritten
+    return re.sub(r'\{\{(\w+)\}\}', lambda m: values[m.group(1)], HTML_TEMPLATE)
+
+
+def pack_game(game_dir, engine_id, title, output_path, cache_dir=DEFAULT_CACHE_DIR, jobs=None,
+              solid=False, lazy=True, prefetch=False, shared=None):
+    """Pack a game directory into a self-contained HTML file.
+    
+    All payloads are compressed together by compress_files(); pass
+    cache_dir=None to disable the on-disk cache and jobs=1 to stay in-process.
+    With solid=True the game files go into one archive (build_solid_archive)
+    instead of one gzip+base64 entry per file.
+    
+    With lazy=True (the default) the page inflates each game file only when
+    ScummVM first reads it; lazy=False decodes everything into MEMFS before
+    start-up. prefetch=True inflates the rest in the background while idle.
+    
+    shared maps paths to compress_files() results that are already encoded
+    (batch mode reuses the core, glue and theme payloads across games).
+    """
     
     # Validate inputs
     if not os.path.isdir(game_dir):
@@ -757,92 +1457,65 @@ def pack_game(game_dir, engine_id, title, output_path):
     print(f"  Plugin: {plugin_name}")
     print(f"  Source: {game_dir}")
     print(f"  Output: {output_path}")
+    print(f"  Load:   {'lazy' if lazy else 'eager'}{' + idle prefetch' if lazy and prefetch else ''}")
     print()
     
+    # ---- Collect every file to compress, then compress them together ----
+    data_paths = collect_data_paths([engine_id])
+    game_paths = collect_game_paths(game_dir)
+    
+    if not game_paths:
+        print(f"❌ No game files found in {game_dir}")
+        return False
+    
+    all_paths = [WASM_FILE, JS_FILE, plugin_path]
+    all_paths += [fp for _, fp in data_paths]
+    if not solid:
+        all_paths += [fp for _, fp in game_paths]
+    print(f"Compressing {len(all_paths)} files ({jobs or os.cpu_count()} workers, "
+          f"cache: {cache_dir or 'off'})...")
+    shared = shared or {}
+    all_paths = [fp for fp in all_paths if fp not in shared]
+    compressed, stats = compress_files(all_paths, cache_dir=cache_dir, jobs=jobs)
+    compressed.update(shared)
+    
     # ---- Step 1: Compress WASM ----
     print(f"[1/6] Compressing ScummVM WASM...")
-    wasm_b64, wasm_orig, wasm_gz, wasm_ratio = read_and_compress(WASM_FILE)
-    print(f"       {wasm_orig/1024/1024:.1f} MB → {wasm_gz/1024/1024:.1f} MB ({wasm_ratio:.0f}%)")
+    wasm_b64, wasm_orig, wasm_gz, wasm_ratio, hit, secs = compressed[WASM_FILE]
+    print(f"       {wasm_orig/1024/1024:.1f} MB → {wasm_gz/1024/1024:.1f} MB ({wasm_ratio:.0f}%, {_timing(hit, secs)})")
     
     # ---- Step 2: Compress JS ----
     print(f"[2/6] Compressing ScummVM JS...")
-    js_b64, js_orig, js_gz, js_ratio = read_and_compress(JS_FILE)
-    print(f"       {js_orig/1024/1024:.1f} MB → {js_gz/1024/1024:.1f} MB ({js_ratio:.0f}%)")
+    js_b64, js_orig, js_gz, js_ratio, hit, secs = compressed[JS_FILE]
+    print(f"       {js_orig/1024/1024:.1f} MB → {js_gz/1024/1024:.1f} MB ({js_ratio:.0f}%, {_timing(hit, secs)})")
     
     # ---- Step 3: Compress plugin ----
     print(f"[3/6] Compressing engine plugin ({plugin_name})...")
-    plugin_b64, plugin_orig, plugin_gz, plugin_ratio = read_and_compress(plugin_path)
-    print(f"       {plugin_orig/1024:.0f} KB → {plugin_gz/1024:.0f} KB ({plugin_ratio:.0f}%)")
+    plugin_b64, plugin_orig, plugin_gz, plugin_ratio, hit, secs = compressed[plugin_path]
+    print(f"       {plugin_orig/1024:.0f} KB → {plugin_gz/1024:.0f} KB ({plugin_ratio:.0f}%, {_timing(hit, secs)})")
     
     # ---- Step 4: Engine data files ----
     print(f"[4/6] Preparing engine data files...")
     engine_data = {}
-    
-    # Always include common data files (themes)
-    for df in COMMON_DATA_FILES:
-        df_path = os.path.join(DATA_DIR, df)
-        if os.path.exists(df_path):
-            b64, orig, gz, ratio = read_and_compress(df_path)
-            engine_data[df] = b64
-            print(f"       ✓ {df} ({orig/1024:.0f} KB → {gz/1024:.0f} KB)")
-        else:
-            print(f"       ⚠ {df} not found (optional)")
-    
-    # Engine-specific data files
-    specific_files = ENGINE_DATA_FILES.get(engine_id, [])
-    for df in specific_files:
-        df_path = os.path.join(DATA_DIR, df)
-        if os.path.exists(df_path):
-            b64, orig, gz, ratio = read_and_compress(df_path)
-            engine_data[df] = b64
-            print(f"       ✓ {df} ({orig/1024:.0f} KB → {gz/1024:.0f} KB)")
-        else:
-            print(f"       ⚠ {df} not found!")
-            print(f"         Check {DATA_DIR}")
+    for df, df_path in data_paths:
+        b64, orig, gz, ratio, hit, secs = compressed[df_path]
+        engine_data[df] = b64
+        print(f"       ✓ {df} ({orig/1024:.0f} KB → {gz/1024:.0f} KB, {_timing(hit, secs)})")
     
     engine_data_json = json.dumps(engine_data)
     
     # ---- Step 5: Game files ----
-    print(f"[5/6] Compressing game files...")
-    game_files = {}
-    total_game_orig = 0
-    total_game_gz = 0
-    
-    for root, dirs, files in os.walk(game_dir):
-        for f in files:
-            filepath = os.path.join(root, f)
-            relpath = os.path.relpath(filepath, game_dir).replace('\\', '/')
-            
-            b64, orig, gz, ratio = read_and_compress(filepath)
-            game_files[relpath] = b64
-            total_game_orig += orig
-            total_game_gz += gz
-            print(f"       ✓ {relpath} ({orig/1024:.0f} KB → {gz/1024:.0f} KB)")
-    
-    if not game_files:
-        print(f"❌ No game files found in {game_dir}")
-        return False
-    
-    print(f"       Total: {total_game_orig/1024/1024:.1f} MB → {total_game_gz/1024/1024:.1f} MB")
-    
-    game_files_json = json.dumps(game_files)
+    print(f"[5/6] Compressing game files{' (solid archive)' if solid else ''}...")
+    game = encode_game_files(game_paths, compressed, solid=solid, cache_dir=cache_dir)
+    print(f"       Total: {game['orig']/1024/1024:.1f} MB → {game['gz']/1024/1024:.1f} MB")
+    total_game_gz = game['gz']
     
     # ---- Step 6: Generate HTML ----
     print(f"[6/6] Generating HTML file...")
-    
-    # Escape title for JS string
-    title_js = title.replace('\\', '\\\\').replace("'", "\\'").replace('"', '\\"')
-    
-    html = HTML_TEMPLATE
-    html = html.replace('{{GAME_TITLE}}', title)
-    html = html.replace('{{GAME_TITLE_JS}}', title_js)
-    html = html.replace('{{ENGINE_ID}}', engine_id)
-    html = html.replace('{{PLUGIN_NAME}}', plugin_name)
-    html = html.replace('{{WASM_DATA}}', wasm_b64)
-    html = html.replace('{{JS_DATA}}', js_b64)
-    html = html.replace('{{PLUGIN_DATA}}', plugin_b64)
-    html = html.replace('{{ENGINE_DATA_JSON}}', engine_data_json)
-    html = html.replace('{{GAME_FILES_JSON}}', game_files_json)
+    game.update(title=title, engine=engine_id, plugin=plugin_name, data=list(engine_data))
+    html = render_html(title, (wasm_b64, wasm_orig), (js_b64, js_orig),
+                       {plugin_name: (plugin_b64, plugin_orig)}, engine_data, [game],
+                       lazy=lazy, prefetch=prefetch)
     
     # Write output
     with open(output_path, 'w', encoding='utf-8') as f:
@@ -862,7 +1535,12 @@ def pack_game(game_dir, engine_id, title, output_path):
     print(f"    JS glue:      {js_gz/1024/1024:.1f} MB (base64: {len(js_b64)/1024/1024:.1f} MB)")
     print(f"    Plugin:       {plugin_gz/1024:.0f} KB")
     print(f"    Engine data:  {len(engine_data_json)/1024:.0f} KB")
-    print(f"    Game files:   {total_game_gz/1024/1024:.1f} MB (base64: {len(game_files_json)/1024/1024:.1f} MB)")
+    game_b64_len = _game_b64_len(game)
+    print(f"    Game files:   {total_game_gz/1024/1024:.1f} MB (base64: {game_b64_len/1024/1024:.1f} MB)")
+    print(f"")
+    hit_rate = stats['hits'] / stats['files'] * 100 if stats['files'] else 0
+    print(f"  Compression:  {stats['files']} files, {stats['hits']} cache hits ({hit_rate:.0f}%), "
+          f"{stats['seconds']:.1f}s wall / {stats['cpu_seconds']:.1f}s CPU")
     print(f"")
     print(f"  Open {output_path} in a browser to play!")
     print(f"  Works 100% offline - no server needed 🎮")
@@ -870,12 +1548,289 @@ def pack_game(game_dir, engine_id, title, output_path):
     return True
 
 
+# ============================================================================
+# Multi-game bundles
+# ============================================================================
+
+def pack_bundle(games, title, output_path, cache_dir=DEFAULT_CACHE_DIR, jobs=None,
+                solid=False, lazy=True, prefetch=False):
+    """Pack several games into one HTML file with a launcher menu.
+    
+    games is a list of (game_dir, engine_id, game_title). The WASM core,
+    JS glue and theme files are embedded once, each distinct engine plugin
+    and data file once, and every game keeps its own file payloads; the
+    page only inflates the plugin, data and files of the game picked.
+    """
+    
+    # Validate inputs
+    for path in (WASM_FILE, JS_FILE):
+        if not os.path.exists(path):
+            print(f"❌ ScummVM asset not found: {path}")
+            print(f"   Run download_scummvm_assets.py first!")
+            return False
+    
+    plugin_paths = {}
+    game_paths = []
+    for game_dir, engine_id, game_title in games:
+        if not os.path.isdir(game_dir):
+            print(f"❌ Game directory not found: {game_dir}")
+            return False
+        plugin_name = f'lib{engine_id}.so'
+        plugin_path = os.path.join(PLUGINS_DIR, plugin_name)
+        if not os.path.exists(plugin_path):
+            print(f"❌ Engine plugin not found: {plugin_path} (needed by {game_title})")
+            return False
+        plugin_paths[plugin_name] = plugin_path
+        paths = collect_game_paths(game_dir)
+        if not paths:
+            print(f"❌ No game files found in {game_dir}")
+            return False
+        game_paths.append(paths)
+    
+    print(f"=" * 60)
+    print(f"ScummVM Bundle Packer")
+    print(f"=" * 60)
+    print(f"  Bundle:  {title} ({len(games)} games, {len(plugin_paths)} engine plugins)")
+    for game_dir, engine_id, game_title in games:
+        print(f"    - {game_title} [{engine_id}] {game_dir}")
+    print(f"  Output:  {output_path}")
+    print(f"  Load:    {'lazy' if lazy else 'eager'}{' + idle prefetch' if lazy and prefetch else ''}")
+    print()
+    
+    data_paths = collect_data_paths([engine_id for _, engine_id, _ in games])
+    all_paths = [WASM_FILE, JS_FILE] + list(plugin_paths.values())
+    all_paths += [fp for _, fp in data_paths]
+    if not solid:
+        all_paths += [fp for paths in game_paths for _, fp in paths]
+    print(f"Compressing {len(all_paths)} files ({jobs or os.cpu_count()} workers, "
+          f"cache: {cache_dir or 'off'})...")
+    compressed, stats = compress_files(all_paths, cache_dir=cache_dir, jobs=jobs)
+    
+    wasm_b64, wasm_orig, wasm_gz = compressed[WASM_FILE][:3]
+    js_b64, js_orig, js_gz = compressed[JS_FILE][:3]
+    plugins = {name: (compressed[path][0], compressed[path][1])
+               for name, path in plugin_paths.items()}
+    engine_data = {df: compressed[df_path][0] for df, df_path in data_paths}
+    
+    bundle = []
+    for (game_dir, engine_id, game_title), paths in zip(games, game_paths):
+        print(f"{game_title}:")
+        game = encode_game_files(paths, compressed, solid=solid, cache_dir=cache_dir)
+        needed = set(COMMON_DATA_FILES) | set(ENGINE_DATA_FILES.get(engine_id, []))
+        game.update(title=game_title, engine=engine_id, plugin=f'lib{engine_id}.so',
+                    data=[df for df in engine_data if df in needed])
+        print(f"       Total: {game['orig']/1024/1024:.1f} MB → {game['gz']/1024/1024:.1f} MB")
+        bundle.append(game)
+    
+    print(f"Generating HTML file...")
+    html = render_html(title, (wasm_b64, wasm_orig), (js_b64, js_orig), plugins,
+                       engine_data, bundle, lazy=lazy, prefetch=prefetch)
+    with open(output_path, 'w', encoding='utf-8') as f:
+        f.write(html)
+    
+    output_size = os.path.getsize(output_path)
+    shared_b64 = len(wasm_b64) + len(js_b64) + sum(
+        len(engine_data[df]) for df in COMMON_DATA_FILES if df in engine_data)
+    
+    print()
+    print(f"=" * 60)
+    print(f"✅ SUCCESS!")
+    print(f"=" * 60)
+    print(f"  Output:     {output_path}")
+    print(f"  File size:  {output_size/1024/1024:.1f} MB")
+    print(f"")
+    print(f"  Breakdown:")
+    print(f"    WASM core:    {wasm_gz/1024/1024:.1f} MB (base64: {len(wasm_b64)/1024/1024:.1f} MB)")
+    print(f"    JS glue:      {js_gz/1024/1024:.1f} MB (base64: {len(js_b64)/1024/1024:.1f} MB)")
+    print(f"    Plugins:      {sum(compressed[p][2] for p in plugin_paths.values())/1024:.0f} KB "
+          f"({', '.join(plugins)})")
+    print(f"    Engine data:  {sum(len(b64) for b64 in engine_data.values())/1024:.0f} KB")
+    for game in bundle:
+        print(f"    {game['title']}: {game['gz']/1024/1024:.1f} MB "
+              f"(base64: {_game_b64_len(game)/1024/1024:.1f} MB)")
+    print(f"    Saved:        ~{shared_b64 * (len(games) - 1)/1024/1024:.1f} MB vs. one file per game")
+    print(f"")
+    hit_rate = stats['hits'] / stats['files'] * 100 if stats['files'] else 0
+    print(f"  Compression:  {stats['files']} files, {stats['hits']} cache hits ({hit_rate:.0f}%), "
+          f"{stats['seconds']:.1f}s wall / {stats['cpu_seconds']:.1f}s CPU")
+    print(f"")
+    print(f"  Open {output_path} in a browser and pick a game (or add ?game=N)")
+    
+    return True
+
+
+# ============================================================================
+# Batch mode
+# ============================================================================
+
+# Per-worker compressed payloads shared by every game (see _batch_worker_init)
+_shared_payloads = None
+
+
+def _shared_paths():
+    """Payloads every pack embeds: the core, the JS glue and the common themes."""
+    paths = [WASM_FILE, JS_FILE]
+    for df in COMMON_DATA_FILES:
+        df_path = os.path.join(DATA_DIR, df)
+        if os.path.exists(df_path):
+            paths.append(df_path)
+    return paths
+
+
+def _output_name(title):
+    """Default output file name for a game title."""
+    safe_title = "".join(c if c.isalnum() or c in ' -_' else '' for c in title)
+    return f"{safe_title}.html"
+
+
+def _batch_worker_init(scummvm_dir, cache_dir):
+    """Encode the shared payloads once per worker process."""
+    global _shared_payloads
+    set_scummvm_dir(scummvm_dir)
+    _shared_payloads, _ = compress_files(_shared_paths(), cache_dir=cache_dir, jobs=1)
+
+
+def _batch_pack_job(job):
+    """Pack one game in a batch worker, capturing its output.
+    
+    Returns (game_dir, ok, seconds, input_bytes, output_bytes, log).
+    """
+    game_dir, engine_id, output_path, cache_dir, options = job
+    start = time.perf_counter()
+    input_bytes = sum(os.path.getsize(os.path.join(root, f))
+                      for root, dirs, files in os.walk(game_dir) for f in files)
+    log = io.StringIO()
+    try:
+        with contextlib.redirect_stdout(log):
+            ok = pack_game(game_dir, engine_id, os.path.basename(game_dir), output_path,
+                           cache_dir=cache_dir, jobs=1, shared=_shared_payloads, **options)
+    except Exception as e:
+        ok = False
+        log.write(f"❌ {type(e).__name__}: {e}\n")
+    output_bytes = os.path.getsize(output_path) if ok else 0
+    return game_dir, ok, time.perf_counter() - start, input_bytes, output_bytes, log.getvalue()
+
+
+def pack_batch(root, output_dir='.', engine_id=None, min_confidence=DEFAULT_MIN_CONFIDENCE,
+               review_file=DEFAULT_REVIEW_FILE, cache_dir=DEFAULT_CACHE_DIR, jobs=None, **options):
+    """Pack every game directory directly under root, without prompting.
+    
+    Detections scoring at least min_confidence (and with a plugin present)
+    are packed in parallel; the rest are written to review_file as JSON for
+    a human to check. Each worker encodes WASM, JS glue and themes once and
+    reuses them for all its games. options are passed on to pack_game().
+    
+    Returns True if no pack failed.
+    """
+    start = time.perf_counter()
+    game_dirs = sorted(
+        os.path.join(root, d) for d in os.listdir(root)
+        if not d.startswith('.') and os.path.isdir(os.path.join(root, d))
+    )
+    workers = jobs or os.cpu_count()
+    
+    print(f"=" * 60)
+    print(f"ScummVM Batch Packer")
+    print(f"=" * 60)
+    print(f"  Library: {root} ({len(game_dirs)} directories)")
+    print(f"  Output:  {output_dir}")
+    print(f"  Workers: {workers}")
+    print()
+    
+    # ---- Detect engines (I/O bound: directory walks and a few head reads) ----
+    print(f"Detecting engines...")
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        scans = list(executor.map(lambda d: scan_game_dir(d, cache_dir=cache_dir), game_dirs))
+    
+    accepted = []
+    review = []
+    for game_dir, scan in zip(game_dirs, scans):
+        engine = engine_id or scan['engine']
+        reason = None
+        if not engine:
+            reason = 'no engine detected'
+        elif not engine_id and scan['confidence'] < min_confidence:
+            reason = f"confidence {scan['confidence']} < {min_confidence}"
+        elif not os.path.exists(os.path.join(PLUGINS_DIR, f'lib{engine}.so')):
+            reason = f'plugin lib{engine}.so not found'
+        
+        if reason:
+            print(f"  ? {os.path.basename(game_dir)}: {reason}")
+            review.append({
+                'game_dir': game_dir,
+                'engine': scan['engine'],
+                'confidence': scan['confidence'],
+                'reason': reason,
+                'scores': scan['scores'],
+                'evidence': scan['evidence'],
+            })
+        else:
+            print(f"  ✓ {os.path.basename(game_dir)}: {engine} (confidence: {scan['confidence']})")
+            accepted.append((game_dir, engine))
+    
+    if review:
+        with open(review_file, 'w', encoding='utf-8') as f:
+            json.dump(review, f, indent=2)
+        print(f"  → {len(review)} game(s) need review: {review_file}")
+    print()
+    
+    # ---- Pack accepted games in parallel ----
+    os.makedirs(output_dir, exist_ok=True)
+    if cache_dir and accepted:
+        # Warm the cache once so workers only read the shared payloads
+        compress_files(_shared_paths(), cache_dir=cache_dir, jobs=jobs)
+    
+    print(f"Packing {len(accepted)} game(s)...")
+    failed = []
+    total_in = 0
+    total_out = 0
+    pack_jobs = [
+        (game_dir, engine, os.path.join(output_dir, _output_name(os.path.basename(game_dir))),
+         cache_dir, options)
+        for game_dir, engine in accepted
+    ]
+    if pack_jobs:
+        with ProcessPoolExecutor(max_workers=min(workers, len(pack_jobs)),
+                                 initializer=_batch_worker_init,
+                                 initargs=(SCUMMVM_DIR, cache_dir)) as executor:
+            futures = [executor.submit(_batch_pack_job, job) for job in pack_jobs]
+            for future in as_completed(futures):
+                game_dir, ok, seconds, input_bytes, output_bytes, log = future.result()
+                name = os.path.basename(game_dir)
+                if ok:
+                    total_in += input_bytes
+                    total_out += output_bytes
+                    print(f"  ✓ {name} ({input_bytes/1024/1024:.1f} MB → "
+                          f"{output_bytes/1024/1024:.1f} MB, {seconds:.1f}s)")
+                else:
+                    failed.append(game_dir)
+                    print(f"  ❌ {name} ({seconds:.1f}s)")
+                    for line in log.strip().splitlines()[-5:]:
+                        print(f"       {line}")
+    
+    elapsed = time.perf_counter() - start
+    packed = len(accepted) - len(failed)
+    print()
+    print(f"=" * 60)
+    print(f"{'✅' if not failed else '⚠'} Batch complete")
+    print(f"=" * 60)
+    print(f"  Packed:     {packed}/{len(game_dirs)}")
+    print(f"  Review:     {len(review)}")
+    print(f"  Failed:     {len(failed)}")
+    for game_dir in failed:
+        print(f"              {game_dir}")
+    print(f"  Time:       {elapsed:.1f}s ({packed / elapsed * 60:.1f} games/min, "
+          f"{total_in / 1024 / 1024 / elapsed:.1f} MB/s of game data)")
+    print(f"  Output:     {total_out/1024/1024:.1f} MB")
+    
+    return not failed
+
+
 # ============================================================================
 # Entry point
 # ============================================================================
 
 def main():
-    global SCUMMVM_DIR, PLUGINS_DIR, DATA_DIR, WASM_FILE, JS_FILE
     parser = argparse.ArgumentParser(
         description='ScummVM Game Packer - Creates portable single-file HTML games',
         formatter_class=argparse.RawDescriptionHelpFormatter,
@@ -884,6 +1839,8 @@ Examples:
   %(prog)s ./my_game/
   %(prog)s ./my_game/ --engine scumm --title "Monkey Island"
   %(prog)s ./my_game/ -o my_game.html
+  %(prog)s --batch ./games/ -o ./html/ --jobs 4
+  %(prog)s --bundle ./sky/ ./queen/=queen --title "Revolution Classics"
   %(prog)s --list-engines
 """
     )
@@ -897,16 +1854,56 @@ Examples:
     )
     parser.add_argument(
         '--title', '-t',
-        help='Game title (default: directory name)'
+        help='Game title (default: directory name); bundle title with --bundle'
     )
     parser.add_argument(
         '--output', '-o',
-        help='Output HTML file path (default: <title>.html)'
+        help='Output HTML file path (default: <title>.html); output directory with --batch'
+    )
+    parser.add_argument(
+        '--batch', metavar='ROOT',
+        help='Pack every game directory under ROOT in parallel, without prompting'
+    )
+    parser.add_argument(
+        '--bundle', nargs='+', metavar='DIR[=ENGINE]',
+        help='Pack several games into one HTML file with a launcher menu'
+    )
+    parser.add_argument(
+        '--min-confidence', type=int, default=DEFAULT_MIN_CONFIDENCE,
+        help=f'Batch/bundle mode: lowest detection score accepted without review (default: {DEFAULT_MIN_CONFIDENCE})'
+    )
+    parser.add_argument(
+        '--review-file', default=DEFAULT_REVIEW_FILE,
+        help=f'Batch mode: where to list games that need a manual engine (default: {DEFAULT_REVIEW_FILE})'
     )
     parser.add_argument(
         '--list-engines', action='store_true',
         help='List all available engine plugins and exit'
     )
+    parser.add_argument(
+        '--cache-dir', default=DEFAULT_CACHE_DIR,
+        help=f'Directory for cached compressed payloads (default: {DEFAULT_CACHE_DIR})'
+    )
+    parser.add_argument(
+        '--no-cache', action='store_true',
+        help='Do not read or write the compressed payload cache'
+    )
+    parser.add_argument(
+        '--jobs', '-j', type=int,
+        help='Number of worker processes (default: CPU count); games packed at once with --batch'
+    )
+    parser.add_argument(
+        '--solid', action='store_true',
+        help='Store game files as one compressed archive (better ratio, one decode pass)'
+    )
+    parser.add_argument(
+        '--eager', action='store_true',
+        help='Decompress every game file into memory before start-up instead of on demand'
+    )
+    parser.add_argument(
+        '--prefetch', action='store_true',
+        help='In lazy mode, decompress untouched game files in the background while idle'
+    )
     parser.add_argument(
         '--scummvm-dir',
         help=f'Path to ScummVM WASM assets (default: {SCUMMVM_DIR})'
@@ -916,16 +1913,45 @@ Examples:
     
     # Override paths if specified
     if args.scummvm_dir:
-        SCUMMVM_DIR = args.scummvm_dir
-        PLUGINS_DIR = os.path.join(SCUMMVM_DIR, 'plugins')
-        DATA_DIR = os.path.join(SCUMMVM_DIR, 'data')
-        WASM_FILE = os.path.join(SCUMMVM_DIR, 'scummvm.wasm')
-        JS_FILE = os.path.join(SCUMMVM_DIR, 'scummvm.js')
+        set_scummvm_dir(os.path.abspath(args.scummvm_dir))
     
     if args.list_engines:
         list_available_engines()
         return
     
+    if args.batch:
+        success = pack_batch(
+            os.path.abspath(args.batch), output_dir=args.output or '.',
+            engine_id=args.engine, min_confidence=args.min_confidence,
+            review_file=args.review_file,
+            cache_dir=None if args.no_cache else args.cache_dir, jobs=args.jobs,
+            solid=args.solid, lazy=not args.eager, prefetch=args.prefetch,
+        )
+        sys.exit(0 if success else 1)
+    
+    if args.bundle:
+        # Non-interactive like --batch: an undetected engine must be given as DIR=ENGINE
+        games = []
+        for spec in args.bundle:
+            game_dir, _, engine_id = spec.partition('=')
+            game_dir = os.path.abspath(game_dir)
+            game_title = os.path.basename(game_dir.rstrip('/\\'))
+            if not engine_id:
+                engine_id, confidence = detect_engine(
+                    game_dir, cache_dir=None if args.no_cache else args.cache_dir)
+                if not engine_id or confidence < args.min_confidence:
+                    print(f"❌ Could not detect the engine of {game_dir} "
+                          f"(best: {engine_id or 'none'}, confidence {confidence}); use DIR=ENGINE")
+                    sys.exit(1)
+                print(f"  → {game_title}: {engine_id} (confidence: {confidence})")
+            games.append((game_dir, engine_id, game_title))
+        title = args.title or 'ScummVM Collection'
+        success = pack_bundle(games, title, args.output or _output_name(title),
+                              cache_dir=None if args.no_cache else args.cache_dir,
+                              jobs=args.jobs, solid=args.solid,
+                              lazy=not args.eager, prefetch=args.prefetch)
+        sys.exit(0 if success else 1)
+    
     if not args.game_dir:
         parser.print_help()
         return
@@ -938,7 +1964,8 @@ Examples:
         print(f"Using specified engine: {engine_id}")
     else:
         print(f"Scanning {game_dir} for game files...")
-        engine_id, confidence = detect_engine(game_dir)
+        engine_id, confidence = detect_engine(
+            game_dir, cache_dir=None if args.no_cache else args.cache_dir)
         if engine_id:
             print(f"  → Detected engine: {engine_id} (confidence: {confidence})")
             confirm = input(f"  Use engine '{engine_id}'? [Y/n] ").strip().lower()
@@ -957,11 +1984,13 @@ Examples:
     title = args.title or os.path.basename(game_dir.rstrip('/\\'))
     
     # Determine output path
-    safe_title = "".join(c if c.isalnum() or c in ' -_' else '' for c in title)
-    output_path = args.output or f"{safe_title}.html"
+    output_path = args.output or _output_name(title)
     
     # Pack!
-    success = pack_game(game_dir, engine_id, title, output_path)
+    success = pack_game(game_dir, engine_id, title, output_path,
+                        cache_dir=None if args.no_cache else args.cache_dir,
+                        jobs=args.jobs, solid=args.solid,
+                        lazy=not args.eager, prefetch=args.prefetch)
     sys.exit(0 if success else 1)
 
 
@@ -22,9 +22,11 @@ Engine: js-dos 6.22 (asyncify / mono-thread)
 
 import argparse
 import base64
+import hashlib
 import json
 import os
 import re
+import struct
 import sys
 import urllib.request
 import zipfile
@@ -59,6 +61,49 @@ KNOWN_GAME_EXES = [
     'INSTALL.EXE', 'SETUP.EXE',
 ]
 
+# Installers / sound setup utilities — never the game itself
+SETUP_EXES = frozenset([
+    'INSTALL.EXE', 'SETUP.EXE', 'INSTALL.COM', 'SETUP.COM',
+    'SETSOUND.EXE', 'SNDSETUP.EXE', 'CONFIG.EXE',
+])
+
+# Precomputed lookup indexes (avoid rebuilding lists per file)
+_KNOWN_GAME_EXES_SET = frozenset(k.upper() for k in KNOWN_GAME_EXES) - SETUP_EXES
+_DOS_EXE_EXTENSIONS_SET = frozenset(e.upper() for e in DOS_EXE_EXTENSIONS)
+
+# Audio profiles: mixer, OPL and PC speaker rates tuned together.
+#   low-latency — small blocks, short prebuffer (desktop / fast phones)
+#   balanced    — DOSBox defaults
+#   low-cpu     — half-rate mixing, large blocks (weak phones)
+AUDIO_PROFILES = {
+    'low-latency': {'rate': 44100, 'blocksize': 512,  'prebuffer': 10,
+                    'oplrate': 44100, 'pcrate': 44100, 'tandyrate': 44100},
+    'balanced':    {'rate': 44100, 'blocksize': 1024, 'prebuffer': 20,
+                    'oplrate': 44100, 'pcrate': 44100, 'tandyrate': 44100},
+    'low-cpu':     {'rate': 22050, 'blocksize': 2048, 'prebuffer': 40,
+                    'oplrate': 22050, 'pcrate': 22050, 'tandyrate': 22050},
+}
+DEFAULT_AUDIO_PROFILE = 'balanced'
+
+# Comment line separating the generated dosbox.conf from --extra-conf; the
+# page only applies an audio profile above it
+EXTRA_CONF_MARKER = '# --extra-conf'
+
+# Only this many bytes of each candidate are read for header analysis
+EXE_HEADER_READ_SIZE = 4096
+
+# Signatures found in the first KB of protected-mode DOS games
+# (DOS extenders are a strong hint that the EXE is the real game)
+DOS_EXTENDER_SIGNATURES = [
+    b'DOS/4G', b'DOS4GW', b'PMODE/W', b'PMODEW', b'CWSDPMI',
+    b'DOS/32A', b'DOS32A', b'Phar Lap', b'CauseWay',
+]
+
+# Signatures of runtime/utility stubs that are rarely the game
+UTILITY_SIGNATURES = [
+    b'PKLITE', b'LZEXE', b'PKWARE', b'PKUNZIP', b'LHA\'s SFX', b'ARJ SFX',
+]
+
 # ============================================================
 #  ZIP Analysis
 # ============================================================
@@ -110,29 +155,180 @@ def analyze_zip(zip_path):
             }
             info['files'].append(file_info)
 
-            if ext in [e.upper() for e in DOS_EXE_EXTENSIONS]:
-                file_info['priority'] = _exe_priority(basename)
+            if ext in _DOS_EXE_EXTENSIONS_SET:
+                try:
+                    file_info.update(_read_exe_header(zf, zi, ext))
+                except (NotImplementedError, RuntimeError, zipfile.BadZipFile, OSError):
+                    # Imploded (PKZIP 1.x) or encrypted member: rank by name only
+                    file_info.update(_empty_exe_meta('unreadable'))
                 info['executables'].append(file_info)
 
+        _rank_executables(info['executables'])
+
     # Sort executables by priority (lower = better)
     info['executables'].sort(key=lambda x: x.get('priority', 999))
 
     return info
 
 
+def _empty_exe_meta(fmt='unknown'):
+    """Header fields of an executable nothing is known about yet."""
+    return {
+        'format': fmt,
+        'image_size': 0,
+        'overlay_size': 0,
+        'extender': False,
+        'packed': False,
+        'bat_refs': [],
+    }
+
+
+def _read_exe_header(zf, zi, ext):
+    """Read only the first few KB of an executable and describe its format.
+
+    Returns a dict with:
+      - format: 'mz', 'ne', 'pe', 'le' (DOS extender / VxD), 'com', 'bat' or 'unknown'
+        ('unreadable' is set by analyze_zip() for members it cannot open)
+      - image_size: bytes loaded by DOS (MZ only)
+      - overlay_size: bytes appended after the load image (MZ only)
+      - extender: True if a DOS extender signature was found
+      - packed: True if an exe-packer / SFX signature was found
+      - bat_refs: executables referenced by a .BAT file
+    """
+    with zf.open(zi) as f:
+        head = f.read(EXE_HEADER_READ_SIZE)
+
+    meta = _empty_exe_meta()
+
+    if ext == '.BAT':
+        meta['format'] = 'bat'
+        meta['bat_refs'] = _parse_bat_refs(head)
+        return meta
+
+    if head[:2] in (b'MZ', b'ZM') and len(head) >= 0x1C:
+        meta['format'] = 'mz'
+        bytes_last_page, pages = struct.unpack_from('<HH', head, 2)
+        image_size = pages * 512
+        if bytes_last_page:
+            image_size -= 512 - bytes_last_page
+        meta['image_size'] = image_size
+        meta['overlay_size'] = max(0, zi.file_size - image_size)
+
+        # New-style executable: e_lfarlc >= 0x40 and e_lfanew points to NE/PE/LE/LX
+        reloc_offset = struct.unpack_from('<H', head, 0x18)[0]
+        if reloc_offset >= 0x40 and len(head) >= 0x40:
+            new_offset = struct.unpack_from('<I', head, 0x3C)[0]
+            sig = head[new_offset:new_offset + 2] if new_offset + 2 <= len(head) else b''
+            if sig == b'NE':
+                meta['format'] = 'ne'
+            elif sig == b'PE':
+                meta['format'] = 'pe'
+            elif sig in (b'LE', b'LX'):
+                meta['format'] = 'le'
+    elif ext == '.COM':
+        meta['format'] = 'com'
+
+    meta['extender'] = any(sig in head for sig in DOS_EXTENDER_SIGNATURES)
+    meta['packed'] = any(sig in head for sig in UTILITY_SIGNATURES)
+    return meta
+
+
+_BAT_EXE_REF_RE = re.compile(rb'([A-Za-z0-9_~\-!$]{1,8}(?:\.(?:EXE|COM|BAT))?)', re.IGNORECASE)
+_BAT_SKIP_WORDS = frozenset([
+    b'@ECHO', b'ECHO', b'OFF', b'ON', b'REM', b'CLS', b'CD', b'SET', b'IF',
+    b'GOTO', b'PAUSE', b'EXIST', b'NOT', b'ERRORLEVEL', b'CALL', b'LH',
+    b'LOADHIGH', b'PATH', b'EXIT', b'SHIFT', b'FOR', b'IN', b'DO', b'C', b'D',
+])
+
+
+def _parse_bat_refs(head):
+    """Return the upper-cased command names invoked by a batch file.
+
+    Only the first word of each line (after @, CALL or LH) is considered;
+    labels, comments and echo lines are skipped.
+    """
+    refs = []
+    for raw in head.splitlines():
+        line = raw.strip().lstrip(b'@').strip()
+        if not line or line.upper().startswith((b':', b'REM', b'ECHO')):
+            continue
+        words = line.split()
+        while words and words[0].upper() in (b'CALL', b'LH', b'LOADHIGH'):
+            words = words[1:]
+        if not words:
+            continue
+        m = _BAT_EXE_REF_RE.match(words[0].split(b'\\')[-1])
+        if not m:
+            continue
+        word = m.group(1).upper()
+        if word in _BAT_SKIP_WORDS:
+            continue
+        refs.append(word.decode('ascii', errors='replace'))
+    return refs
+
+
+def _rank_executables(executables):
+    """Assign a 'priority' to each executable (lower = more likely the game).
+
+    Starts from the filename priority, then adjusts it with what the headers
+    revealed: Windows binaries and packed utilities are pushed back, DOS
+    extender games, large load images and overlay-carrying EXEs move forward,
+    and executables launched by a .BAT file get a bonus (as does the BAT).
+    """
+    # Index: stem → basename, to resolve BAT references without extension
+    by_stem = {}
+    for exe in executables:
+        stem = os.path.splitext(exe['basename'])[0]
+        by_stem.setdefault(stem, exe['basename'])
+
+    referenced = set()
+    for exe in executables:
+        for ref in exe.get('bat_refs', ()):
+            target = ref if '.' in ref else by_stem.get(ref)
+            if target and target != exe['basename']:
+                referenced.add(target)
+                exe.setdefault('launches', []).append(target)
+
+    for exe in executables:
+        priority = _exe_priority(exe['basename'])
+        fmt = exe.get('format')
+
+        if priority < 900:
+            if fmt in ('ne', 'pe'):
+                priority += 400      # Windows binary: won't run in DOSBox
+            elif exe['basename'].endswith('.EXE') and fmt == 'unknown':
+                priority += 200      # not a real executable
+            else:
+                if exe.get('extender') or fmt == 'le':
+                    priority -= 30
+                if exe.get('image_size', 0) >= 100 * 1024:
+                    priority -= 10
+                elif fmt == 'mz' and exe.get('image_size', 0) < 4 * 1024:
+                    priority += 20   # tiny stub / utility
+                if exe.get('overlay_size', 0) >= 32 * 1024:
+                    priority -= 10   # overlay-based game engine
+                if exe.get('packed'):
+                    priority += 30
+                if exe['basename'] in referenced:
+                    priority -= 15
+                if fmt == 'bat' and any(t not in SETUP_EXES for t in exe.get('launches', ())):
+                    priority -= 15
+
+        exe['priority'] = priority
+
+
 def _exe_priority(basename):
-    """Assign priority to an executable (lower = more likely the game)."""
+    """Assign filename priority to an executable (lower = more likely the game)."""
     upper = basename.upper()
 
-    # Known game executables get top priority
-    if upper in [k.upper() for k in KNOWN_GAME_EXES]:
-        return 10
-
     # Skip installers/setup
-    if upper in ('INSTALL.EXE', 'SETUP.EXE', 'INSTALL.COM', 'SETUP.COM',
-                 'SETSOUND.EXE', 'SNDSETUP.EXE', 'CONFIG.EXE'):
+    if upper in SETUP_EXES:
         return 900
 
+    # Known game executables get top priority
+    if upper in _KNOWN_GAME_EXES_SET:
+        return 10
+
     # GAME/PLAY/START/RUN/MAIN get high priority
     name = os.path.splitext(upper)[0]
     if name in ('GAME', 'PLAY', 'START', 'RUN', 'MAIN', 'GO'):
@@ -201,14 +397,77 @@ def load_jsdos_assets(cache_dir):
     return assets
 
 
+def build_engine_fragment(jsdos_assets):
+    """Build the engine part of the HTML (js-dos library + base64 WASM/glue).
+
+    The result only depends on the js-dos assets, never on the game, so it
+    can be prepared once and written verbatim into every generated page.
+    """
+    jsdos_js = jsdos_assets['js-dos.js'].decode('utf-8', errors='replace')
+    wdosbox_wasm_b64 = base64.b64encode(jsdos_assets['wdosbox.wasm.js']).decode('ascii')
+    wdosbox_js_b64 = base64.b64encode(jsdos_assets['wdosbox.js']).decode('ascii')
+
+    return (
+        f"<!-- js-dos {JSDOS_VERSION} library (inline) -->\n"
+        f"<script>\n{jsdos_js}\n</script>\n"
+        f"\n"
+        f"<script>\n"
+        f"// Embedded engine assets (base64)\n"
+        f"var WASM_B64 = \"{wdosbox_wasm_b64}\";\n"
+        f"var WDOSBOX_JS_B64 = \"{wdosbox_js_b64}\";\n"
+        f"</script>"
+    )
+
+
+def _engine_fragment_key(jsdos_assets):
+    """Cache key for the engine fragment, derived from the asset hashes."""
+    h = hashlib.sha256()
+    for filename in sorted(JSDOS_FILES):
+        h.update(filename.encode('utf-8'))
+        h.update(hashlib.sha256(jsdos_assets[filename]).digest())
+    return h.hexdigest()[:16]
+
+
+def load_engine_fragment(cache_dir, jsdos_assets):
+    """Return the engine HTML fragment, building and caching it on first use.
+
+    The fragment is stored in the cache directory as
+    ``engine-<version>-<hash>.html`` so every later pack with the same
+    js-dos assets reuses it without decoding or re-encoding anything.
+    """
+    key = _engine_fragment_key(jsdos_assets)
+    cache_path = os.path.join(cache_dir, f"engine-{JSDOS_VERSION}-{key}.html")
+
+    if os.path.isfile(cache_path):
+        with open(cache_path, 'r', encoding='utf-8') as f:
+            fragment = f.read()
+        if fragment:
+            print(f"   Engine fragment: cached ({key})")
+            return fragment
+
+    fragment = build_engine_fragment(jsdos_assets)
+
+    os.makedirs(cache_dir or '.', exist_ok=True)
+    tmp_path = cache_path + '.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        f.write(fragment)
+    os.replace(tmp_path, cache_path)
+    print(f"   Engine fragment: built ({key}, {len(fragment)//1024} KB)")
+
+    return fragment
+
+
 # ============================================================
 #  DOSBox Configuration
 # ============================================================
 
 def generate_dosbox_conf(exe_name, cycles='auto', memory=16, sound='sb16',
                           fullscreen=False, mount_point='C', extra_conf=None,
-                          root_dir=None):
+                          root_dir=None, audio_profile=DEFAULT_AUDIO_PROFILE):
     """Generate a dosbox.conf content string.
+
+    audio_profile selects one of AUDIO_PROFILES ('auto' writes the default
+    profile; the page swaps it at boot after probing the device).
     
     IMPORTANT: No [autoexec] section! js-dos 6.22 unshifts 'mount c .' which
     mounts the Emscripten CWD (often /home/web_user) as C:, but fs.extract()
@@ -216,6 +475,7 @@ def generate_dosbox_conf(exe_name, cycles='auto', memory=16, sound='sb16',
     to main() in the JavaScript, which re-mounts C: to '/' explicitly.
     The config only contains settings sections.
     """
+    audio = AUDIO_PROFILES.get(audio_profile, AUDIO_PROFILES[DEFAULT_AUDIO_PROFILE])
     conf = f"""[sdl]
 fullscreen=false
 autolock=true
@@ -233,9 +493,9 @@ cycles={cycles}
 
 [mixer]
 nosound=false
-rate=44100
-blocksize=1024
-prebuffer=20
+rate={audio['rate']}
+blocksize={audio['blocksize']}
+prebuffer={audio['prebuffer']}
 
 [sblaster]
 sbtype={sound}
@@ -246,16 +506,16 @@ hdma=5
 sbmixer=true
 oplmode=auto
 oplemu=default
-oplrate=44100
+oplrate={audio['oplrate']}
 
 [gus]
 gus=false
 
 [speaker]
 pcspeaker=true
-pcrate=44100
+pcrate={audio['pcrate']}
 tandy=auto
-tandyrate=44100
+tandyrate={audio['tandyrate']}
 
 [joystick]
 joysticktype=auto
@@ -279,8 +539,8 @@ umb=true
 ipx=false
 """
     if extra_conf:
-        # Append extra config sections at the end
-        conf += '\n' + extra_conf + '\n'
+        # Append extra config sections at the end, after the marker
+        conf += '\n' + EXTRA_CONF_MARKER + '\n' + extra_conf + '\n'
 
     return conf
 
@@ -289,21 +549,29 @@ ipx=false
 #  HTML Generation
 # ============================================================
 
-def generate_html(game_zip_path, title, exe_name, jsdos_assets, dosbox_conf,
-                   keyboard_layout='default', root_dir=None):
-    """Generate a single self-contained HTML file with embedded DOS emulator."""
+def generate_html(game_zip_path, title, exe_name, engine_fragment, dosbox_conf,
+                   keyboard_layout='default', root_dir=None,
+                   audio_profile=DEFAULT_AUDIO_PROFILE, persist=True):
+    """Generate a single self-contained HTML file with embedded DOS emulator.
 
-    # Encode assets
-    jsdos_js = jsdos_assets['js-dos.js'].decode('utf-8', errors='replace')
-    wdosbox_js_text = jsdos_assets['wdosbox.js'].decode('utf-8', errors='replace')
-    wdosbox_wasm_b64 = base64.b64encode(jsdos_assets['wdosbox.wasm.js']).decode('ascii')
-    wdosbox_js_b64 = base64.b64encode(jsdos_assets['wdosbox.js']).decode('ascii')
+    ``engine_fragment`` is the pre-built js-dos engine HTML returned by
+    load_engine_fragment(); it is inserted as-is.
+
+    audio_profile 'auto' lets the page pick an AUDIO_PROFILES entry at boot
+    from a quick device probe; any other value is used as-is (the page can
+    still be overridden with ?audio=<profile>).
+
+    persist keeps files written by the game (saves, config) in IndexedDB:
+    only files changed since fs.extract are stored, compressed, keyed by
+    the game ZIP hash, and replayed over the embedded image on next boot.
+    """
 
     # Encode game ZIP
     with open(game_zip_path, 'rb') as f:
         game_data = f.read()
     game_b64 = base64.b64encode(game_data).decode('ascii')
     game_size_kb = len(game_data) // 1024
+    game_hash = hashlib.sha256(game_data).hexdigest()[:16]
 
     # Encode dosbox.conf
     dosbox_conf_b64 = base64.b64encode(dosbox_conf.encode('utf-8')).decode('ascii')
@@ -573,6 +841,7 @@ html, body {{
     touch-action: none;
 }}
 #vkb button:active {{ background: rgba(255,255,255,0.3); }}
+#vkb button.active {{ background: rgba(0,150,255,0.4); }}
 #vkb button.wide {{ min-width: 50px; }}
 #vkb button.space {{ min-width: 80px; }}
 
@@ -582,6 +851,21 @@ html, body {{
     #vkb button.wide {{ min-width: 44px; }}
 }}
 
+/* Debug overlay (?debug) */
+#debug-overlay {{
+    display: none;
+    position: fixed; top: 6px; left: 6px;
+    z-index: 10001;
+    background: rgba(0,0,0,0.7);
+    color: #8f8;
+    font: 11px/1.35 monospace;
+    padding: 4px 8px;
+    border-radius: 6px;
+    pointer-events: none;
+    white-space: pre;
+}}
+#debug-overlay.show {{ display: block; }}
+
 /* Error screen */
 #error-screen {{
     display: none;
@@ -617,6 +901,9 @@ html, body {{
     <div id="loading-status">Initializing...</div>
 </div>
 
+<!-- Debug overlay -->
+<div id="debug-overlay"></div>
+
 <!-- Error screen -->
 <div id="error-screen">
     <h2>⚠️ Emulator Error</h2>
@@ -643,10 +930,7 @@ html, body {{
 <!-- Virtual keyboard -->
 {vkb_html}
 
-<!-- js-dos 6.22 library (inline) -->
-<script>
-{jsdos_js}
-</script>
+{engine_fragment}
 
 <script>
 // ============================================================
@@ -657,12 +941,20 @@ var GAME_TITLE = {json.dumps(title)};
 var EXE_NAME = {json.dumps(exe_name)};
 var ROOT_DIR = {json.dumps(root_dir or "")};
 
-// Embedded assets (base64)
-var WASM_B64 = "{wdosbox_wasm_b64}";
-var WDOSBOX_JS_B64 = "{wdosbox_js_b64}";
+// Embedded game assets (base64) — WASM_B64 / WDOSBOX_JS_B64 come from the engine fragment
 var GAME_B64 = "{game_b64}";
 var DOSBOX_CONF_B64 = "{dosbox_conf_b64}";
 
+// Audio profiles (dosbox.conf is baked with AUDIO_CONF_PROFILE)
+var AUDIO_PROFILE = {json.dumps(audio_profile)};
+var AUDIO_CONF_PROFILE = {json.dumps(audio_profile if audio_profile in AUDIO_PROFILES else DEFAULT_AUDIO_PROFILE)};
+var AUDIO_PROFILES = {json.dumps(AUDIO_PROFILES)};
+var EXTRA_CONF_MARKER = {json.dumps(EXTRA_CONF_MARKER)};
+
+// Persistent C: drive (delta snapshots in IndexedDB, keyed by game hash)
+var GAME_HASH = "{game_hash}";
+var PERSIST = {json.dumps(bool(persist))} && !/[?&]nosave\\b/.test(location.search);
+
 // --- UI Helpers ---
 function setProgress(pct, msg) {{
     var fill = document.getElementById('progress-fill');
@@ -688,6 +980,226 @@ function hideLoading() {{
     }}
 }}
 
+// --- Debug overlay (enabled with ?debug in the URL) ---
+var DEBUG = /[?&]debug\\b/.test(location.search);
+var _debugStats = {{}};
+function setDebugStat(key, text) {{
+    if (!DEBUG) return;
+    _debugStats[key] = text;
+    var el = document.getElementById('debug-overlay');
+    if (!el) return;
+    el.classList.add('show');
+    el.textContent = Object.keys(_debugStats).map(function(k) {{
+        return k + ': ' + _debugStats[k];
+    }}).join('\\n');
+}}
+
+// Boot milestones, in ms since navigation start
+function markBoot(label) {{
+    var ms = Math.round(performance.now());
+    console.log('Boot ' + label + ': ' + ms + ' ms');
+    setDebugStat(label, ms + ' ms');
+}}
+
+// --- Audio profile selection ---
+function pickAudioProfile() {{
+    var m = location.search.match(/[?&]audio=([\\w-]+)/);
+    if (m && AUDIO_PROFILES[m[1]]) return m[1];
+    if (AUDIO_PROFILE !== 'auto') return AUDIO_PROFILE;
+    // Quick capability probe: cores, memory, touch-only device
+    var cores = navigator.hardwareConcurrency || 2;
+    var mem = navigator.deviceMemory || 4;
+    var touch = ('ontouchstart' in window) || (navigator.maxTouchPoints > 0);
+    if (cores <= 4 || mem <= 2) return 'low-cpu';
+    if (!touch && cores >= 8) return 'low-latency';
+    return 'balanced';
+}}
+
+// Only the packer's own settings are rewritten; --extra-conf lines win
+function applyAudioProfile(conf, name) {{
+    var p = AUDIO_PROFILES[name];
+    var cut = conf.indexOf('\n' + EXTRA_CONF_MARKER + '\n');
+    if (cut < 0) cut = conf.length;
+    return conf.slice(0, cut).replace(/^(rate|blocksize|prebuffer|oplrate|pcrate|tandyrate)=.*$/gm,
+        function(line, key) {{ return key + '=' + p[key]; }}) + conf.slice(cut);
+}}
+
+// Audio buffer health: wrap SDL's pushAudio to measure how far ahead
+// audio is queued and count underruns (queue ran dry before the push).
+var _audioStats = {{ profile: '', pushes: 0, underruns: 0, aheadMs: 0 }};
+function _hookAudioStats(ci) {{
+    var SDL = ci && ci.dos && ci.dos.SDL;
+    if (!SDL || !SDL.audio || !SDL.audio.pushAudio || !SDL.audioContext) return false;
+    if (SDL.audio._statsHooked) return true;
+    var pushAudio = SDL.audio.pushAudio;
+    SDL.audio.pushAudio = function(ptr, sizeBytes) {{
+        var ahead = SDL.audio.nextPlayTime - SDL.audioContext.currentTime;
+        if (_audioStats.pushes > 0 && ahead < 0) _audioStats.underruns++;
+        _audioStats.pushes++;
+        _audioStats.aheadMs = Math.max(0, ahead * 1000);
+        return pushAudio.call(this, ptr, sizeBytes);
+    }};
+    SDL.audio._statsHooked = true;
+    return true;
+}}
+
+function _startAudioStats(ci) {{
+    if (!DEBUG) return;
+    setInterval(function() {{
+        if (!_hookAudioStats(ci)) {{
+            setDebugStat('audio', _audioStats.profile + ' · waiting for SDL audio');
+            return;
+        }}
+        var pct = _audioStats.pushes ? (100 * _audioStats.underruns / _audioStats.pushes) : 0;
+        setDebugStat('audio', _audioStats.profile +
+            ' · queued ' + _audioStats.aheadMs.toFixed(0) + ' ms' +
+            ' · underruns ' + _audioStats.underruns + '/' + _audioStats.pushes +
+            ' (' + pct.toFixed(2) + '%)');
+    }}, 1000);
+}}
+
+// --- Persistent C: drive ---
+// After fs.extract() a signature (mtime:size) of every file is taken.
+// Files whose signature changes are read, gzip-compressed and stored one
+// record per file ("<GAME_HASH>|<path>"); files deleted from the pristine
+// image get a tombstone. On boot the records are replayed over the image,
+// so storage grows with what the game wrote, not with the game size.
+var SAVE_DB = 'portable-retro-dos';
+var SAVE_STORE = 'files';
+var SAVE_SKIP = {{ '/dev': 1, '/proc': 1, '/tmp': 1, '/home': 1, '/dosbox.conf': 1 }};
+var _saveFS = null, _saveBase = null, _saveSeen = null, _saveBusy = false, _saveDB = null;
+
+function _saveOpenDB() {{
+    if (_saveDB) return _saveDB;
+    _saveDB = new Promise(function(resolve) {{
+        if (!window.indexedDB) return resolve(null);
+        var req = indexedDB.open(SAVE_DB, 1);
+        req.onupgradeneeded = function() {{
+            req.result.createObjectStore(SAVE_STORE, {{ keyPath: 'id' }});
+        }};
+        req.onsuccess = function() {{ resolve(req.result); }};
+        req.onerror = function() {{ resolve(null); }};
+    }});
+    return _saveDB;
+}}
+
+function _saveRange() {{
+    return IDBKeyRange.bound(GAME_HASH + '|', GAME_HASH + '|\\uffff');
+}}
+
+function _saveTx(db, mode, fn) {{
+    return new Promise(function(resolve, reject) {{
+        var tx = db.transaction(SAVE_STORE, mode);
+        var result = fn(tx.objectStore(SAVE_STORE));
+        tx.oncomplete = function() {{ resolve(result && result.result); }};
+        tx.onerror = function() {{ reject(tx.error); }};
+    }});
+}}
+
+function _saveWalk(FS, dir, out) {{
+    var names;
+    try {{ names = FS.readdir(dir); }} catch (e) {{ return out; }}
+    for (var i = 0; i < names.length; i++) {{
+        var n = names[i];
+        if (n === '.' || n === '..') continue;
+        var p = (dir === '/' ? '' : dir) + '/' + n;
+        if (SAVE_SKIP[p]) continue;
+        var st;
+        try {{ st = FS.stat(p); }} catch (e) {{ continue; }}
+        if (FS.isDir(st.mode)) _saveWalk(FS, p, out);
+        else out[p] = st.mtime.getTime() + ':' + st.size;
+    }}
+    return out;
+}}
+
+function _saveMkdirs(FS, path) {{
+    var parts = path.split('/'), cur = '';
+    for (var i = 1; i < parts.length - 1; i++) {{
+        cur += '/' + parts[i];
+        try {{ FS.mkdir(cur); }} catch (e) {{}}
+    }}
+}}
+
+async function _saveDeflate(bytes) {{
+    if (typeof CompressionStream === 'undefined') return {{ z: false, data: bytes }};
+    var stream = new Blob([bytes]).stream().pipeThrough(new CompressionStream('gzip'));
+    return {{ z: true, data: new Uint8Array(await new Response(stream).arrayBuffer()) }};
+}}
+
+async function _saveInflate(rec) {{
+    if (!rec.z) return new Uint8Array(rec.data);
+    var stream = new Blob([rec.data]).stream().pipeThrough(new DecompressionStream('gzip'));
+    return new Uint8Array(await new Response(stream).arrayBuffer());
+}}
+
+// Replay stored deltas on top of the freshly extracted image
+async function restoreSaves(FS) {{
+    _saveFS = FS;
+    _saveBase = _saveWalk(FS, '/', {{}});
+    var db = await _saveOpenDB();
+    if (!db) return 0;
+    if (/[?&]resetsave\\b/.test(location.search)) {{
+        await _saveTx(db, 'readwrite', function(st) {{ return st.delete(_saveRange()); }});
+        _saveSeen = _saveBase;
+        return 0;
+    }}
+    var recs = await _saveTx(db, 'readonly', function(st) {{ return st.getAll(_saveRange()); }}) || [];
+    for (var i = 0; i < recs.length; i++) {{
+        var path = recs[i].id.slice(GAME_HASH.length + 1);
+        if (recs[i].deleted) {{
+            try {{ FS.unlink(path); }} catch (e) {{}}
+            continue;
+        }}
+        _saveMkdirs(FS, path);
+        FS.writeFile(path, await _saveInflate(recs[i]));
+    }}
+    _saveSeen = _saveWalk(FS, '/', {{}});
+    return recs.length;
+}}
+
+// Store files changed since the last sync (and tombstones for deletions)
+async function syncSaves() {{
+    if (!_saveFS || !_saveSeen || _saveBusy) return;
+    _saveBusy = true;
+    try {{
+        var now = _saveWalk(_saveFS, '/', {{}});
+        var puts = [], dels = [], bytes = 0, p;
+        for (p in now) {{
+            if (now[p] === _saveSeen[p]) continue;
+            var data = _saveFS.readFile(p);
+            var c = await _saveDeflate(data);
+            bytes += c.data.length;
+            puts.push({{ id: GAME_HASH + '|' + p, z: c.z, data: c.data, size: data.length }});
+        }}
+        for (p in _saveSeen) {{
+            if (p in now) continue;
+            if (p in _saveBase) puts.push({{ id: GAME_HASH + '|' + p, deleted: true }});
+            else dels.push(GAME_HASH + '|' + p);
+        }}
+        if (!puts.length && !dels.length) return;
+        var db = await _saveOpenDB();
+        if (!db) return;
+        await _saveTx(db, 'readwrite', function(st) {{
+            puts.forEach(function(r) {{ st.put(r); }});
+            dels.forEach(function(k) {{ st.delete(k); }});
+        }});
+        _saveSeen = now;
+        setDebugStat('saves', puts.length + ' file(s) stored, ' + (bytes / 1024).toFixed(1) + ' KB');
+    }} catch (e) {{
+        console.warn('Save sync failed:', e);
+    }} finally {{
+        _saveBusy = false;
+    }}
+}}
+
+function _startSaveSync() {{
+    setInterval(syncSaves, 5000);
+    document.addEventListener('visibilitychange', function() {{
+        if (document.visibilityState === 'hidden') syncSaves();
+    }});
+    window.addEventListener('pagehide', syncSaves);
+}}
+
 // --- Base64 Decoder ---
 function b64toBytes(b64) {{
     var raw = atob(b64);
@@ -697,27 +1209,56 @@ function b64toBytes(b64) {{
     return arr;
 }}
 
+// --- Streaming WASM compilation ---
+// WASM_B64 is decoded one slice per pull into a ReadableStream, so
+// compileStreaming compiles on background threads while the main thread
+// decodes the next slice (and the rest of the boot carries on).
+var B64_SLICE = 1 << 20; // characters per slice, multiple of 4
+
+function b64Stream(b64) {{
+    var pos = 0;
+    return new ReadableStream({{
+        pull: function(controller) {{
+            if (pos >= b64.length) {{ controller.close(); return; }}
+            controller.enqueue(b64toBytes(b64.slice(pos, pos + B64_SLICE)));
+            pos += B64_SLICE;
+        }}
+    }});
+}}
+
+function compileWasmB64(b64) {{
+    if (!WebAssembly.compileStreaming || !window.ReadableStream) {{
+        return WebAssembly.compile(b64toBytes(b64));
+    }}
+    var response = new Response(b64Stream(b64), {{ headers: {{ 'Content-Type': 'application/wasm' }} }});
+    return WebAssembly.compileStreaming(response).catch(function(err) {{
+        console.warn('Streaming compile failed, buffering instead:', err);
+        return WebAssembly.compile(b64toBytes(b64));
+    }});
+}}
+
 // --- Main Boot ---
 (async function() {{
     try {{
-        // Step 1: Decode WASM binary
-        setProgress(10, 'Decoding WASM engine...');
-        var wasmBytes = b64toBytes(WASM_B64);
-        WASM_B64 = null; // free memory
-        console.log('WASM decoded:', wasmBytes.length, 'bytes');
-
-        // Step 2: Compile WebAssembly module
-        setProgress(25, 'Compiling WebAssembly...');
-        var wasmModule = await WebAssembly.compile(wasmBytes.buffer);
-        wasmBytes = null;
-        console.log('WASM compiled');
-
-        // Step 3: Set up instantiateWasm hook
+        // Step 1-2: Start compiling the WASM engine; it streams in the background
+        setProgress(10, 'Compiling WebAssembly...');
+        var wasmModulePromise = compileWasmB64(WASM_B64).then(function(wasmModule) {{
+            markBoot('wasm compiled');
+            return wasmModule;
+        }});
+        WASM_B64 = null; // the stream keeps its own reference until drained
+
+        // Step 3: Set up instantiateWasm hook (waits for the streaming compile)
         setProgress(35, 'Setting up emulator...');
         window.exports = window.exports || {{}};
         window.exports.instantiateWasm = function(info, receiveInstance) {{
-            WebAssembly.instantiate(wasmModule, info).then(function(instance) {{
-                receiveInstance(instance, wasmModule);
+            wasmModulePromise.then(function(wasmModule) {{
+                return WebAssembly.instantiate(wasmModule, info).then(function(instance) {{
+                    receiveInstance(instance, wasmModule);
+                }});
+            }}).catch(function(err) {{
+                console.error('WASM error:', err);
+                showError('Failed to compile the DOSBox engine:\\n' + err.message);
             }});
         }};
 
@@ -741,6 +1282,12 @@ function b64toBytes(b64) {{
         // Step 6: Decode dosbox.conf
         var confText = new TextDecoder().decode(b64toBytes(DOSBOX_CONF_B64));
         DOSBOX_CONF_B64 = null;
+        var audioProfile = pickAudioProfile();
+        if (audioProfile !== AUDIO_CONF_PROFILE) {{
+            confText = applyAudioProfile(confText, audioProfile);
+        }}
+        _audioStats.profile = audioProfile;
+        console.log('Audio profile:', audioProfile);
 
         // Step 7: Start js-dos
         setProgress(75, 'Starting DOSBox...');
@@ -756,9 +1303,16 @@ function b64toBytes(b64) {{
 
             // Extract game ZIP to root /
             fs.extract(gameUrl).then(function() {{
+                if (!PERSIST) return 0;
+                setProgress(90, 'Restoring saved files...');
+                return restoreSaves(fs.fs).catch(function(err) {{
+                    console.warn('Save restore failed:', err);
+                    return 0;
+                }});
+            }}).then(function(restored) {{
                 setProgress(95, 'Launching ' + EXE_NAME + '...');
                 URL.revokeObjectURL(gameUrl);
-                console.log('Game extracted, launching:', EXE_NAME);
+                console.log('Game extracted (' + restored + ' saved file(s) restored), launching:', EXE_NAME);
 
                 // Build launch args:
                 // js-dos auto-prepends: -userconf -c "mount c ." -c "c:"
@@ -776,8 +1330,11 @@ function b64toBytes(b64) {{
 
                 main(args).then(function(ci) {{
                     hideLoading();
+                    markBoot('tti');
                     console.log('DOSBox running!');
                     window._ci = ci; // store command interface
+                    _startAudioStats(ci);
+                    if (PERSIST) _startSaveSync();
 
                     // Auto-focus canvas
                     canvas.focus();
@@ -923,61 +1480,94 @@ JSDOS_KEYCODES = {
     'Y/N': None,  # Special: Y then N buttons
 }
 
+# KeyboardEvent.code / KeyboardEvent.key for named keys
+_KEY_EVENT_CODES = {
+    'Esc': 'Escape', 'Enter': 'Enter', 'Space': 'Space', 'Backspace': 'Backspace',
+    'Tab': 'Tab', 'Shift': 'ShiftLeft', 'Ctrl': 'ControlLeft', 'Alt': 'AltLeft',
+    'Up': 'ArrowUp', 'Down': 'ArrowDown', 'Left': 'ArrowLeft', 'Right': 'ArrowRight',
+}
+_KEY_EVENT_KEYS = {
+    'Esc': 'Escape', 'Enter': 'Enter', 'Space': ' ', 'Backspace': 'Backspace',
+    'Tab': 'Tab', 'Shift': 'Shift', 'Ctrl': 'Control', 'Alt': 'Alt',
+    'Up': 'ArrowUp', 'Down': 'ArrowDown', 'Left': 'ArrowLeft', 'Right': 'ArrowRight',
+}
+
+
+def _key_code(key):
+    """JS keyCode for a virtual key name."""
+    kc = JSDOS_KEYCODES.get(key)
+    if kc is None:
+        kc = ord(key[0]) if len(key) == 1 else 0
+    return kc
+
+
+def _key_event_code(key):
+    """KeyboardEvent.code for a virtual key name."""
+    if key in _KEY_EVENT_CODES:
+        return _KEY_EVENT_CODES[key]
+    if len(key) == 1 and key.isdigit():
+        return 'Digit' + key
+    if len(key) == 1:
+        return 'Key' + key.upper()
+    return key
 
-def _generate_gamepad_html_js(layout='gamepad'):
-    """Generate gamepad HTML and JS."""
-    # Button mappings: label → [keyCode, keyName]
+
+def _key_slot(key_index, key):
+    """Return the slot of a key in the shared key tables, registering it if new."""
+    return key_index.setdefault(key, len(key_index))
+
+
+def _generate_gamepad_html_js(layout='gamepad', key_index=None):
+    """Generate gamepad HTML and JS.
+
+    Controls only carry a data-k slot into the shared key tables (see
+    _generate_virtual_keyboard); a single delegated Pointer Events handler
+    on #gamepad drives the D-pad, action buttons and system bar.
+    """
+    if key_index is None:
+        key_index = {}
+
+    # Button mappings: label → key name
     if layout == 'gamepad-prince':
         btn_map = {
-            'A': [16, 'Shift'],     # Sword / careful step
-            'B': [32, 'Space'],     # Jump
-            'X': [38, 'Up'],        # Climb / run faster
-            'Y': [27, 'Esc'],       # Menu
+            'A': 'Shift',     # Sword / careful step
+            'B': 'Space',     # Jump
+            'X': 'Up',        # Climb / run faster
+            'Y': 'Esc',       # Menu
         }
         sys_keys = ['Ctrl', 'F1', 'F2', 'Space']
     else:
         # Default gamepad: good for most action games
         btn_map = {
-            'A': [32, 'Space'],     # Jump / action
-            'B': [13, 'Enter'],     # Confirm
-            'X': [17, 'Ctrl'],      # Alt action / fire
-            'Y': [27, 'Esc'],       # Menu / back
+            'A': 'Space',     # Jump / action
+            'B': 'Enter',     # Confirm
+            'X': 'Ctrl',      # Alt action / fire
+            'Y': 'Esc',       # Menu / back
         }
         sys_keys = ['F1', 'F2', 'F3', 'Shift', 'Tab', '1', '2', '3']
 
+    # D-pad slots in bit order: up, down, left, right
+    dp_slots = [_key_slot(key_index, k) for k in ('Up', 'Down', 'Left', 'Right')]
+
     # -- D-pad + actions + sysbar HTML --
     sys_btns = ''
     for sk in sys_keys:
-        kc = JSDOS_KEYCODES.get(sk, ord(sk[0]) if len(sk) == 1 else 0)
         label = sk
         if sk == 'Space': label = '␣'
         elif sk == 'Shift': label = '⇧'
         elif sk == 'Tab': label = '⇥'
-        sys_btns += (
-            f'<button data-kc="{kc}" data-key="{sk}" '
-            f'ontouchstart="gpSysDown(this,event)" '
-            f'ontouchend="gpSysUp(this,event)">{label}</button>\n        '
-        )
+        sys_btns += f'<button data-k="{_key_slot(key_index, sk)}">{label}</button>\n        '
 
     # Action button HTML
     act_btns = ''
     for pos in ['a', 'b', 'x', 'y']:
         label = pos.upper()
-        info = btn_map[label]
-        act_btns += (
-            f'<div class="gp-btn btn-{pos}" data-kc="{info[0]}" '
-            f'data-key="{info[1]}" data-label="{label}" '
-            f'ontouchstart="gpBtnDown(this,event)" '
-            f'ontouchend="gpBtnUp(this,event)">{label}</div>\n    '
-        )
+        slot = _key_slot(key_index, btn_map[label])
+        act_btns += f'<div class="gp-btn btn-{pos}" data-k="{slot}">{label}</div>\n    '
 
     gp_html = f'''<div id="gamepad">
     <!-- D-pad (angle-based touch zone) -->
-    <div id="gp-dpad"
-         ontouchstart="gpDpadTouch(event)"
-         ontouchmove="gpDpadTouch(event)"
-         ontouchend="gpDpadRelease(event)"
-         ontouchcancel="gpDpadRelease(event)">
+    <div id="gp-dpad">
         <div class="dp-arrow dp-up" id="dp-up">▲</div>
         <div class="dp-arrow dp-down" id="dp-down">▼</div>
         <div class="dp-arrow dp-left" id="dp-left">◄</div>
@@ -994,30 +1584,20 @@ def _generate_gamepad_html_js(layout='gamepad'):
         {sys_btns}</div>
 </div>'''
 
-    gp_js = """
+    gp_js = f"""
 // ============ GAMEPAD TOUCH CONTROLLER ============
 
-var _gpCanvas = null;
-function _gpGetCanvas() {
-    if (!_gpCanvas) _gpCanvas = document.getElementById('jsdos');
-    return _gpCanvas;
-}
+var GP_DP_SLOTS = new Uint8Array({json.dumps(dp_slots)});
+""" + """
+// D-pad direction bits (up=1, down=2, left=4, right=8) for each 45° sector,
+// starting at "right" and turning clockwise (screen Y points down)
+var GP_DP_MASK = new Uint8Array([8, 10, 2, 6, 4, 5, 1, 9]);
+var GP_DP_IDS = ['dp-up', 'dp-down', 'dp-left', 'dp-right'];
 
-// Send key events to the emulator canvas
-function _gpKeyDown(kc, keyName) {
-    var c = _gpGetCanvas(); if (!c) return;
-    c.dispatchEvent(new KeyboardEvent('keydown', {
-        keyCode: kc, which: kc, code: _keyToCode(keyName),
-        key: _keyToEventKey(keyName), bubbles: true, cancelable: true
-    }));
-}
-function _gpKeyUp(kc, keyName) {
-    var c = _gpGetCanvas(); if (!c) return;
-    c.dispatchEvent(new KeyboardEvent('keyup', {
-        keyCode: kc, which: kc, code: _keyToCode(keyName),
-        key: _keyToEventKey(keyName), bubbles: true, cancelable: true
-    }));
-}
+var _gpPtr = {};        // pointerId → pressed element, or 'dpad'
+var _gpDpMask = 0;
+var _gpDpRect = null;
+var _gpDpEls = null;
 
 // Optional haptic feedback
 function _gpVibrate(ms) {
@@ -1025,117 +1605,87 @@ function _gpVibrate(ms) {
 }
 
 // ---- D-PAD (angle-based) ----
-var _dpActive = { up: false, down: false, left: false, right: false };
-var _dpKC = { up: [38, 'Up'], down: [40, 'Down'], left: [37, 'Left'], right: [39, 'Right'] };
-
-function gpDpadTouch(e) {
-    e.preventDefault();
-    var dpad = document.getElementById('gp-dpad');
-    var rect = dpad.getBoundingClientRect();
-    var cx = rect.left + rect.width / 2;
-    var cy = rect.top + rect.height / 2;
-
-    // Use first touch on the dpad
-    var touch = e.touches[0];
-    var dx = touch.clientX - cx;
-    var dy = touch.clientY - cy;
-    var dist = Math.sqrt(dx * dx + dy * dy);
-    var radius = rect.width / 2;
-
-    // Dead zone: 15% of radius
-    var newState = { up: false, down: false, left: false, right: false };
-    if (dist > radius * 0.15) {
-        var angle = Math.atan2(dy, dx) * (180 / Math.PI); // -180 to 180
-        // 8-directional with 45° zones
-        // Right: -22.5 to 22.5
-        // Down-Right: 22.5 to 67.5
-        // Down: 67.5 to 112.5
-        // Down-Left: 112.5 to 157.5
-        // Left: 157.5 to 180 or -180 to -157.5
-        // Up-Left: -157.5 to -112.5
-        // Up: -112.5 to -67.5
-        // Up-Right: -67.5 to -22.5
-        if (angle >= -67.5 && angle < -22.5)  { newState.up = true; newState.right = true; }
-        else if (angle >= -112.5 && angle < -67.5) { newState.up = true; }
-        else if (angle >= -157.5 && angle < -112.5) { newState.up = true; newState.left = true; }
-        else if (angle >= 157.5 || angle < -157.5) { newState.left = true; }
-        else if (angle >= 112.5 && angle < 157.5) { newState.down = true; newState.left = true; }
-        else if (angle >= 67.5 && angle < 112.5) { newState.down = true; }
-        else if (angle >= 22.5 && angle < 67.5) { newState.down = true; newState.right = true; }
-        else { newState.right = true; }
+function _gpDpadSet(mask, e) {
+    var changed = mask ^ _gpDpMask;
+    if (!changed) return;
+    if (!_gpDpEls) _gpDpEls = GP_DP_IDS.map(function(id) { return document.getElementById(id); });
+    for (var i = 0; i < 4; i++) {
+        var bit = 1 << i;
+        if (!(changed & bit)) continue;
+        var on = (mask & bit) !== 0;
+        _inKey(GP_DP_SLOTS[i], on, e);
+        _gpDpEls[i].classList.toggle('active', on);
     }
+    if (mask & changed) _gpVibrate(8);
+    _gpDpMask = mask;
+}
 
-    // Update keys — only send events for changes
-    var dirs = ['up', 'down', 'left', 'right'];
-    var changed = false;
-    for (var i = 0; i < dirs.length; i++) {
-        var d = dirs[i];
-        if (newState[d] && !_dpActive[d]) {
-            _gpKeyDown(_dpKC[d][0], _dpKC[d][1]);
-            document.getElementById('dp-' + d).classList.add('active');
-            changed = true;
-        } else if (!newState[d] && _dpActive[d]) {
-            _gpKeyUp(_dpKC[d][0], _dpKC[d][1]);
-            document.getElementById('dp-' + d).classList.remove('active');
-            changed = true;
-        }
+function _gpDpadMove(e) {
+    var r = _gpDpRect;
+    var dx = e.clientX - (r.left + r.width / 2);
+    var dy = e.clientY - (r.top + r.height / 2);
+    var radius = r.width / 2;
+    var mask = 0;
+    // Dead zone: 15% of radius
+    if (dx * dx + dy * dy > radius * radius * 0.0225) {
+        mask = GP_DP_MASK[Math.round(Math.atan2(dy, dx) / (Math.PI / 4)) & 7];
     }
-    if (changed) _gpVibrate(8);
-    _dpActive = newState;
+    _gpDpadSet(mask, e);
 }
 
-function gpDpadRelease(e) {
-    e.preventDefault();
-    var dirs = ['up', 'down', 'left', 'right'];
-    for (var i = 0; i < dirs.length; i++) {
-        var d = dirs[i];
-        if (_dpActive[d]) {
-            _gpKeyUp(_dpKC[d][0], _dpKC[d][1]);
-            document.getElementById('dp-' + d).classList.remove('active');
+// ---- Delegated pointer handler (D-pad, action buttons, system bar) ----
+(function() {
+    var pad = document.getElementById('gamepad');
+    if (!pad) return;
+
+    pad.addEventListener('pointerdown', function(e) {
+        var t = e.target.closest('#gp-dpad, [data-k]');
+        if (!t) return;
+        e.preventDefault();
+        if (t.setPointerCapture) t.setPointerCapture(e.pointerId);
+        if (t.id === 'gp-dpad') {
+            _gpPtr[e.pointerId] = 'dpad';
+            _gpDpRect = t.getBoundingClientRect();
+            _gpDpadMove(e);
+        } else {
+            _gpPtr[e.pointerId] = t;
+            t.classList.add('active');
+            _inKey(+t.dataset.k, true, e);
+            if (t.classList.contains('gp-btn')) _gpVibrate(15);
+        }
+    });
+
+    pad.addEventListener('pointermove', function(e) {
+        if (_gpPtr[e.pointerId] !== 'dpad') return;
+        e.preventDefault();
+        _gpDpadMove(e);
+    });
+
+    function release(e) {
+        var t = _gpPtr[e.pointerId];
+        if (!t) return;
+        delete _gpPtr[e.pointerId];
+        e.preventDefault();
+        if (t === 'dpad') {
+            _gpDpadSet(0, e);
+        } else {
+            t.classList.remove('active');
+            _inKey(+t.dataset.k, false, e);
         }
     }
-    _dpActive = { up: false, down: false, left: false, right: false };
-}
-
-// ---- ACTION BUTTONS ----
-function gpBtnDown(btn, e) {
-    e.preventDefault();
-    var kc = parseInt(btn.dataset.kc);
-    var key = btn.dataset.key;
-    btn.classList.add('active');
-    _gpKeyDown(kc, key);
-    _gpVibrate(15);
-}
-function gpBtnUp(btn, e) {
-    e.preventDefault();
-    var kc = parseInt(btn.dataset.kc);
-    var key = btn.dataset.key;
-    btn.classList.remove('active');
-    _gpKeyUp(kc, key);
-}
-
-// ---- SYSTEM BAR BUTTONS ----
-function gpSysDown(btn, e) {
-    e.preventDefault();
-    var kc = parseInt(btn.dataset.kc);
-    var key = btn.dataset.key;
-    btn.classList.add('active');
-    _gpKeyDown(kc, key);
-}
-function gpSysUp(btn, e) {
-    e.preventDefault();
-    var kc = parseInt(btn.dataset.kc);
-    var key = btn.dataset.key;
-    btn.classList.remove('active');
-    _gpKeyUp(kc, key);
-}
+    pad.addEventListener('pointerup', release);
+    pad.addEventListener('pointercancel', release);
+})();
 """
 
     return gp_html, gp_js
 
 
-def _generate_keyboard_html_js(layout='default'):
+def _generate_keyboard_html_js(layout='default', key_index=None):
     """Generate keyboard HTML and JS."""
+    if key_index is None:
+        key_index = {}
+
     if layout == 'minimal':
         rows = [
             ['Esc', 'Up', 'Enter', 'Space'],
@@ -1172,7 +1722,6 @@ def _generate_keyboard_html_js(layout='default'):
     for row in rows:
         buttons_html = []
         for key in row:
-            kc = JSDOS_KEYCODES.get(key, ord(key[0]) if len(key) == 1 else 0)
             css_class = ''
             if key in ('Space',):
                 css_class = ' class="space"'
@@ -1191,9 +1740,7 @@ def _generate_keyboard_html_js(layout='default'):
             elif key == 'Shift': label = '⇧'
 
             buttons_html.append(
-                f'<button{css_class} data-kc="{kc}" data-key="{key}" '
-                f'ontouchstart="vkbDown(this,event)" ontouchend="vkbUp(this,event)">'
-                f'{label}</button>'
+                f'<button{css_class} data-k="{_key_slot(key_index, key)}">{label}</button>'
             )
 
         row_inner = '\n        '.join(buttons_html)
@@ -1205,35 +1752,33 @@ def _generate_keyboard_html_js(layout='default'):
     kb_js = """
 // ============ KEYBOARD TOUCH CONTROLLER ============
 
-function vkbDown(btn, e) {
-    if (e) e.preventDefault();
-    var kc = parseInt(btn.dataset.kc);
-    var key = btn.dataset.key;
-    if (!kc && !key) return;
-    btn.style.background = 'rgba(0,150,255,0.4)';
-
-    var canvas = document.getElementById('jsdos');
-    if (!canvas) return;
-    canvas.dispatchEvent(new KeyboardEvent('keydown', {
-        keyCode: kc, which: kc, code: _keyToCode(key),
-        key: _keyToEventKey(key), bubbles: true, cancelable: true
-    }));
-}
-
-function vkbUp(btn, e) {
-    if (e) e.preventDefault();
-    var kc = parseInt(btn.dataset.kc);
-    var key = btn.dataset.key;
-    if (!kc && !key) return;
-    btn.style.background = '';
-
-    var canvas = document.getElementById('jsdos');
-    if (!canvas) return;
-    canvas.dispatchEvent(new KeyboardEvent('keyup', {
-        keyCode: kc, which: kc, code: _keyToCode(key),
-        key: _keyToEventKey(key), bubbles: true, cancelable: true
-    }));
-}
+// Delegated pointer handler: one listener for every key, multi-touch by pointerId
+(function() {
+    var kb = document.getElementById('vkb');
+    if (!kb) return;
+    var ptr = {};
+
+    kb.addEventListener('pointerdown', function(e) {
+        var t = e.target.closest('[data-k]');
+        if (!t) return;
+        e.preventDefault();
+        if (t.setPointerCapture) t.setPointerCapture(e.pointerId);
+        ptr[e.pointerId] = t;
+        t.classList.add('active');
+        _inKey(+t.dataset.k, true, e);
+    });
+
+    function release(e) {
+        var t = ptr[e.pointerId];
+        if (!t) return;
+        delete ptr[e.pointerId];
+        e.preventDefault();
+        t.classList.remove('active');
+        _inKey(+t.dataset.k, false, e);
+    }
+    kb.addEventListener('pointerup', release);
+    kb.addEventListener('pointercancel', release);
+})();
 """
 
     return kb_html, kb_js
@@ -1250,6 +1795,12 @@ def _generate_virtual_keyboard(layout='default'):
       - gamepad-prince: optimized for Prince of Persia (default mode: gamepad)
       - minimal, arrows: simple keyboard overlays (default mode: keyboard)
       - adventure, default: full keyboard overlays (default mode: keyboard)
+
+    Every key used by either control surface gets a slot in shared lookup
+    tables (keyCode in a Uint8Array, event code/key strings) computed here,
+    so touch handlers never resolve key names at runtime. Key events are
+    queued and dispatched to the canvas once per animation frame; with
+    ?debug the average touch-to-dispatch latency is shown in the overlay.
     """
 
     # Determine which specific layouts to use for each mode
@@ -1260,37 +1811,72 @@ def _generate_virtual_keyboard(layout='default'):
         gp_layout = 'gamepad'    # fallback gamepad
         kb_layout = layout       # e.g. 'default', 'minimal', 'arrows', 'adventure'
 
-    # Generate both
-    gp_html, gp_js = _generate_gamepad_html_js(gp_layout)
-    kb_html, kb_js = _generate_keyboard_html_js(kb_layout)
+    # Generate both, sharing one key table
+    key_index = {}
+    gp_html, gp_js = _generate_gamepad_html_js(gp_layout, key_index)
+    kb_html, kb_js = _generate_keyboard_html_js(kb_layout, key_index)
 
     # Combine HTML (gamepad + keyboard)
     combined_html = gp_html + '\n' + kb_html
 
-    # Shared key helpers (used by both modes) — only once
-    shared_js = """
-function _keyToCode(key) {
-    var map = {
-        'Esc':'Escape','Enter':'Enter','Space':'Space','Backspace':'Backspace',
-        'Tab':'Tab','Shift':'ShiftLeft','Ctrl':'ControlLeft','Alt':'AltLeft',
-        'Up':'ArrowUp','Down':'ArrowDown','Left':'ArrowLeft','Right':'ArrowRight',
-        'F1':'F1','F2':'F2','F3':'F3','F4':'F4','F5':'F5','F6':'F6',
-        'F7':'F7','F8':'F8','F9':'F9','F10':'F10'
-    };
-    if (map[key]) return map[key];
-    if (key.length === 1 && key >= '0' && key <= '9') return 'Digit' + key;
-    if (key.length === 1) return 'Key' + key.toUpperCase();
-    return key;
+    keys = sorted(key_index, key=key_index.get)
+
+    # Shared key tables + frame-batched dispatch (used by both modes) — only once
+    shared_js = f"""
+// ============ INPUT PIPELINE ============
+
+// Key tables indexed by the data-k slot of each control
+var KEY_KC = new Uint8Array({json.dumps([_key_code(k) for k in keys])});
+var KEY_CODE = {json.dumps([_key_event_code(k) for k in keys])};
+var KEY_KEY = {json.dumps([_KEY_EVENT_KEYS.get(k, k) for k in keys])};
+""" + """
+var _inCanvas = null;
+var _inQueue = [];          // [slot, down, eventTimeStamp] waiting for the next frame
+var _inScheduled = false;
+var _inLatSum = 0, _inLatN = 0;
+
+function _inDispatch(slot, down) {
+    if (!_inCanvas) _inCanvas = document.getElementById('jsdos');
+    if (!_inCanvas) return;
+    var kc = KEY_KC[slot];
+    _inCanvas.dispatchEvent(new KeyboardEvent(down ? 'keydown' : 'keyup', {
+        keyCode: kc, which: kc, code: KEY_CODE[slot],
+        key: KEY_KEY[slot], bubbles: true, cancelable: true
+    }));
+}
+
+function _inFlush() {
+    _inScheduled = false;
+    var q = _inQueue, carry = [], pressed = {};
+    _inQueue = [];
+    for (var i = 0; i < q.length; i++) {
+        var ev = q[i];
+        // A release queued in the same frame as its press waits one frame,
+        // so the emulator always sees quick taps
+        if (!ev[1] && pressed[ev[0]]) { carry.push(ev); continue; }
+        if (ev[1]) pressed[ev[0]] = 1;
+        _inDispatch(ev[0], ev[1]);
+        if (DEBUG && ev[2]) { _inLatSum += performance.now() - ev[2]; _inLatN++; }
+    }
+    if (carry.length) {
+        _inQueue = carry.concat(_inQueue);
+        _inSchedule();
+    }
+    if (DEBUG && _inLatN) {
+        setDebugStat('input', (_inLatSum / _inLatN).toFixed(1) + ' ms avg touch→key (' + _inLatN + ' events)');
+    }
+}
+
+function _inSchedule() {
+    if (_inScheduled) return;
+    _inScheduled = true;
+    requestAnimationFrame(_inFlush);
 }
 
-function _keyToEventKey(key) {
-    var map = {
-        'Esc':'Escape','Enter':'Enter','Space':' ','Backspace':'Backspace',
-        'Tab':'Tab','Shift':'Shift','Ctrl':'Control','Alt':'Alt',
-        'Up':'ArrowUp','Down':'ArrowDown','Left':'ArrowLeft','Right':'ArrowRight'
-    };
-    if (map[key]) return map[key];
-    return key;
+// Queue a key press/release for the next animation frame
+function _inKey(slot, down, e) {
+    _inQueue.push([slot, down, e ? e.timeStamp : 0]);
+    _inSchedule();
 }
 """
 
@@ -1337,9 +1923,15 @@ Examples:
     parser.add_argument('--sound', default='sb16',
                         choices=['sb16', 'sb1', 'sb2', 'sbpro1', 'sbpro2', 'none'],
                         help='Sound card emulation (default: sb16)')
+    parser.add_argument('--audio', default='auto',
+                        choices=['auto'] + list(AUDIO_PROFILES),
+                        help='Audio profile: auto (picked at boot from a device probe), '
+                             'low-latency, balanced, low-cpu (default: auto)')
     parser.add_argument('--keyboard', '-k', default='gamepad',
                         choices=['gamepad', 'gamepad-prince', 'default', 'minimal', 'arrows', 'adventure'],
                         help='Touch controls layout: gamepad (D-pad+buttons), gamepad-prince, default, minimal, arrows, adventure')
+    parser.add_argument('--no-save', action='store_true',
+                        help="Don't persist files written by the game (saves, config) in the browser")
     parser.add_argument('--extra-conf', help='Extra DOSBox config to inject (string or @file)')
     parser.add_argument('--cache-dir', default='.jsdos_cache',
                         help='Directory to cache downloaded js-dos assets')
@@ -1370,7 +1962,7 @@ Examples:
         print(f"   Executables found:")
         for exe in zip_info['executables'][:10]:
             marker = " ← auto-selected" if exe == zip_info['executables'][0] and not args.exe else ""
-            print(f"     {exe['path']} ({exe['size']:,} bytes){marker}")
+            print(f"     {exe['path']} ({exe['size']:,} bytes, {exe['format']}){marker}")
     else:
         print(f"   ⚠️  No DOS executables found!")
 
@@ -1404,7 +1996,7 @@ Examples:
             extra_conf = args.extra_conf
 
     # Generate DOSBox config
-    print(f"⚙️  DOSBox config: cycles={args.cycles}, memory={args.memory}MB, sound={args.sound}")
+    print(f"⚙️  DOSBox config: cycles={args.cycles}, memory={args.memory}MB, sound={args.sound}, audio={args.audio}")
     dosbox_conf = generate_dosbox_conf(
         exe_name=exe_name,
         cycles=args.cycles,
@@ -1412,11 +2004,13 @@ Examples:
         sound=args.sound,
         extra_conf=extra_conf,
         root_dir=zip_info.get('root_dir'),
+        audio_profile=args.audio,
     )
 
     # Download/cache js-dos assets
     print(f"📦 Loading js-dos {JSDOS_VERSION} assets...")
     jsdos_assets = load_jsdos_assets(args.cache_dir)
+    engine_fragment = load_engine_fragment(args.cache_dir, jsdos_assets)
 
     # Generate HTML
     print(f"🏗️  Generating HTML...")
@@ -1424,10 +2018,12 @@ Examples:
         game_zip_path=args.zip,
         title=title,
         exe_name=exe_name,
-        jsdos_assets=jsdos_assets,
+        engine_fragment=engine_fragment,
         dosbox_conf=dosbox_conf,
         keyboard_layout=args.keyboard,
         root_dir=zip_info.get('root_dir'),
+        audio_profile=args.audio,
+        persist=not args.no_save,
     )
 
     # Write output